@@ -1,12 +1,44 @@
 import copy
+import heapq
+import multiprocessing
 import random
-import subprocess
-from chromosome import Chromosome
-from globals import input_file
+import time
+from chromosome import Chromosome, compute_costs, random_population
+from instrumentation import Instrumentation
+from options import GAOptions
+from selection import TruncationSelection
+from validator import run_validator
+
+# GeneticAlgorithm used by the worker processes of the pool only for its mutation operator
+_worker_ga = None
+
+def _init_worker(evaluator, index_maps, nurse_assignment, repair, ot_packing):
+  global _worker_ga
+  Chromosome.evaluator = evaluator
+  Chromosome.index_maps = index_maps
+  # the workers do not keep a fitness cache: the costs they compute are cached by the main process
+  Chromosome.fitness_cache = None
+  _worker_ga = GeneticAlgorithm([], 0, [], [], [], [], [], [], [], [], 0, options=GAOptions(nurse_assignment=nurse_assignment, repair=repair, ot_packing=ot_packing))
+
+def _breed_child(task):
+  # Mutation, nurse coverage, evaluation and repair of one child in a worker process, with its own seed.
+  # It returns the child, the outcome of repair_child and the number of costs computed.
+  child, seed, probabilities = task
+  random.seed(seed)
+  evaluations = Chromosome.evaluations
+  _worker_ga.mutation_probability, _worker_ga.schedule_non_mandatory, _worker_ga.unschedule_non_mandatory = probabilities
+  child = _worker_ga.mutation(child)
+  child.fix_uncovered_rooms()
+  child.compute_cost()
+  repaired = _worker_ga.repair_child(child)
+  return child, repaired, Chromosome.evaluations-evaluations
+
 
 class GeneticAlgorithm:
 
-  def __init__(self, first_population, eras, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D, crossover_probability=0.8, mutation_probability=0.1, schedule_non_mandatory=0.5, unschedule_non_mandatory=0.4):
+  def __init__(self, first_population, eras, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D, crossover_probability=0.8, mutation_probability=0.1, schedule_non_mandatory=0.5, unschedule_non_mandatory=0.4, injections=True, report=True, options=None):
+    # optional components (see options.py), all disabled by default
+    options = options if options is not None else GAOptions()
     self.patients = patients
     self.nurses = nurses
     self.occupants = occupants
@@ -18,7 +50,9 @@ class GeneticAlgorithm:
     self.D = D
     self.current_population = first_population
     self.num_population = len(first_population) # size of the population
-    self.num_selected = int(0.4*self.num_population) # number of chromosomes selected at selection stage
+    # how the parents are selected and who survives (see selection.py), truncation by default
+    self.selection_strategy = options.selection_strategy if options.selection_strategy is not None else TruncationSelection()
+    self.num_selected = self.selection_strategy.num_parents(self.num_population) # number of chromosomes selected at selection stage
     self.num_eras = eras
     self.original_crossover_probability = crossover_probability
     self.original_mutation_probability = mutation_probability
@@ -33,6 +67,26 @@ class GeneticAlgorithm:
     self.stagnation = 10
     self.flag_save_file = False
     self.best_file = None
+    # with num_workers>1, mutation and evaluation of the offspring run on a pool of processes
+    self.num_workers = options.num_workers
+    self.pool = None
+    # injections = False disables the random-restart injections (e.g. for the islands);
+    # report = False disables the per-era validator report
+    self.injections = injections
+    self.report = report
+    self.local_search = options.local_search
+    self.termination = options.termination
+    self.checkpoint = options.checkpoint
+    if self.checkpoint is not None and Chromosome.evaluator is None:
+      raise ValueError("The checkpoints need the in-process evaluator (Chromosome.evaluator)")
+    self.start_era = 0
+    self.instrumentation = options.instrumentation if options.instrumentation is not None else Instrumentation()
+    self.elapsed_before = 0 # seconds and evaluations of the run before the restored checkpoint
+    self.evaluations_before = 0
+    self.initializer = options.initializer
+    self.nurse_assignment = options.nurse_assignment
+    self.repair = options.repair
+    self.ot_packing = options.ot_packing
 
 
   def hasChanged(self, child):
@@ -43,57 +97,64 @@ class GeneticAlgorithm:
   
   def crossover(self, parent1, parent2):
     num_patients = random.randint(1, 10) # choose randomly the number of patients to exchange
-    child1 = copy.deepcopy(parent1) # chromosome 1
-    child2 = copy.deepcopy(parent2) # chromosome 2
+    with self.instrumentation.timer("deepcopy"):
+      child1 = copy.deepcopy(parent1) # chromosome 1
+      child2 = copy.deepcopy(parent2) # chromosome 2
     for i1 in random.sample(list(range(len(child1.patients))), num_patients):
-        for i2 in range(len(child2.patients)):
-            if child1.patients[i1].id == child2.patients[i2].id:
-                temp_patient2 = child2.patients[i2]
-                temp_patient1 = child1.patients[i1]
-                if temp_patient2.admission_day is not None and temp_patient1.admission_day is not None:
-                    # after having selected the patient to exchange, first they are both unscheduled in their 
-                    # respective chromosomes.
-                    temp_patient2.room.remove_patient(temp_patient2)
-                    temp_patient2.surgeon.unschedule_surgery(temp_patient2.admission_day, temp_patient2.surgery_duration)
-                    temp_patient2.operating_theater.unschedule_patient(temp_patient2)
-         
-                    temp_patient1.room.remove_patient(temp_patient1)
-                    temp_patient1.surgeon.unschedule_surgery(temp_patient1.admission_day, temp_patient1.surgery_duration)
-                    temp_patient1.operating_theater.unschedule_patient(temp_patient1)
-                  
-                    # They are then scheduled within the chromosome to which they are assigned after the crossover
-                    # without changing their admission day, room and operating theater
-                    temp_patient2.room = child1.get_room(temp_patient2.room.id)
-                    temp_patient2.room.add_patient(temp_patient2)
-                    temp_patient2.surgeon = child1.get_surgeon(temp_patient2.surgeon.id)
-                    temp_patient2.surgeon.schedule_surgery(temp_patient2.admission_day, temp_patient2.surgery_duration)
-                    temp_patient2.operating_theater = child1.get_ot(temp_patient2.operating_theater.id)
-                    temp_patient2.operating_theater.schedule_patient(temp_patient2)
-                    temp_patient2.rooms = child1.rooms
-                    temp_patient2.operating_theaters = child1.ots
-                    child1.patients[i1] = temp_patient2
-                    
-                    temp_patient1.room = child2.get_room(temp_patient1.room.id)
-                    temp_patient1.room.add_patient(temp_patient1)
-                    temp_patient1.surgeon = child2.get_surgeon(temp_patient1.surgeon.id)
-                    temp_patient1.surgeon.schedule_surgery(temp_patient1.admission_day, temp_patient1.surgery_duration)
-                    temp_patient1.operating_theater = child2.get_ot(temp_patient1.operating_theater.id)
-                    temp_patient1.operating_theater.schedule_patient(temp_patient1)
-                    temp_patient1.rooms = child2.rooms
-                    temp_patient1.operating_theaters = child2.ots
-                    child2.patients[i2] = temp_patient1
-                    
-                    child1.crossovered = 1
-                    child2.crossovered = 1
+        # the same patient is found in the second chromosome through the shared id -> position map
+        i2 = child2.get_patient_position(child1.patients[i1].id)
+        temp_patient2 = child2.patients[i2]
+        temp_patient1 = child1.patients[i1]
+        if temp_patient2.admission_day is not None and temp_patient1.admission_day is not None:
+            # after having selected the patient to exchange, first they are both unscheduled in their 
+            # respective chromosomes.
+            temp_patient2.room.remove_patient(temp_patient2)
+            temp_patient2.surgeon.unschedule_surgery(temp_patient2.admission_day, temp_patient2.surgery_duration)
+            temp_patient2.operating_theater.unschedule_patient(temp_patient2)
+ 
+            temp_patient1.room.remove_patient(temp_patient1)
+            temp_patient1.surgeon.unschedule_surgery(temp_patient1.admission_day, temp_patient1.surgery_duration)
+            temp_patient1.operating_theater.unschedule_patient(temp_patient1)
+          
+            # They are then scheduled within the chromosome to which they are assigned after the crossover
+            # without changing their admission day, room and operating theater
+            temp_patient2.room = child1.get_room(temp_patient2.room.id)
+            temp_patient2.room.add_patient(temp_patient2)
+            temp_patient2.surgeon = child1.get_surgeon(temp_patient2.surgeon.id)
+            temp_patient2.surgeon.schedule_surgery(temp_patient2.admission_day, temp_patient2.surgery_duration)
+            temp_patient2.operating_theater = child1.get_ot(temp_patient2.operating_theater.id)
+            temp_patient2.operating_theater.schedule_patient(temp_patient2)
+            temp_patient2.rooms = child1.rooms
+            temp_patient2.operating_theaters = child1.ots
+            child1.patients[i1] = temp_patient2
+            
+            temp_patient1.room = child2.get_room(temp_patient1.room.id)
+            temp_patient1.room.add_patient(temp_patient1)
+            temp_patient1.surgeon = child2.get_surgeon(temp_patient1.surgeon.id)
+            temp_patient1.surgeon.schedule_surgery(temp_patient1.admission_day, temp_patient1.surgery_duration)
+            temp_patient1.operating_theater = child2.get_ot(temp_patient1.operating_theater.id)
+            temp_patient1.operating_theater.schedule_patient(temp_patient1)
+            temp_patient1.rooms = child2.rooms
+            temp_patient1.operating_theaters = child2.ots
+            child2.patients[i2] = temp_patient1
+            
+            child1.crossovered = 1
+            child2.crossovered = 1
     
     return child1, child2
   
 
   def selection(self):
-    sorted_chromosomes = sorted(self.current_population, \
-                                  key = lambda chr : chr.total_cost[1])
+    # parents sorted by cost; with steady-state replacement they are the whole (sorted) population
+    return self.selection_strategy.parents(self.current_population)
 
-    return sorted_chromosomes[:self.num_selected]
+
+  def mate(self, parent1, parent2):
+    if random.random()<self.crossover_probability:
+      with self.instrumentation.timer("crossover"):
+        return self.crossover(parent1, parent2)
+    with self.instrumentation.timer("deepcopy"):
+      return copy.deepcopy(parent1), copy.deepcopy(parent2)
 
 
   def mutate_patient(self, patient, child, mandatory):
@@ -135,6 +196,9 @@ class GeneticAlgorithm:
                       patient.room.add_patient(patient)
                       child.mutated = 1
                       break
+          else:
+              # no day is available: the patient keeps its current admission day
+              patient.admission_day = current_admission_day
 
 
   def mutation(self, child):
@@ -160,6 +224,19 @@ class GeneticAlgorithm:
                     patient.admission_day = None
                     child.mutated = 1
 
+    # With the OTPacking operator, the surgeries of each day are packed again with probability
+    # mutation_probability, regrouping them by surgeon in as few operating theaters as possible.
+    if self.ot_packing is not None:
+        if self.ot_packing.mutate(child, self.mutation_probability):
+            child.mutated = 1
+
+    # With the NurseAssignment operator, the nurses of each shift are reassigned with probability
+    # mutation_probability, minimizing the skill, workload and continuity of care costs of that shift.
+    if self.nurse_assignment is not None:
+        if self.nurse_assignment.mutate(child, self.mutation_probability):
+            child.mutated = 1
+        return child
+
     # In this loop, for each nurse, we randomly decide whether to assign additional rooms to be 
     # covered during a specific shift or to remove some of the existing room assignments.
     for nurse in random.sample(child.nurses, len(child.nurses)):
@@ -176,68 +253,249 @@ class GeneticAlgorithm:
                         for r in nurse.assigned_room[shift]:
                             r.assign_nurse(nurse, shift)
                         child.mutated = 1
-                elif len(nurse.assigned_room[shift])>0:
+                elif len(nurse.assigned_room.get(shift, ()))>0:
                     num_rooms_to_remove = random.randint(0, len(nurse.assigned_room[shift]))
                     rooms_to_remove = random.sample(nurse.assigned_room[shift], num_rooms_to_remove)
                     for r in rooms_to_remove:
                         r.remove_nurse(shift)
-                    nurse.assigned_room[shift] = list(set(nurse.assigned_room[shift])-set(rooms_to_remove))
+                    nurse.assigned_room[shift] = [r for r in nurse.assigned_room[shift] if r not in rooms_to_remove]
                     child.mutated = 1
     return child
   
   
+  def repair_child(self, child):
+      # A child with hard violations is repaired and scored again instead of being rejected. It returns
+      # None if the child had no hard violations, otherwise True if the repair removed all of them.
+      if child.total_cost[0]==0:
+          return None
+      if self.repair is None:
+          return False
+      with self.instrumentation.timer("repair"):
+          if not self.repair.repair(child):
+              return False
+      with self.instrumentation.timer("compute_cost"):
+          child.compute_cost()
+      return child.total_cost[0]==0
+
+
+  def count_child(self, child, repaired):
+      # feasible and infeasible refer to the child as it was bred; the infeasible ones are then either
+      # repaired or rejected
+      self.instrumentation.count("offspring")
+      if repaired is None:
+          self.instrumentation.count("feasible")
+          return
+      self.instrumentation.count("infeasible")
+      self.instrumentation.count("repaired" if repaired else "rejected")
+      if self.repair is not None:
+          self.repair.count(repaired)
+
+
+  def admit_child(self, child, new_population, era, repaired):
+      self.count_child(child, repaired)
+      if child.total_cost[0]==0 and len(new_population)<self.num_population and self.hasChanged(child)==True:
+          new_population.append(child)
+          self.instrumentation.count("admitted")
+          print(f"new child added at era {era}, length current population = {len(new_population)}")
+          print(f"Crossovered: {child.crossovered}  Mutated: {child.mutated}")
+          child.crossovered = 0
+          child.mutated = 0
+
+
+  def parallel_offspring(self, parents, new_population, era):
+      # Batches of children are created until the new generation is full. Each batch has at least
+      # one child per worker; its feasible children are admitted in the order they were created.
+      probabilities = (self.mutation_probability, self.schedule_non_mandatory, self.unschedule_non_mandatory)
+      while len(new_population)!=self.num_population:
+          num_children = max(self.num_population-len(new_population), self.num_workers)
+          tasks = []
+          while len(tasks)<num_children:
+              child1, child2 = self.mate(*random.sample(parents, 2))
+              tasks.append((child1, random.getrandbits(32), probabilities))
+              tasks.append((child2, random.getrandbits(32), probabilities))
+          with self.instrumentation.timer("offspring_pool"):
+              results = self.pool.map(_breed_child, tasks)
+          for child, repaired, evaluations in results:
+              Chromosome.evaluations += evaluations # evaluated by the worker
+              child.cache_cost()
+              self.admit_child(child, new_population, era, repaired)
+
+
+  def steady_state_offspring(self, population, era):
+      # Steady-state replacement (see selection.py). The children are bred in batches, of two children
+      # without the pool and of at least one child per worker with the pool, and each feasible child
+      # replaces the worst chromosome of the sorted population, so the next batches can breed from it.
+      strategy = self.selection_strategy
+      population.sort(key=lambda c: c.total_cost[1]) # linear, unless local search or injections changed the order
+      present = set(ch.hasher.value for ch in population)
+      probabilities = (self.mutation_probability, self.schedule_non_mandatory, self.unschedule_non_mandatory)
+      num_children = strategy.num_children(self.num_population)
+      created = 0
+      while created<num_children:
+          children = []
+          while len(children)<(2 if self.pool is None else max(2, self.num_workers)):
+              parent1 = strategy.tournament(population)
+              children += self.mate(parent1, strategy.tournament(population, excluded=parent1))
+          if self.pool is not None:
+              with self.instrumentation.timer("offspring_pool"):
+                  results = self.pool.map(_breed_child, [(child, random.getrandbits(32), probabilities) for child in children])
+              children = []
+              outcomes = []
+              for child, repaired, evaluations in results:
+                  Chromosome.evaluations += evaluations # evaluated by the worker
+                  child.cache_cost()
+                  children.append(child)
+                  outcomes.append(repaired)
+          else:
+              for i, child in enumerate(children):
+                  with self.instrumentation.timer("mutation"):
+                      children[i] = self.mutation(child)
+                  with self.instrumentation.timer("fix_uncovered_rooms"):
+                      children[i].fix_uncovered_rooms()
+              with self.instrumentation.timer("compute_cost"):
+                  compute_costs(children)
+              outcomes = [self.repair_child(child) for child in children]
+          for child, repaired in zip(children, outcomes):
+              self.count_child(child, repaired)
+              if child.total_cost[0]==0 and self.hasChanged(child) and strategy.replace_worst(population, present, child):
+                  self.instrumentation.count("admitted")
+                  print(f"new child added at era {era}, cost = {child.total_cost[1]}")
+                  child.crossovered = 0
+                  child.mutated = 0
+          created += len(children)
+      return population
+
+
   def evolve(self):
-    era = 0
+    era = self.start_era
+    self.start_time = time.time() - self.elapsed_before
+    self.start_evaluations = Chromosome.evaluations - self.evaluations_before
+    if self.termination is not None:
+      self.termination.start(self.elapsed_before, self.evaluations_before)
+    self.start_pool()
+    self.instrumentation.start_era()
     while era<self.num_eras:
+      self.evolve_era(era)
+      era+=1
+      # a checkpoint is saved periodically and whenever the best chromosome changes
+      if self.checkpoint is not None and (era % self.checkpoint.interval == 0 or self.num_times_best == 1):
+        self.checkpoint.submit(self.checkpoint_state(era))
+      if self.termination is not None:
+        reason = self.termination.stop_reason(self)
+        if reason is not None:
+          print(f"Evolution stopped after era {era}: {reason}")
+          break
+    self.stop_pool()
+    self.instrumentation.close()
+    if self.checkpoint is not None:
+      self.checkpoint.submit(self.checkpoint_state(era))
+      self.checkpoint.close()
+
+
+  def checkpoint_state(self, era):
+    # Snapshot of the GA after era eras, with the population in its compact Genome form. It is taken in
+    # the main loop, so the CheckpointWriter thread never reads objects that are being changed.
+    best = [i for i, ch in enumerate(self.current_population) if ch is self.best]
+    return {
+      "era": era,
+      "population": [ch.to_genome() for ch in self.current_population],
+      "total_costs": [ch.total_cost for ch in self.current_population],
+      "best": best[0] if len(best)>0 else None,
+      "best_solution": self.get_best().to_json() if self.best is None else self.best.to_json(),
+      "num_times_best": self.num_times_best,
+      "probabilities": (self.crossover_probability, self.mutation_probability, self.schedule_non_mandatory, self.unschedule_non_mandatory),
+      "random_state": random.getstate(),
+      "elapsed": time.time() - self.start_time,
+      "evaluations": Chromosome.evaluations - self.start_evaluations
+    }
+
+
+  def restore(self, state):
+    # It continues the run saved in state (see checkpoint.py). The current population must be the one
+    # rebuilt from the same state (population_from_checkpoint).
+    self.start_era = state["era"]
+    self.crossover_probability, self.mutation_probability, self.schedule_non_mandatory, self.unschedule_non_mandatory = state["probabilities"]
+    self.num_times_best = state["num_times_best"]
+    if state["best"] is not None:
+      self.best = self.current_population[state["best"]]
+    random.setstate(state["random_state"])
+    self.elapsed_before = state["elapsed"]
+    self.evaluations_before = state["evaluations"]
+
+
+  def __getstate__(self):
+    # the pool of worker processes cannot be pickled
+    state = self.__dict__.copy()
+    state["pool"] = None
+    return state
+
+
+  def start_pool(self):
+    if self.num_workers>1 and self.pool is None:
+      self.pool = multiprocessing.Pool(self.num_workers, initializer=_init_worker, initargs=(Chromosome.evaluator, Chromosome.index_maps, self.nurse_assignment, self.repair, self.ot_packing))
+
+
+  def stop_pool(self):
+    if self.pool is not None:
+      self.pool.close()
+      self.pool.join()
+      self.pool = None
+
+
+  def evolve_era(self, era):
       print(era)
-      parents = self.selection() # we select the parents by choosing the best chromosomes of the population
-      if self.num_times_best>=2*self.stagnation and random.random()>0.5:
-          parents = self.enforce_injection(era, parents)
-      new_population = []+parents
+      timer = self.instrumentation.timer
+      with timer("selection"):
+          parents = self.selection() # we select the parents by choosing the best chromosomes of the population
+      if self.local_search is not None:
+          with timer("local_search"):
+              parents = self.local_search.improve_population(parents)
+          print(self.local_search.report())
+      if self.injections and self.num_times_best>=2*self.stagnation and random.random()>0.5:
+          with timer("injection"):
+              parents = self.enforce_injection(era, parents)
+      if self.selection_strategy.steady_state:
+          new_population = self.steady_state_offspring(parents, era)
+      else:
+          new_population = []+parents
       
+      if self.pool is not None and not self.selection_strategy.steady_state:
+          self.parallel_offspring(parents, new_population, era)
       while len(new_population)!=self.num_population: # creation of the new generation
-          parent1, parent2 = random.sample(parents, 2)
-          if random.random()<self.crossover_probability:
-              child1, child2 = self.crossover(parent1, parent2)
-          else:
-              child1, child2 = copy.deepcopy(parent1), copy.deepcopy(parent2)
-          child1 = self.mutation(child1)
-          child1.fix_uncovered_rooms()
-          child1.compute_cost()
-          if child1.total_cost[0]==0 and len(new_population)<self.num_population and self.hasChanged(child1)==True:
-              new_population.append(child1)
-              print(f"new child added at era {era}, length current population = {len(new_population)}")
-              print(f"Crossovered: {child1.crossovered}  Mutated: {child1.mutated}")
-              child1.crossovered = 0
-              child1.mutated = 0
-          child2 = self.mutation(child2)
-          child2.fix_uncovered_rooms()
-          child2.compute_cost()
-          if child2.total_cost[0]==0 and len(new_population)<self.num_population and self.hasChanged(child2)==True:
-              new_population.append(child2)
-              print(f"new child added at era {era}, length current population = {len(new_population)}")
-              print(f"Crossovered: {child2.crossovered}  Mutated: {child2.mutated}")
-              child2.crossovered = 0
-              child2.mutated = 0
+          child1, child2 = self.mate(*random.sample(parents, 2))
+          with timer("mutation"):
+              child1 = self.mutation(child1)
+          with timer("fix_uncovered_rooms"):
+              child1.fix_uncovered_rooms()
+          with timer("mutation"):
+              child2 = self.mutation(child2)
+          with timer("fix_uncovered_rooms"):
+              child2.fix_uncovered_rooms()
+          with timer("compute_cost"):
+              compute_costs([child1, child2])
+          self.admit_child(child1, new_population, era, self.repair_child(child1))
+          self.admit_child(child2, new_population, era, self.repair_child(child2))
 
+      if self.repair is not None:
+          print(self.repair.report())
       self.current_population = new_population
       sol = self.get_best()
       self.probability_adaptation(sol)
-      if self.num_times_best>=self.stagnation:
-          self.injection(era) 
-      if self.flag_save_file == False:
-          self.best_file = self.best.save_solution()
-          self.flag_save_file = True
-      era+=1
-      
-      # At each era, we keep track of the current best chromosome.
-      result = subprocess.run(
-            ["IHTP_Validator_2.exe", input_file, self.best_file],
-            capture_output=True,  
-            text=True             
-        )
-
-      print(result.stdout)
+      if self.injections and self.num_times_best>=self.stagnation:
+          with timer("injection"):
+              self.injection(era) 
+      if self.report:
+          with timer("report"):
+              if self.flag_save_file == False:
+                  self.best_file = self.best.save_solution()
+                  self.flag_save_file = True
+              # At each era, we keep track of the current best chromosome.
+              output = run_validator(self.best_file)
+          print(output)
+      self.instrumentation.end_era(era, self)
+      if Chromosome.fitness_cache is not None:
+          print(Chromosome.fitness_cache.report())
+          Chromosome.fitness_cache.reset_counters()
       print()
 
     
@@ -246,15 +504,10 @@ class GeneticAlgorithm:
     # It substitutes the worst chromosomes with new ones in order to insert more diversity and introduce
     # new crossover opportunities.
     n_new_chromosomes = len(chromosomes)-int(0.8*len(chromosomes))# choose the number of chromosomes to change
-    new_chromosomes = []
-    while len(new_chromosomes)!=n_new_chromosomes:
-      ch = Chromosome(self.patients, self.occupants, self.rooms, self.nurses, self.surgeons, self.ots, self.room_ids, self.ot_ids, self.D)
-      if ch.random_initialize() == True:
-        ch.compute_cost()
-        if ch.total_cost[0]==0:
-            new_chromosomes.append(ch)
-    chromosomes.sort(key=lambda c: c.total_cost[1])  
-    chromosomes[-n_new_chromosomes:] = new_chromosomes
+    new_chromosomes = self.new_chromosomes(n_new_chromosomes)
+    worst = heapq.nlargest(len(new_chromosomes), range(len(chromosomes)), key=lambda i: chromosomes[i].total_cost[1])
+    for i, ch in zip(worst, new_chromosomes):
+      chromosomes[i] = ch
     random.shuffle(chromosomes)
     print(f"Injection enforced at era {era}")
     return chromosomes
@@ -296,24 +549,42 @@ class GeneticAlgorithm:
       # It tries to inject new chromosomes in the population if the algorithm is stuck in a local minimum
       print(f"Reinjection at era {era} (num_times_best = {self.num_times_best})")
       num_new = int(0.2 * self.num_population) 
-      count = 0
-      while count != num_new:
-          new_chr = Chromosome(
-              self.patients, self.occupants, self.rooms, self.nurses, self.surgeons, self.ots,
-              self.room_ids, self.ot_ids, self.D
-          )
-          new_chr.random_initialize()
-          new_chr.compute_cost()
-          if new_chr.total_cost[0]==0:
-            count+=1
-            self.current_population.append(new_chr)
-      self.current_population.sort(key=lambda c: c.total_cost[1])
-      self.current_population = self.current_population[:self.num_population]
+      self.current_population = heapq.nsmallest(self.num_population, self.current_population + self.new_chromosomes(num_new),
+                                                key=lambda c: c.total_cost[1])
+
+
+  def new_chromosomes(self, n):
+      # n new chromosomes without hard violations (fewer if the constructive initializer runs out of attempts)
+      if self.initializer is not None:
+          return self.initializer.population(n, self.patients, self.occupants, self.rooms, self.nurses, self.surgeons,
+                                             self.ots, self.room_ids, self.ot_ids, self.D)
+      return random_population(n, self.patients, self.occupants, self.rooms, self.nurses, self.surgeons, self.ots,
+                               self.room_ids, self.ot_ids, self.D)
+
+
+  def emigrants(self, num_migrants):
+    # the best feasible chromosomes of the population, sent as genomes to another island
+    feasible = [ch for ch in self.current_population if ch.total_cost[0]==0]
+    return heapq.nsmallest(num_migrants, feasible, key=lambda c: c.total_cost[1])
+
+
+  def immigrate(self, chromosomes):
+    # The feasible chromosomes received from another island replace the worst ones of the population.
+    # Schedules already in the population are discarded.
+    present = set(ch.hasher.value for ch in self.current_population)
+    # positions of the worst chromosomes, from the worst
+    worst = heapq.nlargest(len(chromosomes), range(len(self.current_population)), key=lambda i: self.current_population[i].total_cost[1])
+    position = 0
+    for ch in chromosomes:
+        if ch.total_cost[0]==0 and ch.hasher.value not in present and position<len(worst):
+            if ch.total_cost[1]<self.current_population[worst[position]].total_cost[1]:
+                self.current_population[worst[position]] = ch
+                present.add(ch.hasher.value)
+                position+=1
 
 
   def get_best(self):
-    # It returns the best chromsome of the current population
-    self.current_population.sort(key=lambda chr: chr.total_cost[1])
-    return self.current_population[0]
+    # It returns the best chromsome of the current population (the first one among equal costs)
+    return min(self.current_population, key=lambda chr: chr.total_cost[1])
 
   
\ No newline at end of file
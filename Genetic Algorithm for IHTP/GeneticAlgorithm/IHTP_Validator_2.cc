@@ -5,6 +5,12 @@
 // 1. Download the JSON library at https://github.com/nlohmann/json/blob/develop/single_include/nlohmann/json.hpp
 // 2. Compile with a C++ compiler, for example with the GNU Compiler: g++ -o IHTP_Validator IHTP_Validator.cc 
 // 3. Run with: ./IHTP_Validator <instance_file> <solution_file> [verbose] 
+// Batch mode (the instance is read only once):
+//    ./IHTP_Validator <instance_file> --batch               (one solution per line on stdin, JSON Lines)
+//    ./IHTP_Validator <instance_file> --batch <directory>   (all the .json files of the directory)
+//    For each solution, one line with a JSON record with all the violations and costs is printed on stdout
+// Shared library (Linux), with the C API at the end of this file and without main:
+//    g++ -O2 -std=c++17 -shared -fPIC -DIHTP_LIBRARY -o libihtp_validator.so IHTP_Validator_2.cc
 
 #include <iostream>
 #include <iomanip>
@@ -13,6 +19,8 @@
 #include <vector>
 #include <string>
 #include <stdexcept>
+#include <filesystem>
+#include <algorithm>
 #include "json.hpp"
 
 using namespace std; 
@@ -178,7 +186,9 @@ class IHTP_Output
 {
  public:
   IHTP_Output(const IHTP_Input& my_in, string file_name, bool verbose);
+  IHTP_Output(const IHTP_Input& my_in, bool verbose);
   void ReadJSON(string file_name);
+  void ReadJSON(const nlohmann::json& j_sol);
   void AssignPatient(int p, int d, int r, int t);
   void AssignNurse(int n, int r, int s);
   void UpdatewithOccupantsInfo();
@@ -221,7 +231,10 @@ class IHTP_Output
   int CountDistinctNurses(int p) const;
   int CountOccupantNurses(int o) const;
 
+  vector<pair<string,int>> Violations() const;
+  vector<pair<string,int>> Costs() const;
   void PrintCosts() const;
+  nlohmann::json CostsJSON() const;
  private:
   const IHTP_Input& in;
   const bool VERBOSE;
@@ -481,6 +494,12 @@ int IHTP_Input::FindNurse(string nurse_id) const
 }
 
 IHTP_Output::IHTP_Output(const IHTP_Input& my_in, string file_name, bool verbose)
+  : IHTP_Output(my_in, verbose)
+{
+  ReadJSON(file_name);
+}
+
+IHTP_Output::IHTP_Output(const IHTP_Input& my_in, bool verbose)
   : in(my_in), VERBOSE(verbose), admission_day(in.Patients(),-1), room(in.Patients(),-1), 
    operating_room(in.Patients(),-1),
    patient_shift_nurse(in.Patients()+in.Occupants()),
@@ -500,25 +519,31 @@ IHTP_Output::IHTP_Output(const IHTP_Input& my_in, string file_name, bool verbose
       patient_shift_nurse[p].resize(in.PatientLengthOfStay(p)*in.ShiftsPerDay(),-1);
     else
       patient_shift_nurse[p].resize(in.OccupantLengthOfStay(p-in.Patients())*in.ShiftsPerDay(),-1);
-
-  ReadJSON(file_name);
+  Reset();
 }
 
 void IHTP_Output::ReadJSON(string file_name)
 {
-	nlohmann::json j_sol, j_p, j_n;
-	unsigned i, j, p, n, cn;
-	int d, s, r, t;
-	string patient_id, nurse_id, room_id, ot_id, shift_name;
+	nlohmann::json j_sol;
 	ifstream is(file_name);
 
 	if(!is)
     throw invalid_argument("Cannot open solution file " + file_name);
   is >> j_sol;
+  ReadJSON(j_sol);
+}
+
+void IHTP_Output::ReadJSON(const nlohmann::json& j_sol)
+{
+	nlohmann::json j_p, j_n;
+	unsigned i, j, p, n, cn;
+	int d, s, r, t;
+	string patient_id, nurse_id, room_id, ot_id, shift_name;
+
 	Reset();
-	for (i = 0; i < j_sol["patients"].size(); i++)
+	for (i = 0; i < j_sol.at("patients").size(); i++)
 	{
-	  j_p = j_sol["patients"][i];
+	  j_p = j_sol.at("patients")[i];
 	  if (j_p["admission_day"] != "none")
 	  {
 	    patient_id = j_p["id"];
@@ -537,9 +562,9 @@ void IHTP_Output::ReadJSON(string file_name)
 		  AssignPatient(p,d,r,t);
 	  }		  
 	}
-	for (n = 0; n < j_sol["nurses"].size(); n++)
+	for (n = 0; n < j_sol.at("nurses").size(); n++)
 	{
-	  j_n = j_sol["nurses"][n];
+	  j_n = j_sol.at("nurses")[n];
 	  nurse_id = j_n["id"];	
     cn=in.FindNurse(nurse_id);
 	  for (i = 0; i < j_n["assignments"].size(); i++)
@@ -1085,12 +1110,9 @@ int IHTP_Output::CountOccupantNurses(int o) const
 }
 
 
-void IHTP_Output::PrintCosts() const
+vector<pair<string,int>> IHTP_Output::Violations() const
 {
-  int total_violations = 0, total_cost = 0;
-  unsigned i;
-
-  vector<pair<string,int>> violations{
+  return {
 	  {"RoomGenderMix", RoomGenderMix()},
 	  {"PatientRoomCompatibility", PatientRoomCompatibility()},
 	  {"SurgeonOvertime", SurgeonOvertime()},
@@ -1100,8 +1122,11 @@ void IHTP_Output::PrintCosts() const
 	  {"RoomCapacity", RoomCapacity()},
 	  {"NursePresence", NursePresence()},
 	  {"UncoveredRoom", UncoveredRoom()}};
+}
 
-  vector<pair<string,int>> costs{
+vector<pair<string,int>> IHTP_Output::Costs() const
+{ // unweighted costs, in the same order of the weights
+  return {
 	  {"RoomAgeMix", RoomAgeMix()},
 	  {"RoomSkillLevel", RoomSkillLevel()},
 	  {"ContinuityOfCare", ContinuityOfCare()},
@@ -1110,7 +1135,15 @@ void IHTP_Output::PrintCosts() const
     {"SurgeonTransfer", SurgeonTransfer()},
 	  {"PatientDelay", PatientDelay()},
 	  {"ElectiveUnscheduledPatients", ElectiveUnscheduledPatients()}};
-   
+}
+
+void IHTP_Output::PrintCosts() const
+{
+  int total_violations = 0, total_cost = 0;
+  unsigned i;
+
+  vector<pair<string,int>> violations = Violations();
+  vector<pair<string,int>> costs = Costs();
 
   cout << "VIOLATIONS: " << endl;
   for (i = 0; i < violations.size(); i++)
@@ -1137,19 +1170,234 @@ void IHTP_Output::PrintCosts() const
   cout << "Total cost = " << total_cost << endl;
 }
 
+nlohmann::json IHTP_Output::CostsJSON() const
+{ // machine-readable version of PrintCosts: every violation and (unweighted and weighted) cost
+  int total_violations = 0, total_cost = 0;
+  unsigned i;
+  nlohmann::json j_out, j_violations, j_costs, j_weighted_costs;
+
+  vector<pair<string,int>> violations = Violations();
+  vector<pair<string,int>> costs = Costs();
+
+  for (i = 0; i < violations.size(); i++)
+  {
+    j_violations[violations[i].first] = violations[i].second;
+    total_violations += violations[i].second;
+  }
+  for (i = 0; i < costs.size(); i++)
+  {
+    j_costs[costs[i].first] = costs[i].second;
+    j_weighted_costs[costs[i].first] = costs[i].second * in.Weight(i);
+    total_cost += costs[i].second * in.Weight(i);
+  }
+  j_out["violations"] = j_violations;
+  j_out["costs"] = j_costs;
+  j_out["weighted_costs"] = j_weighted_costs;
+  j_out["total_violations"] = total_violations;
+  j_out["total_cost"] = total_cost;
+  return j_out;
+}
+
+nlohmann::json BatchRecord(IHTP_Output& out, const nlohmann::json& j_sol)
+{ // the record of a solution, or the error found while reading it
+  nlohmann::json j_rec;
+  try
+  {
+    out.ReadJSON(j_sol);
+    j_rec = out.CostsJSON();
+  }
+  catch (exception& e)
+  {
+    j_rec["error"] = e.what();
+  }
+  return j_rec;
+}
+
+void RunBatch(const IHTP_Input& in, int argc, const char *argv[])
+{ // the instance is read once, and the same output object is reset for each solution
+  IHTP_Output out(in, false);
+  nlohmann::json j_sol, j_rec;
+  string line;
+  unsigned index = 0;
+
+  if (argc == 4)
+  {
+    vector<string> file_names;
+    for (const auto& entry : filesystem::directory_iterator(argv[3]))
+      if (entry.is_regular_file() && entry.path().extension() == ".json")
+        file_names.push_back(entry.path().string());
+    sort(file_names.begin(), file_names.end());
+    for (const string& file_name : file_names)
+    {
+      ifstream is(file_name);
+      try
+      {
+        is >> j_sol;
+        j_rec = BatchRecord(out, j_sol);
+      }
+      catch (exception& e)
+      {
+        j_rec = nlohmann::json();
+        j_rec["error"] = e.what();
+      }
+      j_rec["file"] = file_name;
+      cout << j_rec.dump() << endl;
+    }
+  }
+  else
+    while (getline(cin, line))
+    {
+      if (line.find_first_not_of(" \t\r") == string::npos)
+        continue;
+      try
+      {
+        j_rec = BatchRecord(out, nlohmann::json::parse(line));
+      }
+      catch (exception& e)
+      {
+        j_rec = nlohmann::json();
+        j_rec["error"] = e.what();
+      }
+      j_rec["index"] = index++;
+      cout << j_rec.dump() << endl; // flushed, so that the caller can read it while the next line is written
+    }
+}
+
+#ifdef IHTP_LIBRARY
+// C API of the shared library. A validator holds one instance, read once, and one output object that is
+// reset for each solution, so a validator must not be used by two threads at the same time.
+// The evaluation functions write the unweighted violations and costs, in the order of Violations() and
+// Costs(), in the arrays violations and costs (ihtp_num_violations() and ihtp_num_costs() integers).
+// They return 0, or -1 if the solution is not valid (the reason is given by ihtp_last_error).
+
+struct IHTP_Validator
+{
+  IHTP_Input in;
+  IHTP_Output out;
+  IHTP_Validator(string instance_file) : in(instance_file), out(in, false) {}
+};
+
+static thread_local string last_error;
+
+static void CopyComponents(const IHTP_Output& out, int* violations, int* costs)
+{
+  vector<pair<string,int>> v = out.Violations(), c = out.Costs();
+  for (unsigned i = 0; i < v.size(); i++)
+    violations[i] = v[i].second;
+  for (unsigned i = 0; i < c.size(); i++)
+    costs[i] = c[i].second;
+}
+
+static void CheckIndex(int value, int size, const char* what)
+{
+  if (value < 0 || value >= size)
+  {
+    stringstream ss;
+    ss << "Invalid " << what << " " << value;
+    throw invalid_argument(ss.str());
+  }
+}
+
+extern "C"
+{
+  IHTP_Validator* ihtp_load(const char* instance_file)
+  { // NULL if the instance cannot be read
+    try
+    {
+      return new IHTP_Validator(instance_file);
+    }
+    catch (exception& e)
+    {
+      last_error = e.what();
+      return nullptr;
+    }
+  }
+
+  void ihtp_free(IHTP_Validator* v) { delete v; }
+
+  const char* ihtp_last_error() { return last_error.c_str(); }
+
+  int ihtp_num_violations() { return 9; }
+  int ihtp_num_costs() { return 8; }
+  int ihtp_weight(const IHTP_Validator* v, int c) { return v->in.Weight(c); }
+  int ihtp_patients(const IHTP_Validator* v) { return v->in.Patients(); }
+  int ihtp_rooms(const IHTP_Validator* v) { return v->in.Rooms(); }
+  int ihtp_nurses(const IHTP_Validator* v) { return v->in.Nurses(); }
+  int ihtp_shifts(const IHTP_Validator* v) { return v->in.Shifts(); }
+
+  int ihtp_evaluate_json(IHTP_Validator* v, const char* solution, int* violations, int* costs)
+  { // solution: the text of a solution file
+    try
+    {
+      v->out.ReadJSON(nlohmann::json::parse(solution));
+      CopyComponents(v->out, violations, costs);
+      return 0;
+    }
+    catch (exception& e)
+    {
+      last_error = e.what();
+      return -1;
+    }
+  }
+
+  int ihtp_evaluate_arrays(IHTP_Validator* v, const int* admission_day, const int* room, const int* operating_theater,
+                           const int* nurse_rooms, int num_nurse_rooms, int* violations, int* costs)
+  { // admission_day, room and operating_theater: one value per patient, in the order of the instance file
+    // (admission_day -1 for the patients not scheduled); nurse_rooms: num_nurse_rooms triples (nurse, shift,
+    // room) in the order in which they would be read from a solution file
+    const IHTP_Input& in = v->in;
+    try
+    {
+      v->out.Reset();
+      for (int p = 0; p < in.Patients(); p++)
+        if (admission_day[p] != -1)
+        {
+          CheckIndex(admission_day[p], in.Days(), "admission day");
+          CheckIndex(room[p], in.Rooms(), "room");
+          CheckIndex(operating_theater[p], in.OperatingTheaters(), "operating theater");
+          v->out.AssignPatient(p, admission_day[p], room[p], operating_theater[p]);
+        }
+      for (int i = 0; i < num_nurse_rooms; i++)
+      {
+        CheckIndex(nurse_rooms[3*i], in.Nurses(), "nurse");
+        CheckIndex(nurse_rooms[3*i+1], in.Shifts(), "shift");
+        CheckIndex(nurse_rooms[3*i+2], in.Rooms(), "room");
+        v->out.AssignNurse(nurse_rooms[3*i], nurse_rooms[3*i+2], nurse_rooms[3*i+1]);
+      }
+      CopyComponents(v->out, violations, costs);
+      return 0;
+    }
+    catch (exception& e)
+    {
+      last_error = e.what();
+      return -1;
+    }
+  }
+}
+
+#else
 int main(int argc, const char *argv[])
 {
+  bool batch = (argc == 3 || argc == 4) && string(argv[2]) == "--batch";
   if (argc != 3 && argc != 4)
   {
     cerr << "Usage: " << argv[0] << " <instance_file> <solution_file> [verbose]" << endl;
+    cerr << "       " << argv[0] << " <instance_file> --batch [<solution_directory>]" << endl;
     exit(1);
   }
   string instance_file_name = argv[1];
+  IHTP_Input in(instance_file_name);
+  if (batch)
+  {
+    RunBatch(in, argc, argv);
+    return 0;
+  }
+
   string solution_file_name = argv[2];
   bool verbose = (argc == 4); // any word passed as fourth argument is interpreted as "verbose"
 
-  IHTP_Input in(instance_file_name);
   IHTP_Output out(in, solution_file_name, verbose); 
   out.PrintCosts();
   return 0;
 }
+#endif
@@ -0,0 +1,253 @@
+import argparse
+import contextlib
+import csv
+import glob
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+from chromosome import Chromosome, random_population
+from evaluator import CostEvaluator
+from fitness_cache import FitnessCache
+from GA import GeneticAlgorithm
+from lns import LargeNeighbourhoodSearch
+from instance import load_instance
+from options import DEFAULT_SETTINGS, GAOptions, SELECTION_STRATEGIES
+
+try:
+    import resource # not available on Windows
+except ImportError:
+    resource = None
+
+COLUMNS = ["instance", "seed", "eras", "time", "time_to_feasible", "time_to_target", "evaluations_per_second",
+           "peak_rss_mb", "final_cost", "archived_cost", "gap", "error"]
+
+
+def archived_best(solutions_dir, instance_name):
+    # lowest cost among the archived feasible solutions (solutions/<instance>/ch_0_<cost>.json), or None
+    costs = [int(os.path.basename(f)[5:-5]) for f in glob.glob(os.path.join(solutions_dir, instance_name, "ch_0_*.json"))]
+    return min(costs) if len(costs) > 0 else None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024
+
+
+def settings(config):
+    # settings of GAOptions.from_settings (see options.py) from the command line
+    return {
+        "num_workers": config.workers,
+        "local_search_time": config.local_search_time,
+        "optimize_nurses": config.nurses == "optimized",
+        "pack_ots": config.ots == "packed",
+        "constructive": config.initializer == "constructive",
+        "repair_offspring": config.infeasible == "repair",
+        "selection": config.selection
+    }
+
+
+def run_lns(population, config, options, target, start):
+    # LNS from the best chromosome of the first population, for the rest of the time limit (60 s without
+    # a limit). The eras column holds the LNS iterations.
+    time_limit = config.time_limit if config.time_limit is not None else 60.0
+    lns = LargeNeighbourhoodSearch(time_limit=max(0.0, time_limit-(time.time()-start)), insertion=config.insertion,
+                                   nurse_assignment=options.nurse_assignment)
+    offset = time.time() - start
+    best = lns.solve(min(population, key=lambda ch: ch.total_cost))
+    # the history of the LNS has the seconds since its start and the cost of each new best chromosome
+    time_to_target = next((offset+t for t, c in lns.history if target is not None and c <= target), None)
+    return lns.iterations, time_to_target, best
+
+
+def run_benchmark(instance_file, seed, config, target):
+    # One GA (or LNS) run with the given seed. The output of the solver is discarded.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        data, instance = load_instance(instance_file)
+        patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+        Chromosome.evaluator = CostEvaluator(data)
+        Chromosome.fitness_cache = FitnessCache()
+        Chromosome.evaluations = 0
+        random.seed(seed)
+        options = GAOptions.from_settings(**settings(config))
+        new_population = options.initializer.population if options.initializer is not None else random_population
+        start = time.time()
+        # the first chromosome without hard violations is timed separately
+        population = new_population(1, *instance)
+        time_to_feasible = time.time() - start if len(population) > 0 else None
+        population += new_population(config.population-len(population), *instance)
+        if len(population) < config.population:
+            raise RuntimeError(f"Only {len(population)} chromosomes without hard violations found for {instance_file}")
+        if config.solver == "lns":
+            era, time_to_target, best = run_lns(population, config, options, target, start)
+        else:
+            ga = GeneticAlgorithm(population, config.eras, patients, nurses, rooms, occupants, surgeons, ots, room_ids,
+                                  ot_ids, D, report=False, options=options)
+            time_to_target = None
+            era = 0
+            ga.start_pool()
+            while era < config.eras and (config.time_limit is None or time.time()-start < config.time_limit):
+                ga.evolve_era(era)
+                era += 1
+                if time_to_target is None and target is not None and ga.get_best().total_cost[1] <= target:
+                    time_to_target = time.time() - start
+            ga.stop_pool()
+            best = ga.get_best()
+        elapsed = time.time() - start
+    return {
+        "eras": era,
+        "time": elapsed,
+        "time_to_feasible": time_to_feasible,
+        "time_to_target": time_to_target,
+        "evaluations_per_second": Chromosome.evaluations/elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "final_cost": best.total_cost[1]
+    }
+
+
+def _run_in_process(results, args):
+    try:
+        results.put(run_benchmark(*args))
+    except Exception as e: # sent to the parent process as the error of the run
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(*args, timeout=None, poll_interval=1):
+    # Each run has its own process, so the peak RSS and the class attributes are not shared. A process that
+    # dies or runs for more than timeout seconds gives {"error": ...}.
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_in_process, args=(results, args))
+    process.start()
+    start = time.time()
+    result = None
+    while result is None:
+        try:
+            result = results.get(timeout=poll_interval)
+        except queue.Empty:
+            if not process.is_alive():
+                result = {"error": f"process exited with code {process.exitcode}"}
+            elif timeout is not None and time.time()-start > timeout:
+                process.terminate()
+                result = {"error": f"timeout after {timeout} s"}
+    process.join()
+    return result
+
+
+def compare(rows, baseline_file, tolerance):
+    # It prints the runs that are worse than the baseline table: higher final cost, or time or throughput
+    # worse by more than tolerance (as a fraction)
+    with open(baseline_file, newline="") as f:
+        baseline = {(r["instance"], r["seed"]): r for r in csv.DictReader(f)}
+    regressions = 0
+    for row in rows:
+        old = baseline.get((row["instance"], str(row["seed"])))
+        if old is None or old.get("error"): # runs that failed in the baseline are not compared
+            continue
+        if row["error"] is not None:
+            regressions += 1
+            print(f"REGRESSION {row['instance']} seed {row['seed']}: failed ({row['error']})")
+            continue
+        problems = []
+        if row["final_cost"] > float(old["final_cost"]):
+            problems.append(f"final cost {old['final_cost']} -> {row['final_cost']}")
+        if row["evaluations_per_second"] < float(old["evaluations_per_second"])*(1-tolerance):
+            problems.append(f"evaluations/s {float(old['evaluations_per_second']):.1f} -> {row['evaluations_per_second']:.1f}")
+        if old["time_to_target"] not in ("", "None") and (row["time_to_target"] is None or
+                row["time_to_target"] > float(old["time_to_target"])*(1+tolerance)):
+            problems.append(f"time to target {float(old['time_to_target']):.1f} -> {row['time_to_target']}")
+        if len(problems) > 0:
+            regressions += 1
+            print(f"REGRESSION {row['instance']} seed {row['seed']}: " + ", ".join(problems))
+    print(f"{regressions} regressions against {baseline_file}")
+    return regressions
+
+
+def format_table(rows):
+    def cell(value):
+        if value is None:
+            return "-"
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+    table = [COLUMNS] + [[cell(row[c]) for c in COLUMNS] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(COLUMNS))]
+    return "\n".join("  ".join(value.rjust(w) for value, w in zip(line, widths)) for line in table)
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of the GA over a set of IHTP instances, with fixed seeds")
+    # the defaults of the GA options are the ones of main.py (DEFAULT_SETTINGS)
+    parser.add_argument("--instances", default="i01", help="comma separated instance names (e.g. i01,i02)")
+    parser.add_argument("--instances-dir", default=".", help="directory with the instance files <name>.json")
+    parser.add_argument("--solutions-dir", default="solutions", help="archive of the best solutions")
+    parser.add_argument("--seeds", default="1,2,3", help="comma separated seeds")
+    parser.add_argument("--population", type=int, default=20)
+    parser.add_argument("--eras", type=int, default=100)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per run")
+    parser.add_argument("--workers", type=int, default=DEFAULT_SETTINGS["num_workers"])
+    parser.add_argument("--local-search-time", type=float, default=DEFAULT_SETTINGS["local_search_time"],
+                        help="seconds of local search per era (0 = disabled); the budget is wall clock time, so the "
+                             "runs with local search are not reproducible")
+    parser.add_argument("--initializer", choices=["constructive", "random"],
+                        default="constructive" if DEFAULT_SETTINGS["constructive"] else "random",
+                        help="how the chromosomes of the first population and of the injections are built")
+    parser.add_argument("--nurses", choices=["optimized", "random"],
+                        default="optimized" if DEFAULT_SETTINGS["optimize_nurses"] else "random",
+                        help="nurse assignment of the constructive initializer and of the mutation")
+    parser.add_argument("--solver", choices=["ga", "lns"], default="ga",
+                        help="GA, or LNS from the best chromosome of the first population (for --time-limit seconds)")
+    parser.add_argument("--insertion", choices=["greedy", "regret"], default="greedy",
+                        help="insertion of the patients removed by the LNS")
+    parser.add_argument("--ots", choices=["packed", "random"],
+                        default="packed" if DEFAULT_SETTINGS["pack_ots"] else "random",
+                        help="operating theaters of the constructive initializer and of the mutation")
+    parser.add_argument("--selection", choices=list(SELECTION_STRATEGIES), default=DEFAULT_SETTINGS["selection"],
+                        help="parent selection and replacement strategy")
+    parser.add_argument("--infeasible", choices=["repair", "reject"],
+                        default="repair" if DEFAULT_SETTINGS["repair_offspring"] else "reject",
+                        help="whether the children with hard violations are repaired or rejected")
+    parser.add_argument("--target-gap", type=float, default=0.0,
+                        help="the target cost is the archived best cost increased by this fraction")
+    parser.add_argument("--output", default="benchmark.csv", help="CSV file with the results")
+    parser.add_argument("--baseline", default=None, help="CSV file of a previous benchmark to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative tolerance of the comparison")
+    parser.add_argument("--run-timeout", type=float, default=None,
+                        help="seconds after which a run is stopped and recorded as failed")
+    return parser.parse_args(argv)
+
+
+def main():
+    config = parse_arguments()
+
+    rows = []
+    for instance_name in config.instances.split(","):
+        instance_file = os.path.join(config.instances_dir, f"{instance_name}.json")
+        archived_cost = archived_best(config.solutions_dir, instance_name)
+        target = archived_cost*(1+config.target_gap) if archived_cost is not None else None
+        for seed in [int(s) for s in config.seeds.split(",")]:
+            result = run_isolated(instance_file, seed, config, target, timeout=config.run_timeout)
+            row = dict.fromkeys(COLUMNS)
+            row.update({"instance": instance_name, "seed": seed, "archived_cost": archived_cost})
+            row.update(result)
+            rows.append(row)
+            if row["error"] is not None:
+                print(f"{instance_name} seed {seed}: failed ({row['error']})")
+                continue
+            row["gap"] = (row["final_cost"]-archived_cost)/archived_cost if archived_cost else None
+            print(f"{instance_name} seed {seed}: cost {row['final_cost']} in {row['time']:.1f} s")
+
+    print(format_table(rows))
+    with open(config.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    # the exit status is 1 when a run failed or is worse than the baseline, so the benchmark can gate a CI job
+    failures = sum(1 for row in rows if row["error"] is not None)
+    regressions = compare(rows, config.baseline, config.tolerance) if config.baseline is not None else 0
+    sys.exit(1 if failures > 0 or regressions > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
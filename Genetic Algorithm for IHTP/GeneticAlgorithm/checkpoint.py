@@ -0,0 +1,70 @@
+import json
+import os
+import pickle
+import queue
+import threading
+from chromosome import Chromosome
+
+CHECKPOINT_FILE = "checkpoint.pkl"
+BEST_FILE = "best_solution.json"
+
+
+class CheckpointWriter:
+    # It saves the state of the GA (GeneticAlgorithm.checkpoint_state) from a background thread, keeping only
+    # the latest state. interval: eras between two checkpoints (also saved when the best chromosome changes)
+    def __init__(self, directory="checkpoints", interval=10):
+        self.directory = directory
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+        self.pending = queue.Queue(maxsize=1)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, state):
+        while True:
+            try:
+                self.pending.put_nowait(state)
+                return
+            except queue.Full:
+                try:
+                    self.pending.get_nowait() # the older state is discarded
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        # It waits until the last submitted state has been written
+        self.pending.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            state = self.pending.get()
+            if state is None:
+                return
+            self._write(BEST_FILE, lambda f: json.dump(state["best_solution"], f, indent=2), "w")
+            self._write(CHECKPOINT_FILE, lambda f: pickle.dump(state, f), "wb")
+
+    def _write(self, name, dump, mode):
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", mode) as f:
+            dump(f)
+        os.replace(path + ".tmp", path)
+
+
+def load_checkpoint(directory="checkpoints"):
+    # It returns the last state saved in directory, or None if there is no checkpoint
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def population_from_checkpoint(state, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D):
+    # Chromosomes of the saved population, with their saved costs
+    population = []
+    for genome, total_cost in zip(state["population"], state["total_costs"]):
+        ch = Chromosome.from_genome(genome, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D)
+        ch.total_cost = total_cost
+        population.append(ch)
+    return population
@@ -1,11 +1,41 @@
 import copy
 import json
-import os
-import random, subprocess
-from globals import input_file
+import random
+from coverage import CoverageIndex
+from delta import DeltaCost
+from feasibility import FeasibilityIndex
+from fitness_cache import ScheduleHash
+from genome import Genome
+from validator import validate_chromosomes, write_solution
 
 class Chromosome:
+    # In-process CostEvaluator shared by all the chromosomes. When it is None, compute_cost falls back
+    # to the external validator.
+    evaluator = None
+    # FitnessCache shared by all the chromosomes, looked up by compute_cost (None = no cache)
+    fitness_cache = None
+    # number of costs computed (fitness cache hits excluded), used by the evaluation budget of Termination
+    evaluations = 0
+    # id -> position maps of the patients, rooms, operating theaters, surgeons and nurses of the instance. They are
+    # built once, from the lists passed to the first chromosome, and shared by all the chromosomes.
+    index_maps = None
+    index_source = None
+
+    @classmethod
+    def build_index_maps(cls, patients, rooms, surgeons, ots, nurses):
+        if cls.index_source is patients:
+            return
+        cls.index_maps = {
+            "patient": {p.id: i for i, p in enumerate(patients)},
+            "room": {r.id: i for i, r in enumerate(rooms)},
+            "surgeon": {s.id: i for i, s in enumerate(surgeons)},
+            "ot": {ot.id: i for i, ot in enumerate(ots)},
+            "nurse": {n.id: i for i, n in enumerate(nurses)}
+        }
+        cls.index_source = patients
+
     def __init__(self, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D):
+        self.build_index_maps(patients, rooms, surgeons, ots, nurses)
         self.patients = copy.deepcopy(patients)
         self.nurses = copy.deepcopy(nurses)
         self.occupants = occupants
@@ -20,21 +50,31 @@ class Chromosome:
         self.D = D
         self.crossovered = 0
         self.mutated = 0
+        self.feasibility = FeasibilityIndex(self.rooms, D, self.index_maps["room"])
+        self.coverage = CoverageIndex(self.rooms, self.nurses, D, self.index_maps["room"], self.feasibility)
+        # With the in-process evaluator, the cost is kept up to date incrementally while the chromosome
+        # is built, mutated and crossovered.
+        self.tracker = DeltaCost(self.evaluator, self) if self.evaluator is not None else None
+        self.hasher = ScheduleHash(self.index_maps, self)
+
+    def __setstate__(self, state):
+        # Called when a chromosome is received from (or sent to) a worker process of the GA pool
+        self.__dict__.update(state)
+        if self.tracker is not None:
+            self.tracker.evaluator = self.evaluator
+        self.hasher.index_maps = self.index_maps
+
+    def get_patient_position(self, patient_id):
+        return self.index_maps["patient"][patient_id]
 
     def get_room(self, room_id):
-         for r in self.rooms:
-            if r.id == room_id:
-                return r
+        return self.rooms[self.index_maps["room"][room_id]]
     
     def get_ot(self, ot_id):
-        for ot in self.ots:
-            if ot.id == ot_id:
-                return ot
+        return self.ots[self.index_maps["ot"][ot_id]]
     
     def get_surgeon(self, surgeon_id):
-        for s in self.surgeons:
-            if s.id == surgeon_id:
-                return s
+        return self.surgeons[self.index_maps["surgeon"][surgeon_id]]
 
     def sorted_mandatory_patients(self):
        mandatory_patients = []
@@ -45,29 +85,13 @@ class Chromosome:
     
 
     def find_available_nurses(self, day_shift):
-        available_nurses = []
-        for nurse in self.nurses:
-            if nurse.working_shifts[day_shift]>0:
-                available_nurses.append(nurse)
-        return available_nurses
+        return [self.nurses[n] for n in self.coverage.working[day_shift]]
 
     
     def fix_uncovered_rooms(self):
-        for r in random.sample(self.rooms, len(self.rooms)):
-            for i in range(self.D):
-                if len(r.schedule_patients[i])>0: # check if the room is occupied in the i-th day
-                    for shift_offset in range(3):
-                        day_shift = i*3 + shift_offset
-                        if r.schedule_nurses[day_shift] == '': # check if in that shift of the i-th day, there is a nurse or not.
-                            available_nurses = self.find_available_nurses(day_shift)
-                            if len(available_nurses)>0: 
-                                available_nurse = random.choice(available_nurses)
-                                r.assign_nurse(available_nurse, day_shift)
-                                available_nurse.assigned_room[day_shift].append(r)
-                            else:
-                                return False
-                            
-        return True
+        # It assigns a nurse to every occupied room that is not covered in a shift (see CoverageIndex.repair),
+        # returning False if there is a shift to cover without nurses.
+        return self.coverage.repair()
 
 
     def random_initialize(self): 
@@ -78,19 +102,15 @@ class Chromosome:
         for patient in mandatory_patients:
             patient.rooms = self.rooms
             patient.operating_theaters = self.ots
-            for s in self.surgeons:
-                if s.id == patient.surgeon_id:
-                    patient.surgeon = s
+            patient.surgeon = self.get_surgeon(patient.surgeon_id)
             valid = patient.initialize_patient()
             if valid == False:
                return False
-        non_mandatory_patients = list(set(self.patients)-set(mandatory_patients))
+        non_mandatory_patients = [p for p in self.patients if p.mandatory == False]
         for patient in random.sample(non_mandatory_patients, len(non_mandatory_patients)):
             patient.rooms = self.rooms
             patient.operating_theaters = self.ots
-            for s in self.surgeons:
-                if s.id == patient.surgeon_id:
-                    patient.surgeon = s
+            patient.surgeon = self.get_surgeon(patient.surgeon_id)
             valid_patient = patient.initialize_patient()
             if valid_patient == False:
                return False
@@ -127,11 +147,107 @@ class Chromosome:
         }
 
     
+    def to_genome(self):
+        # Compact array representation of the chromosome (see genome.py)
+        return Genome.from_chromosome(self.evaluator, self)
+
+
+    @classmethod
+    def from_genome(cls, genome, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D):
+        # It builds the chromosome with the schedule of the genome (e.g. a migrant received from another
+        # island), scheduling patients and nurses as random_initialize does.
+        if genome.evaluator is None:
+            if cls.evaluator is None:
+                raise ValueError("The Genome needs the in-process evaluator (Chromosome.evaluator)")
+            genome.evaluator = cls.evaluator
+        ev = genome.evaluator
+        ch = cls(patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D)
+        for patient in ch.patients:
+            patient.rooms = ch.rooms
+            patient.operating_theaters = ch.ots
+            patient.surgeon = ch.get_surgeon(patient.surgeon_id)
+        for p in range(ev.P):
+            if genome.admission_day[p] != -1:
+                patient = ch.patients[ch.get_patient_position(ev.patient_ids[p])]
+                patient.admission_day = genome.admission_day[p]
+                patient.surgeon.schedule_surgery(patient.admission_day, patient.surgery_duration)
+                patient.room = ch.get_room(ev.room_ids[genome.room[p]])
+                patient.room.add_patient(patient)
+                patient.operating_theater = ch.get_ot(ev.ot_ids[genome.ot[p]])
+                patient.operating_theater.schedule_patient(patient)
+        for nurse in ch.nurses:
+            nurse.rooms = ch.rooms
+        for i, n in enumerate(genome.room_shift_nurse):
+            if n != -1:
+                room = ch.get_room(ev.room_ids[i//ev.shifts])
+                nurse = ch.nurses[ch.index_maps["nurse"][ev.nurse_ids[n]]]
+                room.assign_nurse(nurse, i % ev.shifts)
+                nurse.assigned_room[i % ev.shifts].append(room)
+        return ch
+
+
+    @classmethod
+    def from_json(cls, solution, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D):
+        # Chromosome with the schedule of a solution of to_json (e.g. an archived one). What is unknown or no longer
+        # feasible is dropped, then the mandatory patients are scheduled again. It returns None if this fails.
+        ch = cls(patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D)
+        for patient in ch.patients:
+            patient.rooms = ch.rooms
+            patient.operating_theaters = ch.ots
+            patient.surgeon = ch.get_surgeon(patient.surgeon_id)
+        room_position = ch.index_maps["room"]
+        for p in solution["patients"]:
+            if p["admission_day"] == "none" or p["id"] not in ch.index_maps["patient"] or p["room"] not in room_position \
+                    or p["operating_theater"] not in ch.index_maps["ot"]:
+                continue
+            patient = ch.patients[ch.get_patient_position(p["id"])]
+            day = p["admission_day"]
+            last_day = patient.surgery_due_day if patient.mandatory else D-1
+            if patient.admission_day is not None or not patient.surgery_release_day <= day <= last_day:
+                continue
+            ot = ch.get_ot(p["operating_theater"])
+            if not patient.surgeon.check_schedule_surgery(day, patient.surgery_duration) \
+                    or ot.daily_availability[day] < patient.surgery_duration \
+                    or (ch.feasibility.compatible_mask(patient, day) >> room_position[p["room"]]) & 1 == 0:
+                continue
+            patient.admission_day = day
+            patient.surgeon.schedule_surgery(day, patient.surgery_duration)
+            patient.room = ch.get_room(p["room"])
+            patient.room.add_patient(patient)
+            patient.operating_theater = ot
+            ot.schedule_patient(patient)
+        for patient in ch.sorted_mandatory_patients():
+            if patient.admission_day is None and patient.initialize_patient() == False:
+                return None
+        nurse_position = ch.index_maps["nurse"]
+        for nurse in ch.nurses:
+            nurse.rooms = ch.rooms
+        for n in solution["nurses"]:
+            if n["id"] not in nurse_position:
+                continue
+            nurse = ch.nurses[nurse_position[n["id"]]]
+            for a in n["assignments"]:
+                if a["shift"] not in nurse.shift_map:
+                    continue
+                shift = 3*a["day"] + nurse.shift_map[a["shift"]]
+                if not 0 <= shift < 3*D or nurse.working_shifts[shift] <= 0:
+                    continue
+                for room_id in a["rooms"]:
+                    if room_id not in room_position:
+                        continue
+                    room = ch.get_room(room_id)
+                    if room.schedule_nurses[shift] != '': # as in the validator, the last nurse read is kept
+                        ch.nurses[nurse_position[room.schedule_nurses[shift]]].assigned_room[shift].remove(room)
+                    room.assign_nurse(nurse, shift)
+                    nurse.assigned_room[shift].append(room)
+        if ch.fix_uncovered_rooms() == False:
+            return None
+        return ch
+
+
     def save_to_file(self):
-      name_file = f"ch_{id(self)}.json"
-      with open(name_file, "w") as f:
-          json.dump(self.to_json(), f, indent=2)
-      return name_file
+      # temporary file with a unique name, in the private scratch directory of the validator
+      return write_solution(self.to_json())
 
 
     def save_solution(self):
@@ -143,24 +259,60 @@ class Chromosome:
     
     def compute_cost(self):
         # This function is used to compute the total violations and the total cost by using the validator.
-        file_ch = self.save_to_file()  
-        hard_violations = None
-        cost = None
-        with open("output.txt", "w") as out_file:
-            subprocess.run(
-                ["IHTP_Validator_2.exe", input_file, file_ch],
-                stdout=out_file,
-                stderr=subprocess.STDOUT  
-            )
-        with open("output.txt") as f:
-            for line in f:
-                if "Total violations" in line:
-                    hard_violations = int(line.strip().split('=')[1])
-                if "Total cost" in line:
-                    cost = int(line.strip().split('=')[1])
-        os.remove(file_ch)
-        os.remove("output.txt")
-        self.total_cost = (hard_violations, cost)
-
-
-    
\ No newline at end of file
+        # Schedules already evaluated are taken from the fitness cache.
+        if self.cached_cost():
+            return
+        Chromosome.evaluations += 1
+        if self.tracker is not None:
+            self.total_cost = self.tracker.total()
+        elif self.evaluator is not None:
+            self.total_cost = self.evaluator.evaluate(self)
+        else:
+            self.total_cost = validate_chromosomes([self])[0]
+        self.cache_cost()
+
+
+    def cached_cost(self):
+        # It sets total_cost from the fitness cache, returning False if the schedule is not there
+        if self.fitness_cache is None:
+            return False
+        total_cost = self.fitness_cache.get(self.hasher.value)
+        if total_cost is None:
+            return False
+        self.total_cost = total_cost
+        return True
+
+
+    def cache_cost(self):
+        if self.fitness_cache is not None:
+            self.fitness_cache.put(self.hasher.value, self.total_cost)
+
+
+def random_population(size, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D):
+    # It generates size random chromosomes without hard violations
+    population = []
+    while len(population)!=size:
+        ch = Chromosome(patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D)
+        valid = ch.random_initialize()
+        if valid == False: # A first check after the function random_initialize() is executed
+            continue
+        ch.compute_cost()
+        # Then, for being sure, we double check whether the number of hard violations is 0. If it is, then
+        # add the chromosome to the population.
+        if ch.total_cost[0]==0:
+            population.append(ch)
+    return population
+
+
+def compute_costs(chromosomes):
+    # It computes the cost of a batch of chromosomes. Without the in-process evaluator, they are scored by
+    # the validator library or, if it has not been built, the validators of the whole batch are run at the same time.
+    if Chromosome.evaluator is not None:
+        for ch in chromosomes:
+            ch.compute_cost()
+        return
+    chromosomes = [ch for ch in chromosomes if not ch.cached_cost()]
+    Chromosome.evaluations += len(chromosomes)
+    for ch, total_cost in zip(chromosomes, validate_chromosomes(chromosomes)):
+        ch.total_cost = total_cost
+        ch.cache_cost()
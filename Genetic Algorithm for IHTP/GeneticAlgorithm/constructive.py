@@ -0,0 +1,205 @@
+import random
+from collections import deque
+from chromosome import Chromosome
+
+
+class ConstructiveInitializer:
+    # Constructive alternative to Chromosome.random_initialize: mandatory patients first, most constrained first,
+    # on days weighted by the capacity left, with up to max_backtracks backtracks per chromosome.
+    def __init__(self, max_backtracks=50, admission_probability=0.5, attempts_per_chromosome=5, nurse_assignment=None,
+                 ot_packing=None):
+        self.max_backtracks = max_backtracks
+        self.admission_probability = admission_probability
+        # population() gives up after size*attempts_per_chromosome chromosomes built
+        self.attempts_per_chromosome = attempts_per_chromosome
+        self.nurse_assignment = nurse_assignment
+        self.ot_packing = ot_packing
+        self.backtracks = 0
+        self.failures = 0
+
+    def report(self):
+        report = f"Constructive initializer: {self.backtracks} backtracks, {self.failures} failed chromosomes"
+        self.backtracks = 0
+        self.failures = 0
+        return report
+
+    def population(self, size, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D):
+        # It returns up to size chromosomes without hard violations, after at most
+        # size*attempts_per_chromosome attempts
+        population = []
+        for _ in range(size*self.attempts_per_chromosome):
+            if len(population) == size:
+                break
+            ch = Chromosome(patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D)
+            if not self.initialize(ch):
+                self.failures += 1
+                continue
+            ch.compute_cost()
+            if ch.total_cost[0] == 0:
+                population.append(ch)
+            else:
+                self.failures += 1
+        return population
+
+    def initialize(self, ch):
+        for patient in ch.patients:
+            patient.rooms = ch.rooms
+            patient.operating_theaters = ch.ots
+            patient.surgeon = ch.get_surgeon(patient.surgeon_id)
+        for nurse in ch.nurses:
+            nurse.rooms = ch.rooms
+        if not self.place_mandatory(ch):
+            return False
+        non_mandatory_patients = [p for p in ch.patients if p.mandatory == False]
+        for patient in random.sample(non_mandatory_patients, len(non_mandatory_patients)):
+            # a non mandatory patient that does not fit anywhere is simply left unscheduled
+            patient.initialize_patient(self.admission_probability)
+        if self.ot_packing is not None:
+            self.ot_packing.pack(ch)
+        if self.nurse_assignment is not None:
+            return self.nurse_assignment.assign(ch)
+        return ch.fix_uncovered_rooms()
+
+    # Mandatory patients ------------------------------------------------------------------------------
+
+    def place_mandatory(self, ch):
+        mandatory_patients = [p for p in ch.patients if p.mandatory == True]
+        # expected surgery minutes per day of the patients still to be placed (uniform over the window)
+        self.expected = [0.0]*ch.D
+        for patient in mandatory_patients:
+            self._add_expected(patient, 1)
+        # most constrained first, with random tie-breaking for diversity
+        options = {p.id: len(self.feasible_days(ch, p)) for p in mandatory_patients}
+        mandatory_patients.sort(key=lambda p: (options[p.id], p.surgery_due_day-p.surgery_release_day, random.random()))
+        queue = deque(mandatory_patients)
+        placed = set()
+        backtracks = 0
+        while len(queue) > 0:
+            patient = queue.popleft()
+            if self.place(ch, patient):
+                placed.add(patient)
+                continue
+            if backtracks == self.max_backtracks:
+                return False
+            backtracks += 1
+            self.backtracks += 1
+            unscheduled = self.unblock(ch, patient, placed)
+            if unscheduled is None:
+                queue.appendleft(patient)
+                continue
+            placed.add(patient)
+            # the unscheduled patients are placed again before the others
+            queue.extendleft(reversed(unscheduled))
+        return True
+
+    def _add_expected(self, patient, sign):
+        window = range(patient.surgery_release_day, patient.surgery_due_day+1)
+        for d in window:
+            self.expected[d] += sign*patient.surgery_duration/len(window)
+
+    def feasible_days(self, ch, patient):
+        # (day, operating theaters, compatible room mask) for each day of the window where the patient fits
+        days = []
+        for d in range(patient.surgery_release_day, patient.surgery_due_day+1):
+            if not patient.surgeon.check_schedule_surgery(d, patient.surgery_duration):
+                continue
+            ots = [ot for ot in ch.ots if ot.daily_availability[d] >= patient.surgery_duration]
+            if len(ots) == 0:
+                continue
+            mask = ch.feasibility.compatible_mask(patient, d)
+            if mask != 0:
+                days.append((d, ots, mask))
+        return days
+
+    def place(self, ch, patient):
+        days = self.feasible_days(ch, patient)
+        if len(days) == 0:
+            return False
+        weights = []
+        for d, ots, mask in days:
+            surgeon_slack = patient.surgeon.max_surgery_time[d] - patient.surgery_duration
+            ot_slack = sum(ot.daily_availability[d] for ot in ch.ots) - patient.surgery_duration - self.expected[d]
+            weights.append(bin(mask).count("1") * (1+surgeon_slack) * max(1, ot_slack))
+        d, ots, mask = random.choices(days, weights=weights)[0]
+        rooms = ch.feasibility.compatible_rooms(patient, d)
+        self.schedule(patient, d, random.choice(rooms), random.choice(ots))
+        return True
+
+    def schedule(self, patient, day, room, ot):
+        patient.admission_day = day
+        patient.surgeon.schedule_surgery(day, patient.surgery_duration)
+        patient.room = room
+        room.add_patient(patient)
+        patient.operating_theater = ot
+        ot.schedule_patient(patient)
+        self._add_expected(patient, -1)
+
+    def unschedule(self, patient):
+        patient.room.remove_patient(patient)
+        patient.operating_theater.unschedule_patient(patient)
+        patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+        patient.admission_day = None
+        patient.room = None
+        patient.operating_theater = None
+        self._add_expected(patient, 1)
+
+    # Backtracking ------------------------------------------------------------------------------------
+
+    def unblock(self, ch, patient, placed):
+        # It picks a day of the window that can host the patient once some placed patients are removed,
+        # unschedules them and schedules the patient on that day. It returns the unscheduled patients,
+        # or None if no day can be freed.
+        window = list(range(patient.surgery_release_day, patient.surgery_due_day+1))
+        random.shuffle(window)
+        for d in window:
+            same_day = [p for p in placed if p.admission_day == d]
+            surgeon_patients = [p for p in same_day if p.surgeon is patient.surgeon]
+            if patient.surgeon.max_surgery_time[d] + sum(p.surgery_duration for p in surgeon_patients) < patient.surgery_duration:
+                continue
+            ot = self._free_ot(ch, patient, d, same_day)
+            if ot is None:
+                continue
+            room = self._free_room(ch, patient, d, placed)
+            if room is None:
+                continue
+            unscheduled = []
+            self._release(surgeon_patients, unscheduled, lambda: patient.surgeon.max_surgery_time[d] < patient.surgery_duration)
+            self._release([p for p in same_day if p.operating_theater is ot], unscheduled,
+                          lambda: ot.daily_availability[d] < patient.surgery_duration)
+            stay = range(d, min(d+patient.length_of_stay, ch.D))
+            in_room = [p for p in placed if p.room is room and p.admission_day < stay.stop and p.admission_day+p.length_of_stay > d]
+            self._release([p for p in in_room if p.gender != patient.gender], unscheduled, lambda: True)
+            for day in stay:
+                self._release([p for p in room.schedule_patients[day] if p in placed], unscheduled,
+                              lambda: len(room.schedule_patients[day]) >= room.capacity)
+            for p in unscheduled:
+                placed.discard(p)
+            self.schedule(patient, d, room, ot)
+            return unscheduled
+        return None
+
+    def _release(self, candidates, unscheduled, blocked):
+        # It unschedules random candidates while blocked() holds
+        for p in random.sample(candidates, len(candidates)):
+            if not blocked():
+                return
+            if p.admission_day is not None:
+                self.unschedule(p)
+                unscheduled.append(p)
+
+    def _free_ot(self, ch, patient, d, same_day):
+        # operating theater with room for the patient on day d once the placed patients are removed
+        ots = [ot for ot in ch.ots
+               if ot.daily_availability[d] + sum(p.surgery_duration for p in same_day if p.operating_theater is ot) >= patient.surgery_duration]
+        return random.choice(ots) if len(ots) > 0 else None
+
+    def _free_room(self, ch, patient, d, placed):
+        # compatible room for the patient from day d once the placed patients are removed: the patients
+        # that cannot be moved (occupants) must leave a free bed and have the same gender in every day
+        rooms = [r for r in ch.rooms if r.id not in patient.incompatible_room_ids]
+        random.shuffle(rooms)
+        for room in rooms:
+            fixed = [[p for p in room.schedule_patients[day] if p not in placed] for day in range(d, min(d+patient.length_of_stay, ch.D))]
+            if all(len(f) < room.capacity and all(p.gender == patient.gender for p in f) for f in fixed):
+                return room
+        return None
@@ -0,0 +1,98 @@
+import copy
+import random
+from hospital.occupant import Occupant
+
+
+class CoverageIndex:
+    # Rooms covered by a nurse in each shift, as bitmasks over the rooms (bit i = rooms[i]). working[s] (the
+    # nurses working in shift s) depends only on the instance and is shared by the copies.
+    def __init__(self, rooms, nurses, D, position, feasibility):
+        self.rooms = rooms
+        self.nurses = nurses
+        self.shifts = 3*D
+        self.position = position
+        self.feasibility = feasibility
+        self.working = [[n for n, nurse in enumerate(nurses) if nurse.working_shifts[s] > 0] for s in range(self.shifts)]
+        self.working_levels = [[nurses[n].skill_level for n in working] for working in self.working]
+        self.working_max_loads = [[nurses[n].working_shifts[s] for n in working] for s, working in enumerate(self.working)]
+        self.covered_mask = [0]*self.shifts
+        for i, r in enumerate(rooms):
+            for s, nurse_id in enumerate(r.schedule_nurses):
+                if nurse_id != '':
+                    self.covered_mask[s] |= 1 << i
+            r.coverage = self
+
+    def __deepcopy__(self, memo):
+        new = CoverageIndex.__new__(CoverageIndex)
+        memo[id(self)] = new
+        for key, value in self.__dict__.items():
+            setattr(new, key, value if key in ("position", "working", "working_levels", "working_max_loads") else copy.deepcopy(value, memo))
+        return new
+
+    def assign_nurse(self, room, shift):
+        self.covered_mask[shift] |= 1 << self.position[room.id]
+
+    def remove_nurse(self, room, shift):
+        self.covered_mask[shift] &= ~(1 << self.position[room.id])
+
+    def uncovered_mask(self, shift):
+        return self.feasibility.occupied_mask[shift//3] & ~self.covered_mask[shift]
+
+    def uncovered_rooms(self, shift):
+        mask = self.uncovered_mask(shift)
+        uncovered_rooms = []
+        while mask:
+            low = mask & -mask
+            uncovered_rooms.append(self.rooms[low.bit_length()-1])
+            mask ^= low
+        return uncovered_rooms
+
+    def room_demand(self, room, shift):
+        # workload produced and skill levels required by the people in the room during the shift
+        workload = 0
+        skills = []
+        for p in room.schedule_patients[shift//3]:
+            k = shift - 3*(0 if isinstance(p, Occupant) else p.admission_day)
+            workload += p.workload_produced[k]
+            skills.append(p.skill_level_required[k])
+        return workload, skills
+
+    def nurse_loads(self, nurses, shift):
+        # current workload of the nurses in the shift, read from the DeltaCost of the chromosome if there is one
+        tracker = self.rooms[0].tracker if len(self.rooms) > 0 else None
+        if tracker is not None:
+            index = tracker.evaluator.nurse_index
+            return [tracker.nurse_shift_load[index[self.nurses[n].id]][shift] for n in nurses]
+        return [sum(self.room_demand(r, shift)[0] for r in self.nurses[n].assigned_room.get(shift, ())) for n in nurses]
+
+    def repair(self):
+        # It covers every occupied room without a nurse. Each room goes to a nurse working in that shift,
+        # chosen at random among the ones that add the least skill deficit and excess workload (with
+        # respect to max_load) in that shift. It returns False if no nurse works in a shift to cover.
+        occupied = self.feasibility.occupied_mask
+        uncovered = [occupied[s//3] & ~covered for s, covered in enumerate(self.covered_mask)]
+        for s in range(self.shifts):
+            if uncovered[s] == 0:
+                continue
+            nurses = self.working[s]
+            if len(nurses) == 0:
+                return False
+            levels = self.working_levels[s]
+            free = [max_load - load for max_load, load in zip(self.working_max_loads[s], self.nurse_loads(nurses, s))]
+            rooms = self.uncovered_rooms(s)
+            for room in random.sample(rooms, len(rooms)):
+                workload, skills = self.room_demand(room, s)
+                need = max(skills)
+                # nurses that cover the room without any cost, if there are any
+                best = [i for i, (level, f) in enumerate(zip(levels, free)) if level >= need and f >= workload]
+                if len(best) == 0:
+                    deficit = {level: sum(max(0, skill-level) for skill in skills) for level in set(levels)}
+                    penalties = [deficit[level] + workload - min(workload, max(0, f)) for level, f in zip(levels, free)]
+                    best_penalty = min(penalties)
+                    best = [i for i, penalty in enumerate(penalties) if penalty == best_penalty]
+                i = random.choice(best)
+                nurse = self.nurses[nurses[i]]
+                room.assign_nurse(nurse, s)
+                nurse.assigned_room[s].append(room)
+                free[i] -= workload
+        return True
@@ -0,0 +1,263 @@
+import copy
+from array import array
+from evaluator import HARD_COMPONENTS, SOFT_COMPONENTS
+
+# Components stored for each kind of cell. Every component of the validator belongs to exactly one kind
+# of cell (NursePresence is always 0, because nurses are only assigned to their working shifts).
+ROOM_DAY_COMPONENTS = ("RoomGenderMix", "RoomCapacity", "RoomAgeMix")
+ROOM_SHIFT_COMPONENTS = ("UncoveredRoom", "RoomSkillLevel")
+NURSE_SHIFT_COMPONENTS = ("ExcessiveNurseWorkload",)
+OT_DAY_COMPONENTS = ("OperatingTheaterOvertime", "OpenOperatingTheater")
+SURGEON_DAY_COMPONENTS = ("SurgeonOvertime", "SurgeonTransfer")
+PERSON_COMPONENTS = ("MandatoryUnscheduledPatients", "ElectiveUnscheduledPatients", "PatientRoomCompatibility",
+                     "AdmissionDay", "PatientDelay", "ContinuityOfCare")
+
+
+class DeltaCost:
+    # Incremental CostEvaluator of a chromosome: its entities notify every change, the affected cells are
+    # marked dirty and total() recomputes only them.
+    def __init__(self, evaluator, chromosome):
+        ev = evaluator
+        self.evaluator = ev
+        D, P, R = ev.D, ev.P, len(ev.room_capacity)
+        T, U = len(ev.ot_availability), len(ev.surgeon_max_time)
+        self.num_ages = max(ev.age_group)+1
+        self.admission_day = array('i', [-1])*P
+        self.room = array('i', [-1])*P
+        self.room_day_list = [[[] for _ in range(D)] for _ in range(R)]
+        self.room_day_a = [array('i', [0])*D for _ in range(R)]
+        self.room_day_ages = [array('i', [0])*(D*self.num_ages) for _ in range(R)] # position d*num_ages + age group
+        self.room_shift_nurse = [array('i', [-1])*ev.shifts for _ in range(R)]
+        self.room_shift_workload = [array('i', [0])*ev.shifts for _ in range(R)]
+        self.nurse_shift_load = [array('i', [0])*ev.shifts for _ in ev.nurse_skill]
+        self.person_nurses = [{} for _ in ev.length_of_stay] # nurse -> number of shifts, for each person
+        self.ot_day_load = [array('i', [0])*D for _ in range(T)]
+        self.ot_day_count = [array('i', [0])*D for _ in range(T)]
+        self.surgeon_day_load = [array('i', [0])*D for _ in range(U)]
+        self.surgeon_day_theaters = {} # (surgeon, day) -> {theater -> surgeries}, only for the days with surgeries
+
+        # contributions[kind][i][position of the cell]: value of the i-th component of the kind in the cell
+        self.strides = {"room_day": D, "room_shift": ev.shifts, "nurse_shift": ev.shifts, "ot_day": D, "surgeon_day": D}
+        cells = {"room_day": R*D, "room_shift": R*ev.shifts, "nurse_shift": len(ev.nurse_skill)*ev.shifts,
+                 "ot_day": T*D, "surgeon_day": U*D, "person": len(ev.length_of_stay)}
+        kinds = {"room_day": ROOM_DAY_COMPONENTS, "room_shift": ROOM_SHIFT_COMPONENTS, "nurse_shift": NURSE_SHIFT_COMPONENTS,
+                 "ot_day": OT_DAY_COMPONENTS, "surgeon_day": SURGEON_DAY_COMPONENTS, "person": PERSON_COMPONENTS}
+        self.contributions = {kind: [array('i', [0])*cells[kind] for _ in components] for kind, components in kinds.items()}
+        self.totals = dict.fromkeys(HARD_COMPONENTS + SOFT_COMPONENTS, 0)
+        self.dirty_room_days = set((r, d) for r in range(R) for d in range(D))
+        self.dirty_room_shifts = set((r, s) for r in range(R) for s in range(ev.shifts))
+        self.dirty_nurse_shifts = set((n, s) for n in range(len(ev.nurse_skill)) for s in range(ev.shifts))
+        self.dirty_ot_days = set((t, d) for t in range(T) for d in range(D))
+        self.dirty_surgeon_days = set((u, d) for u in range(U) for d in range(D))
+        self.dirty_people = set(range(len(ev.length_of_stay)))
+
+        for o, r in enumerate(ev.occupant_room):
+            self._add_person(P+o, 0, r)
+        # The chromosome may already have a schedule (e.g. when the tracker is attached after loading it)
+        for p in chromosome.patients:
+            if p.admission_day is not None and p.room is not None:
+                self.add_patient(p.room, p)
+                self.schedule_patient(p.operating_theater, p)
+                self.schedule_surgery(p.surgeon, p.admission_day, p.surgery_duration)
+        for r in chromosome.rooms:
+            for s, nurse_id in enumerate(r.schedule_nurses):
+                if nurse_id != '':
+                    self.assign_nurse(r, nurse_id, s)
+        for obj in chromosome.rooms + chromosome.ots + chromosome.surgeons:
+            obj.tracker = self
+
+    def __deepcopy__(self, memo):
+        # The evaluator holds only static instance data, so it is shared by the copies.
+        new = DeltaCost.__new__(DeltaCost)
+        memo[id(self)] = new
+        for key, value in self.__dict__.items():
+            setattr(new, key, value if key == "evaluator" else copy.deepcopy(value, memo))
+        return new
+
+    def __getstate__(self):
+        # The evaluator is not sent to the worker processes: Chromosome.__setstate__ links it again.
+        state = self.__dict__.copy()
+        state["evaluator"] = None
+        return state
+
+    # Notifications -----------------------------------------------------------------------------------
+
+    def add_patient(self, room, patient):
+        p = self.evaluator.patient_index[patient.id]
+        self.admission_day[p] = patient.admission_day
+        self.room[p] = self.evaluator.room_index[room.id]
+        self._add_person(p, patient.admission_day, self.room[p])
+
+    def remove_patient(self, room, patient):
+        ev = self.evaluator
+        p = ev.patient_index[patient.id]
+        r = ev.room_index[room.id]
+        ad = self.admission_day[p]
+        for d in range(ad, min(ev.D, ad+ev.length_of_stay[p])):
+            self.room_day_list[r][d].remove(p)
+            self._update_room_day(p, r, d, -1)
+        self.admission_day[p] = -1
+        self.room[p] = -1
+        self.person_nurses[p] = {}
+        self.dirty_people.add(p)
+
+    def assign_nurse(self, room, nurse_id, shift):
+        ev = self.evaluator
+        r = ev.room_index[room.id]
+        n = ev.nurse_index[nurse_id] if nurse_id != '' else -1
+        old = self.room_shift_nurse[r][shift]
+        if old == n:
+            return
+        self.room_shift_nurse[r][shift] = n
+        workload = self.room_shift_workload[r][shift]
+        if old != -1:
+            self.nurse_shift_load[old][shift] -= workload
+            self.dirty_nurse_shifts.add((old, shift))
+        if n != -1:
+            self.nurse_shift_load[n][shift] += workload
+            self.dirty_nurse_shifts.add((n, shift))
+        for p in self.room_day_list[r][shift//ev.shifts_per_day]:
+            nurses = self.person_nurses[p]
+            if old != -1:
+                nurses[old] -= 1
+                if nurses[old] == 0:
+                    del nurses[old]
+            if n != -1:
+                nurses[n] = nurses.get(n, 0) + 1
+            self.dirty_people.add(p)
+        self.dirty_room_shifts.add((r, shift))
+
+    def remove_nurse(self, room, shift):
+        self.assign_nurse(room, '', shift)
+
+    def schedule_patient(self, ot, patient, sign=1):
+        ev = self.evaluator
+        t = ev.ot_index[ot.id]
+        p = ev.patient_index[patient.id]
+        u, d = ev.surgeon_of[p], patient.admission_day
+        self.ot_day_load[t][d] += sign*ev.surgery_duration[p]
+        self.ot_day_count[t][d] += sign
+        theaters = self.surgeon_day_theaters.setdefault((u, d), {})
+        theaters[t] = theaters.get(t, 0) + sign
+        if theaters[t] == 0:
+            del theaters[t]
+            if len(theaters) == 0:
+                del self.surgeon_day_theaters[(u, d)]
+        self.dirty_ot_days.add((t, d))
+        self.dirty_surgeon_days.add((u, d))
+
+    def unschedule_patient(self, ot, patient):
+        self.schedule_patient(ot, patient, sign=-1)
+
+    def schedule_surgery(self, surgeon, day, surgery_time):
+        u = self.evaluator.surgeon_index[surgeon.id]
+        self.surgeon_day_load[u][day] += surgery_time
+        self.dirty_surgeon_days.add((u, day))
+
+    def unschedule_surgery(self, surgeon, day, surgery_time):
+        self.schedule_surgery(surgeon, day, -surgery_time)
+
+    # Cost --------------------------------------------------------------------------------------------
+
+    def total(self):
+        # It recomputes the dirty cells and returns (total violations, total cost), as CostEvaluator.evaluate
+        self._refresh(self.dirty_room_days, "room_day", ROOM_DAY_COMPONENTS, self._room_day_cost)
+        self._refresh(self.dirty_room_shifts, "room_shift", ROOM_SHIFT_COMPONENTS, self._room_shift_cost)
+        self._refresh(self.dirty_nurse_shifts, "nurse_shift", NURSE_SHIFT_COMPONENTS, self._nurse_shift_cost)
+        self._refresh(self.dirty_ot_days, "ot_day", OT_DAY_COMPONENTS, self._ot_day_cost)
+        self._refresh(self.dirty_surgeon_days, "surgeon_day", SURGEON_DAY_COMPONENTS, self._surgeon_day_cost)
+        self._refresh(self.dirty_people, "person", PERSON_COMPONENTS, self._person_cost)
+        return self.evaluator.totals(*self.components())
+
+    def components(self):
+        # violations and costs dictionaries of the last call to total()
+        return ({c: self.totals[c] for c in HARD_COMPONENTS}, {c: self.totals[c] for c in SOFT_COMPONENTS})
+
+    def _refresh(self, dirty, kind, components, cell_cost):
+        contributions = self.contributions[kind]
+        stride = self.strides.get(kind)
+        for cell in dirty:
+            if kind == "person":
+                new = cell_cost(cell)
+                k = cell
+            else:
+                new = cell_cost(*cell)
+                k = cell[0]*stride + cell[1]
+            for i, c in enumerate(components):
+                self.totals[c] += new[i] - contributions[i][k]
+                contributions[i][k] = new[i]
+        dirty.clear()
+
+    def _add_person(self, p, ad, r):
+        ev = self.evaluator
+        nurses = self.person_nurses[p]
+        for d in range(ad, min(ev.D, ad+ev.length_of_stay[p])):
+            self.room_day_list[r][d].append(p)
+            self._update_room_day(p, r, d, 1)
+            for s in range(d*ev.shifts_per_day, (d+1)*ev.shifts_per_day):
+                n = self.room_shift_nurse[r][s]
+                if n != -1:
+                    nurses[n] = nurses.get(n, 0) + 1
+        self.dirty_people.add(p)
+
+    def _update_room_day(self, p, r, d, sign):
+        ev = self.evaluator
+        if ev.gender_a[p]:
+            self.room_day_a[r][d] += sign
+        self.room_day_ages[r][d*self.num_ages + ev.age_group[p]] += sign
+        self.dirty_room_days.add((r, d))
+        ad = self.admission_day[p] if p < ev.P else 0
+        for s in range(d*ev.shifts_per_day, (d+1)*ev.shifts_per_day):
+            workload = sign*ev.workload[p][s - ad*ev.shifts_per_day]
+            self.room_shift_workload[r][s] += workload
+            n = self.room_shift_nurse[r][s]
+            if n != -1:
+                self.nurse_shift_load[n][s] += workload
+                self.dirty_nurse_shifts.add((n, s))
+            self.dirty_room_shifts.add((r, s))
+
+    def _room_day_cost(self, r, d):
+        present = len(self.room_day_list[r][d])
+        a = self.room_day_a[r][d]
+        A = self.num_ages
+        ages = [g for g, count in enumerate(self.room_day_ages[r][d*A:(d+1)*A]) if count > 0]
+        return (min(a, present-a), max(0, present-self.evaluator.room_capacity[r]),
+                ages[-1]-ages[0] if ages else 0)
+
+    def _room_shift_cost(self, r, s):
+        ev = self.evaluator
+        present = self.room_day_list[r][s//ev.shifts_per_day]
+        n = self.room_shift_nurse[r][s]
+        if n == -1:
+            return (1 if present else 0, 0)
+        skill = 0
+        for p in present:
+            s1 = s - self.admission_day[p]*ev.shifts_per_day if p < ev.P else s
+            skill += max(0, ev.skill_required[p][s1] - ev.nurse_skill[n])
+        return (0, skill)
+
+    def _nurse_shift_cost(self, n, s):
+        ev = self.evaluator
+        if not ev.nurse_working[n][s]:
+            return (0,)
+        return (max(0, self.nurse_shift_load[n][s] - ev.nurse_max_load[n][s]),)
+
+    def _ot_day_cost(self, t, d):
+        return (max(0, self.ot_day_load[t][d] - self.evaluator.ot_availability[t][d]),
+                1 if self.ot_day_count[t][d] > 0 else 0)
+
+    def _surgeon_day_cost(self, u, d):
+        return (max(0, self.surgeon_day_load[u][d] - self.evaluator.surgeon_max_time[u][d]),
+                max(0, len(self.surgeon_day_theaters.get((u, d), ()))-1))
+
+    def _person_cost(self, p):
+        ev = self.evaluator
+        continuity = len(self.person_nurses[p])
+        if p >= ev.P:
+            return (0, 0, 0, 0, 0, continuity)
+        ad = self.admission_day[p]
+        if ad == -1:
+            return (1 if ev.mandatory[p] else 0, 0 if ev.mandatory[p] else 1, 0, 0, 0, 0)
+        return (0, 0, 1 if self.room[p] in ev.incompatible_rooms[p] else 0,
+                1 if ad < ev.release_day[p] or ad > ev.last_possible_day[p] else 0,
+                max(0, ad - ev.release_day[p]), continuity)
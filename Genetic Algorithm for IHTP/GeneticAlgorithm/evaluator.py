@@ -0,0 +1,304 @@
+import glob
+import json
+import os
+import sys
+
+# Order of the components as printed by IHTP_Validator_2 (PrintCosts). The soft costs are listed in the
+# same order as the weights, so that weights[i] multiplies SOFT_COMPONENTS[i].
+HARD_COMPONENTS = ["RoomGenderMix", "PatientRoomCompatibility", "SurgeonOvertime", "OperatingTheaterOvertime",
+                   "MandatoryUnscheduledPatients", "AdmissionDay", "RoomCapacity", "NursePresence", "UncoveredRoom"]
+SOFT_COMPONENTS = ["RoomAgeMix", "RoomSkillLevel", "ContinuityOfCare", "ExcessiveNurseWorkload",
+                   "OpenOperatingTheater", "SurgeonTransfer", "PatientDelay", "ElectiveUnscheduledPatients"]
+WEIGHT_KEYS = ["room_mixed_age", "room_nurse_skill", "continuity_of_care", "nurse_eccessive_workload",
+               "open_operating_theater", "surgeon_transfer", "patient_delay", "unscheduled_optional"]
+
+
+class CostEvaluator:
+    # Python port of IHTP_Validator_2.cc. The instance is parsed once and every chromosome is then
+    # evaluated directly from its objects, without writing files or launching the validator.
+    # Occupants are stored after the patients (index P+o), exactly as the validator does.
+    def __init__(self, data):
+        self.D = data["days"]
+        self.shifts_per_day = len(data["shift_types"])
+        self.shifts = self.D*self.shifts_per_day
+        self.shift_types = data["shift_types"]
+        self.shift_map = {name: i for i, name in enumerate(data["shift_types"])}
+        age_group_map = {name: i for i, name in enumerate(data["age_groups"])}
+        self.weights = [data["weights"][key] for key in WEIGHT_KEYS]
+
+        self.room_ids = [r["id"] for r in data["rooms"]]
+        self.room_index = {r["id"]: i for i, r in enumerate(data["rooms"])}
+        self.room_capacity = [r["capacity"] for r in data["rooms"]]
+        self.ot_ids = [t["id"] for t in data["operating_theaters"]]
+        self.ot_index = {t["id"]: i for i, t in enumerate(data["operating_theaters"])}
+        self.ot_availability = [t["availability"] for t in data["operating_theaters"]]
+        self.surgeon_index = {s["id"]: i for i, s in enumerate(data["surgeons"])}
+        self.surgeon_max_time = [s["max_surgery_time"] for s in data["surgeons"]]
+
+        self.P = len(data["patients"])
+        self.patient_ids = [p["id"] for p in data["patients"]]
+        self.patient_index = {p["id"]: i for i, p in enumerate(data["patients"])}
+        self.mandatory = [p["mandatory"] for p in data["patients"]]
+        self.release_day = [p["surgery_release_day"] for p in data["patients"]]
+        self.last_possible_day = [p["surgery_due_day"] if p["mandatory"] else self.D-1 for p in data["patients"]]
+        self.surgery_duration = [p["surgery_duration"] for p in data["patients"]]
+        self.surgeon_of = [self.surgeon_index[p["surgeon_id"]] for p in data["patients"]]
+        self.incompatible_rooms = [set(self.room_index[r] for r in p.get("incompatible_room_ids", []))
+                                   for p in data["patients"]]
+
+        # Attributes shared by patients and occupants (indexed by P+o for the occupants)
+        people = data["patients"] + data["occupants"]
+        self.gender_a = [p["gender"] == "A" for p in people]
+        self.age_group = [age_group_map[p["age_group"]] for p in people]
+        self.length_of_stay = [p["length_of_stay"] for p in people]
+        self.workload = [p["workload_produced"] for p in people]
+        self.skill_required = [p["skill_level_required"] for p in people]
+        self.occupant_room = [self.room_index[o["room_id"]] for o in data["occupants"]]
+
+        self.nurse_ids = [n["id"] for n in data["nurses"]]
+        self.nurse_index = {n["id"]: i for i, n in enumerate(data["nurses"])}
+        self.nurse_skill = [n["skill_level"] for n in data["nurses"]]
+        self.nurse_max_load = [[0]*self.shifts for _ in data["nurses"]]
+        self.nurse_working = [[False]*self.shifts for _ in data["nurses"]]
+        self.nurse_working_shifts = [[] for _ in data["nurses"]]
+        for n, nurse in enumerate(data["nurses"]):
+            for ws in nurse["working_shifts"]:
+                s = ws["day"]*self.shifts_per_day + self.shift_map[ws["shift"]]
+                self.nurse_working_shifts[n].append(s)
+                self.nurse_working[n][s] = True
+                self.nurse_max_load[n][s] = ws["max_load"]
+        # The validator keeps the last nurse read for a room in a shift, and the solution files list the
+        # nurses sorted by id.
+        self.nurse_order = sorted(range(len(data["nurses"])), key=lambda n: data["nurses"][n]["id"])
+
+    @classmethod
+    def from_file(cls, instance_file):
+        with open(instance_file, "r") as f:
+            return cls(json.load(f))
+
+    def evaluate(self, chromosome):
+        # It returns (total violations, total cost), the same pair stored in Chromosome.total_cost.
+        return self.totals(*self.evaluate_components(chromosome))
+
+    def evaluate_components(self, chromosome):
+        admissions = []
+        for p in chromosome.patients:
+            if p.admission_day is not None:
+                admissions.append((self.patient_index[p.id], p.admission_day, self.room_index[p.room.id],
+                                   self.ot_index[p.operating_theater.id]))
+        nurses = {}
+        for nurse in chromosome.nurses:
+            # Only the working shifts are exported by Nurse.to_dict, so only those reach the validator.
+            nurses[self.nurse_index[nurse.id]] = [(s, [self.room_index[r.id] for r in nurse.assigned_room.get(s, ())])
+                                                  for s in range(self.shifts) if nurse.working_shifts[s] > 0]
+        nurse_rooms = []
+        for n in self.nurse_order:
+            for s, rooms in nurses.get(n, []):
+                for r in sorted(rooms):
+                    nurse_rooms.append((n, s, r))
+        return self.evaluate_assignments(admissions, nurse_rooms)
+
+    def evaluate_solution(self, solution):
+        # Same as evaluate_components, but for a solution in the .json format produced by Chromosome.to_json
+        admissions = []
+        for p in solution["patients"]:
+            if p["admission_day"] != "none":
+                admissions.append((self.patient_index[p["id"]], p["admission_day"], self.room_index[p["room"]],
+                                   self.ot_index[p["operating_theater"]]))
+        nurse_rooms = []
+        for nurse in solution["nurses"]:
+            n = self.nurse_index[nurse["id"]]
+            for a in nurse["assignments"]:
+                s = a["day"]*self.shifts_per_day + self.shift_map[a["shift"]]
+                for room_id in a["rooms"]:
+                    nurse_rooms.append((n, s, self.room_index[room_id]))
+        return self.evaluate_assignments(admissions, nurse_rooms)
+
+    def totals(self, violations, costs):
+        return totals(violations, costs, self.weights)
+
+    def format_report(self, violations, costs):
+        return format_report(violations, costs, self.weights)
+
+    def evaluate_assignments(self, admissions, nurse_rooms):
+        # admissions: (patient, admission day, room, operating theater) for each scheduled patient
+        # nurse_rooms: (nurse, shift, room) in the order in which the validator reads them
+        D, P, spd = self.D, self.P, self.shifts_per_day
+        R, T, U = len(self.room_capacity), len(self.ot_availability), len(self.surgeon_max_time)
+        admission_day = [-1]*P
+        room = [-1]*P
+        room_day_list = [[[] for _ in range(D)] for _ in range(R)]
+        room_day_a = [[0]*D for _ in range(R)]
+        room_day_b = [[0]*D for _ in range(R)]
+        ot_day_count = [[0]*D for _ in range(T)]
+        ot_day_load = [[0]*D for _ in range(T)]
+        surgeon_day_load = [[0]*D for _ in range(U)]
+        surgeon_day_theaters = [[set() for _ in range(D)] for _ in range(U)]
+
+        for o, r in enumerate(self.occupant_room):
+            for d in range(min(D, self.length_of_stay[P+o])):
+                room_day_list[r][d].append(P+o)
+                if self.gender_a[P+o]:
+                    room_day_a[r][d] += 1
+                else:
+                    room_day_b[r][d] += 1
+
+        for p, ad, r, t in admissions:
+            if admission_day[p] != -1:
+                raise ValueError(f"Patient {p} assigned twice in the solution")
+            admission_day[p] = ad
+            room[p] = r
+            for d in range(ad, min(D, ad+self.length_of_stay[p])):
+                room_day_list[r][d].append(p)
+                if self.gender_a[p]:
+                    room_day_a[r][d] += 1
+                else:
+                    room_day_b[r][d] += 1
+            ot_day_count[t][ad] += 1
+            ot_day_load[t][ad] += self.surgery_duration[p]
+            u = self.surgeon_of[p]
+            surgeon_day_load[u][ad] += self.surgery_duration[p]
+            surgeon_day_theaters[u][ad].add(t)
+
+        room_shift_nurse = [[-1]*self.shifts for _ in range(R)]
+        nurse_shift_rooms = {}
+        for n, s, r in nurse_rooms:
+            if not self.nurse_working[n][s]:
+                raise ValueError(f"Assigning a non-working nurse {n} to shift {s}")
+            room_shift_nurse[r][s] = n
+            nurse_shift_rooms.setdefault((n, s), []).append(r)
+
+        violations = dict.fromkeys(HARD_COMPONENTS, 0)
+        costs = dict.fromkeys(SOFT_COMPONENTS, 0)
+
+        for r in range(R):
+            for d in range(D):
+                present = room_day_list[r][d]
+                violations["RoomGenderMix"] += min(room_day_a[r][d], room_day_b[r][d])
+                if len(present) > self.room_capacity[r]:
+                    violations["RoomCapacity"] += len(present) - self.room_capacity[r]
+                if len(present) > 0:
+                    ages = [self.age_group[p] for p in present]
+                    costs["RoomAgeMix"] += max(ages) - min(ages)
+                for s in range(d*spd, (d+1)*spd):
+                    n = room_shift_nurse[r][s]
+                    if n == -1:
+                        if len(present) > 0:
+                            violations["UncoveredRoom"] += 1
+                        continue
+                    for p in present:
+                        # patient data are relative to the admission day, occupant data to day 0
+                        s1 = s - admission_day[p]*spd if p < P else s
+                        if self.skill_required[p][s1] > self.nurse_skill[n]:
+                            costs["RoomSkillLevel"] += self.skill_required[p][s1] - self.nurse_skill[n]
+
+        for t in range(T):
+            for d in range(D):
+                if ot_day_load[t][d] > self.ot_availability[t][d]:
+                    violations["OperatingTheaterOvertime"] += ot_day_load[t][d] - self.ot_availability[t][d]
+                if ot_day_count[t][d] > 0:
+                    costs["OpenOperatingTheater"] += 1
+
+        for u in range(U):
+            for d in range(D):
+                if surgeon_day_load[u][d] > self.surgeon_max_time[u][d]:
+                    violations["SurgeonOvertime"] += surgeon_day_load[u][d] - self.surgeon_max_time[u][d]
+                if len(surgeon_day_theaters[u][d]) > 1:
+                    costs["SurgeonTransfer"] += len(surgeon_day_theaters[u][d]) - 1
+
+        for p in range(P):
+            if admission_day[p] == -1:
+                if self.mandatory[p]:
+                    violations["MandatoryUnscheduledPatients"] += 1
+                else:
+                    costs["ElectiveUnscheduledPatients"] += 1
+                continue
+            if room[p] in self.incompatible_rooms[p]:
+                violations["PatientRoomCompatibility"] += 1
+            if admission_day[p] < self.release_day[p] or admission_day[p] > self.last_possible_day[p]:
+                violations["AdmissionDay"] += 1
+            if admission_day[p] > self.release_day[p]:
+                costs["PatientDelay"] += admission_day[p] - self.release_day[p]
+
+        # ContinuityOfCare: number of distinct nurses taking care of each patient/occupant during the stay
+        stays = [(p, admission_day[p], room[p]) for p in range(P) if admission_day[p] != -1]
+        stays += [(P+o, 0, r) for o, r in enumerate(self.occupant_room)]
+        for p, ad, r in stays:
+            last_shift = min(D, ad+self.length_of_stay[p])*spd
+            costs["ContinuityOfCare"] += len(set(room_shift_nurse[r][ad*spd:last_shift]) - {-1})
+
+        for n, working_shifts in enumerate(self.nurse_working_shifts):
+            for s in working_shifts:
+                d = s//spd
+                load = 0
+                for r in nurse_shift_rooms.get((n, s), []):
+                    for p in room_day_list[r][d]:
+                        load += self.workload[p][s - admission_day[p]*spd if p < P else s]
+                if load > self.nurse_max_load[n][s]:
+                    costs["ExcessiveNurseWorkload"] += load - self.nurse_max_load[n][s]
+
+        return violations, costs
+
+
+def totals(violations, costs, weights):
+    # (total violations, total cost) from the violations and costs of each component; weights are in the
+    # order of SOFT_COMPONENTS
+    total_violations = sum(violations.values())
+    total_cost = sum(weights[i]*costs[c] for i, c in enumerate(SOFT_COMPONENTS))
+    return (total_violations, total_cost)
+
+
+def format_report(violations, costs, weights):
+    # Text report with the same layout of the validator output
+    lines = ["VIOLATIONS: "]
+    for c in HARD_COMPONENTS:
+        lines.append(f"{c:.<30}{violations[c]:.>5}")
+    total_violations, total_cost = totals(violations, costs, weights)
+    lines.append(f"Total violations = {total_violations}")
+    lines.append("")
+    lines.append("COSTS (weight X cost): ")
+    for i, c in enumerate(SOFT_COMPONENTS):
+        lines.append(f"{c:.<30}{costs[c]*weights[i]:.>10} ({weights[i]:>3} X {costs[c]:>3})")
+    lines.append(f"Total cost = {total_cost}")
+    return "\n".join(lines)
+
+
+def record_totals(record):
+    # (total violations, total cost) from a record of the batch mode of the validator or of the
+    # NativeValidator, (None, None) for invalid solutions
+    if "error" in record:
+        return (None, None)
+    return (record["total_violations"], record["total_cost"])
+
+
+def check_solutions(solutions_dir="solutions", instances_dir="."):
+    # Parity check against the archived solutions ch_<violations>_<cost>.json, scored by IHTP_Validator_2.
+    # It fails if there is a mismatch or no solution has been checked.
+    mismatches = 0
+    checked = 0
+    for instance_dir in sorted(glob.glob(os.path.join(solutions_dir, "i*"))):
+        instance_name = os.path.basename(instance_dir)
+        instance_file = os.path.join(instances_dir, f"{instance_name}.json")
+        if not os.path.exists(instance_file):
+            print(f"{instance_name}: instance file {instance_file} not found, skipped")
+            continue
+        evaluator = CostEvaluator.from_file(instance_file)
+        for sol_file in sorted(glob.glob(os.path.join(instance_dir, "ch_*.json"))):
+            expected = tuple(int(x) for x in os.path.basename(sol_file)[3:-5].split("_"))
+            with open(sol_file, "r") as f:
+                violations, costs = evaluator.evaluate_solution(json.load(f))
+            result = evaluator.totals(violations, costs)
+            checked += 1
+            if result != expected:
+                mismatches += 1
+                print(f"{sol_file}: expected {expected}, got {result}")
+                print(evaluator.format_report(violations, costs))
+    print(f"{checked} solutions checked, {mismatches} mismatches")
+    return checked > 0 and mismatches == 0
+
+
+if __name__ == "__main__":
+    # Usage: python evaluator.py [instances_dir] [solutions_dir]
+    instances_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    solutions_dir = sys.argv[2] if len(sys.argv) > 2 else "solutions"
+    sys.exit(0 if check_solutions(solutions_dir, instances_dir) else 1)
@@ -0,0 +1,88 @@
+import copy
+from array import array
+
+
+class FeasibilityIndex:
+    # Free capacity and genders of each room-day, and bitmasks over the rooms (bit i = rooms[i]) of the
+    # occupied, full and per-gender rooms of each day. position is shared (Chromosome.index_maps).
+    def __init__(self, rooms, D, position):
+        self.rooms = rooms
+        self.D = D
+        self.position = position
+        self.all_rooms = (1 << len(rooms)) - 1
+        self.free = array('h', [0])*(len(rooms)*D)
+        self.gender_count = {"A": array('h', [0])*(len(rooms)*D), "B": array('h', [0])*(len(rooms)*D)}
+        self.occupied_mask = [0]*D
+        self.full_mask = [0]*D
+        self.gender_mask = {"A": [0]*D, "B": [0]*D}
+        for i, r in enumerate(rooms):
+            for d in range(D):
+                self.free[i*D+d] = r.capacity
+                for p in r.schedule_patients[d]:
+                    self._update(i, d, p.gender, 1)
+            r.feasibility = self
+
+    def __deepcopy__(self, memo):
+        new = FeasibilityIndex.__new__(FeasibilityIndex)
+        memo[id(self)] = new
+        for key, value in self.__dict__.items():
+            setattr(new, key, value if key == "position" else copy.deepcopy(value, memo))
+        return new
+
+    def add_patient(self, room, patient, admission_day):
+        i = self.position[room.id]
+        for d in range(admission_day, min(admission_day+patient.length_of_stay, self.D)):
+            self._update(i, d, patient.gender, 1)
+
+    def remove_patient(self, room, patient, admission_day):
+        i = self.position[room.id]
+        for d in range(admission_day, min(admission_day+patient.length_of_stay, self.D)):
+            self._update(i, d, patient.gender, -1)
+
+    def _update(self, i, d, gender, sign):
+        k = i*self.D+d
+        bit = 1 << i
+        self.free[k] -= sign
+        if self.free[k] < self.rooms[i].capacity:
+            self.occupied_mask[d] |= bit
+        else:
+            self.occupied_mask[d] &= ~bit
+        if self.free[k] <= 0:
+            self.full_mask[d] |= bit
+        else:
+            self.full_mask[d] &= ~bit
+        self.gender_count[gender][k] += sign
+        if self.gender_count[gender][k] > 0:
+            self.gender_mask[gender][d] |= bit
+        else:
+            self.gender_mask[gender][d] &= ~bit
+
+    def incompatible_mask(self, patient):
+        # Static mask of the incompatible rooms. It is normally set when the instance is loaded (main.py)
+        if patient.incompatible_mask is None:
+            patient.incompatible_mask = 0
+            for room_id in patient.incompatible_room_ids:
+                patient.incompatible_mask |= 1 << self.position[room_id]
+        return patient.incompatible_mask
+
+    def compatible_mask(self, patient, admission_day):
+        # Rooms that can host the patient for the whole stay starting on admission_day: not incompatible,
+        # not full and without patients of the other gender in any day of the stay.
+        mask = self.all_rooms & ~self.incompatible_mask(patient)
+        for d in range(admission_day, min(admission_day+patient.length_of_stay, self.D)):
+            mask &= ~self.full_mask[d]
+            for gender, gender_mask in self.gender_mask.items():
+                if gender != patient.gender:
+                    mask &= ~gender_mask[d]
+            if mask == 0:
+                break
+        return mask
+
+    def compatible_rooms(self, patient, admission_day):
+        mask = self.compatible_mask(patient, admission_day)
+        compatible_rooms = []
+        while mask:
+            low = mask & -mask
+            compatible_rooms.append(self.rooms[low.bit_length()-1])
+            mask ^= low
+        return compatible_rooms
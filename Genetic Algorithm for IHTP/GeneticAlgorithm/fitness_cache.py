@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from hospital.occupant import Occupant
+
+MASK = (1 << 64) - 1
+
+
+def feature_key(*codes):
+    # 64-bit key of an assignment, given as a tuple of small integers (positions in Chromosome.index_maps).
+    # The hash of a tuple of ints does not depend on PYTHONHASHSEED, so the keys are the same in every
+    # process of the GA pool.
+    return hash(codes) & MASK
+
+
+class ScheduleHash:
+    # XOR of one key per (patient, day, room), (patient, day, operating theater) and (room, shift, nurse)
+    # assignment, updated in O(1) by the rooms and operating theaters.
+    def __init__(self, index_maps, chromosome):
+        self.index_maps = index_maps
+        self.value = 0
+        for p in chromosome.patients:
+            if p.admission_day is not None and p.room is not None:
+                self.add_patient(p.room, p)
+                self.schedule_patient(p.operating_theater, p)
+        for r in chromosome.rooms:
+            for shift, nurse_id in enumerate(r.schedule_nurses):
+                if nurse_id != '':
+                    self.assign_nurse(r, nurse_id, shift)
+            r.hasher = self
+        for ot in chromosome.ots:
+            ot.hasher = self
+
+    def __deepcopy__(self, memo):
+        # the index maps are shared by all the chromosomes
+        new = ScheduleHash.__new__(ScheduleHash)
+        memo[id(self)] = new
+        new.index_maps = self.index_maps
+        new.value = self.value
+        return new
+
+    def __getstate__(self):
+        # the index maps are relinked by Chromosome.__setstate__
+        return {"index_maps": None, "value": self.value}
+
+    def _patient_key(self, tag, place, patient):
+        maps = self.index_maps
+        return feature_key(tag, maps["patient"][patient.id], patient.admission_day, place)
+
+    def add_patient(self, room, patient):
+        if not isinstance(patient, Occupant):
+            self.value ^= self._patient_key(0, self.index_maps["room"][room.id], patient)
+
+    def remove_patient(self, room, patient):
+        self.add_patient(room, patient)
+
+    def schedule_patient(self, ot, patient):
+        self.value ^= self._patient_key(1, self.index_maps["ot"][ot.id], patient)
+
+    def unschedule_patient(self, ot, patient):
+        self.schedule_patient(ot, patient)
+
+    def assign_nurse(self, room, nurse_id, shift):
+        self.value ^= feature_key(2, self.index_maps["room"][room.id], shift, self.index_maps["nurse"][nurse_id])
+
+    def remove_nurse(self, room, nurse_id, shift):
+        self.assign_nurse(room, nurse_id, shift)
+
+
+class FitnessCache:
+    # Bounded LRU cache of the (total violations, total cost) of the schedules already evaluated, keyed by
+    # their ScheduleHash. hits and misses count the lookups since the last reset_counters.
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        total_cost = self.entries.get(key)
+        if total_cost is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return total_cost
+
+    def put(self, key, total_cost):
+        self.entries[key] = total_cost
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100*self.hits/lookups if lookups > 0 else 0
+        return f"Fitness cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate, {len(self.entries)} entries)"
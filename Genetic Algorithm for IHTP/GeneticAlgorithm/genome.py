@@ -0,0 +1,126 @@
+from array import array
+
+
+class Genome:
+    # Chromosome as flat arrays indexed as in the CostEvaluator (-1 = not scheduled or uncovered), with the
+    # room, operating theater and surgeon usage per day.
+    def __init__(self, evaluator):
+        if evaluator is None:
+            raise ValueError("The Genome needs the in-process evaluator (Chromosome.evaluator)")
+        ev = evaluator
+        self.evaluator = ev
+        D, R = ev.D, len(ev.room_capacity)
+        self.admission_day = array('h', [-1])*ev.P
+        self.room = array('h', [-1])*ev.P
+        self.ot = array('h', [-1])*ev.P
+        self.room_shift_nurse = array('h', [-1])*(R*ev.shifts)
+        self.room_day_occupancy = array('h', [0])*(R*D)
+        self.ot_day_load = array('i', [0])*(len(ev.ot_availability)*D)
+        self.surgeon_day_load = array('i', [0])*(len(ev.surgeon_max_time)*D)
+        for o, r in enumerate(ev.occupant_room):
+            for d in range(min(D, ev.length_of_stay[ev.P+o])):
+                self.room_day_occupancy[r*D+d] += 1
+
+    @classmethod
+    def from_chromosome(cls, evaluator, chromosome):
+        genome = cls(evaluator)
+        for p in chromosome.patients:
+            if p.admission_day is not None:
+                genome.assign_patient(evaluator.patient_index[p.id], p.admission_day,
+                                      evaluator.room_index[p.room.id], evaluator.ot_index[p.operating_theater.id])
+        for r in chromosome.rooms:
+            for s, nurse_id in enumerate(r.schedule_nurses):
+                if nurse_id != '':
+                    genome.assign_nurse(evaluator.nurse_index[nurse_id], evaluator.room_index[r.id], s)
+        return genome
+
+    def __getstate__(self):
+        # Only the arrays are sent to other processes: the evaluator is relinked by the receiver
+        # (Chromosome.from_genome)
+        state = self.__dict__.copy()
+        state["evaluator"] = None
+        return state
+
+    def copy(self):
+        new = Genome.__new__(Genome)
+        new.evaluator = self.evaluator
+        for key in ("admission_day", "room", "ot", "room_shift_nurse", "room_day_occupancy", "ot_day_load",
+                    "surgeon_day_load"):
+            setattr(new, key, getattr(self, key)[:])
+        return new
+
+    def assign_patient(self, p, day, r, t):
+        ev = self.evaluator
+        self.admission_day[p] = day
+        self.room[p] = r
+        self.ot[p] = t
+        for d in range(day, min(ev.D, day+ev.length_of_stay[p])):
+            self.room_day_occupancy[r*ev.D+d] += 1
+        self.ot_day_load[t*ev.D+day] += ev.surgery_duration[p]
+        self.surgeon_day_load[ev.surgeon_of[p]*ev.D+day] += ev.surgery_duration[p]
+
+    def unassign_patient(self, p):
+        ev = self.evaluator
+        day, r, t = self.admission_day[p], self.room[p], self.ot[p]
+        if day == -1:
+            return
+        for d in range(day, min(ev.D, day+ev.length_of_stay[p])):
+            self.room_day_occupancy[r*ev.D+d] -= 1
+        self.ot_day_load[t*ev.D+day] -= ev.surgery_duration[p]
+        self.surgeon_day_load[ev.surgeon_of[p]*ev.D+day] -= ev.surgery_duration[p]
+        self.admission_day[p] = -1
+        self.room[p] = -1
+        self.ot[p] = -1
+
+    def assign_nurse(self, n, r, s):
+        self.room_shift_nurse[r*self.evaluator.shifts+s] = n
+
+    def remove_nurse(self, r, s):
+        self.room_shift_nurse[r*self.evaluator.shifts+s] = -1
+
+    def nurse_rooms(self):
+        # rooms assigned to each nurse in each shift, as {(nurse, shift): [rooms]}
+        shifts = self.evaluator.shifts
+        assignments = {}
+        for i, n in enumerate(self.room_shift_nurse):
+            if n != -1:
+                assignments.setdefault((n, i % shifts), []).append(i//shifts)
+        return assignments
+
+    def evaluate_components(self):
+        ev = self.evaluator
+        admissions = [(p, self.admission_day[p], self.room[p], self.ot[p])
+                      for p in range(ev.P) if self.admission_day[p] != -1]
+        rank = {n: i for i, n in enumerate(ev.nurse_order)}
+        nurse_rooms = [(n, s, r) for (n, s), rooms in sorted(self.nurse_rooms().items(),
+                                                              key=lambda a: (rank[a[0][0]], a[0][1]))
+                       for r in rooms]
+        return ev.evaluate_assignments(admissions, nurse_rooms)
+
+    def evaluate(self):
+        return self.evaluator.totals(*self.evaluate_components())
+
+    def to_json(self):
+        # Same format of Chromosome.to_json
+        ev = self.evaluator
+        patients = []
+        for p in range(ev.P):
+            if self.admission_day[p] != -1:
+                patients.append({"id": ev.patient_ids[p], "admission_day": self.admission_day[p],
+                                 "room": ev.room_ids[self.room[p]], "operating_theater": ev.ot_ids[self.ot[p]]})
+            else:
+                patients.append({"id": ev.patient_ids[p], "admission_day": "none"})
+        nurse_rooms = self.nurse_rooms()
+        nurses = []
+        for n in range(len(ev.nurse_ids)):
+            assignments = []
+            for s in sorted(ev.nurse_working_shifts[n]):
+                # Nurse.to_dict exports only the shifts with a positive max_load
+                if ev.nurse_max_load[n][s] > 0:
+                    assignments.append({"day": s//ev.shifts_per_day, "shift": ev.shift_types[s % ev.shifts_per_day],
+                                        "rooms": sorted(ev.room_ids[r] for r in nurse_rooms.get((n, s), []))})
+            nurses.append({"id": ev.nurse_ids[n], "assignments": assignments})
+        return {
+            "patients": sorted(patients, key=lambda p: p["id"]),
+            "nurses": sorted(nurses, key=lambda n: n["id"])
+        }
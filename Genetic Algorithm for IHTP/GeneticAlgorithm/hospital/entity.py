@@ -0,0 +1,16 @@
+import copy
+
+class Entity:
+    # Base class of the hospital entities. The attributes listed in STATIC are instance data read from the
+    # instance file, never modified after loading: the copies made for each chromosome share them and
+    # only the other attributes (the schedule state) are copied.
+    __slots__ = ()
+    STATIC = ()
+
+    def __deepcopy__(self, memo):
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        for name in self.__slots__:
+            value = getattr(self, name)
+            setattr(new, name, value if name in self.STATIC else copy.deepcopy(value, memo))
+        return new
@@ -1,10 +1,19 @@
 import random
-class Nurse:
+from collections import defaultdict
+from hospital.entity import Entity
+
+class Nurse(Entity):
+    __slots__ = ("id", "skill_level", "working_shifts", "assigned_room", "D", "shift_map", "rooms")
+    # working_shifts holds the max load of each shift (-1 if the nurse does not work in it)
+    STATIC = ("id", "skill_level", "working_shifts", "D", "shift_map")
+
     def __init__(self, data, D, shift_map, rooms, operating_theaters):
         self.id = data["id"]
         self.skill_level = data["skill_level"]
         self.working_shifts = [-1 for _ in range(3*D)]
-        self.assigned_room =  [[] for _ in range(3*D)]
+        # rooms assigned in each shift; only the shifts with rooms are stored, the others are read with
+        # assigned_room.get(shift, ())
+        self.assigned_room = defaultdict(list)
         for shift in data["working_shifts"]:
             if shift["shift"]=="early":
                 self.working_shifts[shift["day"]*3]=shift["max_load"]
@@ -18,6 +27,9 @@ class Nurse:
 
     # It finds all the rooms that are uncovered at the shift passed as argument.
     def find_compatible_rooms(self, shift_index):  
+        coverage = self.rooms[0].coverage if len(self.rooms) > 0 else None
+        if coverage is not None:
+            return coverage.uncovered_rooms(shift_index)
         day = shift_index//3
         compatible_rooms = []
         for r in self.rooms:
@@ -49,5 +61,5 @@ class Nurse:
                 for key in self.shift_map.keys():
                     if self.shift_map[key]==id_shift:
                         shift = key
-                assignments.append({"day": day, "shift": shift, "rooms": sorted([r.id for r in self.assigned_room[i]])})
+                assignments.append({"day": day, "shift": shift, "rooms": sorted([r.id for r in self.assigned_room.get(i, ())])})
         return {"id": self.id, "assignments": assignments}
@@ -1,4 +1,9 @@
-class Occupant:
+from hospital.entity import Entity
+
+class Occupant(Entity):
+    __slots__ = ("id", "gender", "age_group", "length_of_stay", "workload_produced", "skill_level_required", "room_id",
+                 "room")
+
     def __init__(self, data, age_group_map, rooms, operating_theaters):
         self.id = data["id"]
         self.gender = data["gender"]
@@ -11,4 +16,8 @@ class Occupant:
         for room in rooms:
             if room.id == self.room_id:
                 self.room = room
-        self.room.add_patient(self)
\ No newline at end of file
+        self.room.add_patient(self)
+
+    def __deepcopy__(self, memo):
+        # The occupants never change: all the chromosomes share the same objects
+        return self
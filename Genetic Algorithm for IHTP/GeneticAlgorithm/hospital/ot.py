@@ -1,16 +1,30 @@
-class OperatingTheater:
+from hospital.entity import Entity
+
+class OperatingTheater(Entity):
+    __slots__ = ("id", "daily_availability", "tracker", "hasher")
+    STATIC = ("id",)
+
     def __init__(self, data):
         self.id = data["id"]
-        self.daily_availability = data["availability"]
-        print(self.daily_availability)
+        self.daily_availability = list(data["availability"]) # minutes left on each day
+        self.tracker = None # DeltaCost of the chromosome owning the operating theater
+        self.hasher = None # ScheduleHash of the chromosome owning the operating theater
     
     def schedule_patient(self, patient): 
         # to schedule the surgery of the patient inside the operating theater
         self.daily_availability[patient.admission_day] -= patient.surgery_duration
+        if self.tracker is not None:
+            self.tracker.schedule_patient(self, patient)
+        if self.hasher is not None:
+            self.hasher.schedule_patient(self, patient)
 
     def unschedule_patient(self, patient): 
         # to unschedule the surgery of the patient inside the operating theater
         self.daily_availability[patient.admission_day] += patient.surgery_duration
+        if self.tracker is not None:
+            self.tracker.unschedule_patient(self, patient)
+        if self.hasher is not None:
+            self.hasher.unschedule_patient(self, patient)
 
     def isCompatible(self, patient): 
         # it finds operating theaters available in the admission day of the patient
@@ -1,6 +1,15 @@
 import random
+from hospital.entity import Entity
+
+class Patient(Entity):
+    __slots__ = ("id", "mandatory", "gender", "age_group", "length_of_stay", "surgery_release_day", "surgery_due_day",
+                 "surgery_duration", "surgeon_id", "incompatible_room_ids", "incompatible_mask", "workload_produced",
+                 "skill_level_required", "D", "admission_day", "room", "operating_theater", "rooms",
+                 "operating_theaters", "surgeon")
+    STATIC = ("id", "mandatory", "gender", "age_group", "length_of_stay", "surgery_release_day", "surgery_due_day",
+              "surgery_duration", "surgeon_id", "incompatible_room_ids", "incompatible_mask", "workload_produced",
+              "skill_level_required", "D")
 
-class Patient:
     def __init__(self, data, D, age_group_map, rooms, operating_theaters):
         self.id = data["id"]
         self.mandatory = data["mandatory"]
@@ -15,6 +24,7 @@ class Patient:
         self.surgery_duration = data["surgery_duration"]
         self.surgeon_id = data["surgeon_id"]
         self.incompatible_room_ids = data.get("incompatible_room_ids", [])
+        self.incompatible_mask = None # bitmask of the incompatible rooms, used by the FeasibilityIndex
         self.workload_produced = data["workload_produced"]
         self.skill_level_required = data["skill_level_required"]
         self.D = D
@@ -26,19 +36,26 @@ class Patient:
         self.surgeon = None
     
     def get_room(self, room_id):
+        feasibility = self.rooms[0].feasibility if len(self.rooms) > 0 else None
+        if feasibility is not None:
+            return self.rooms[feasibility.position[room_id]]
         for r in self.rooms:
             if r.id == room_id:
                 return r
             
     def find_compatible_rooms(self, rooms_to_exclude):
-        compatible_rooms = []
-        for r in self.rooms:
-            if r.isCompatible(self) == True and r.id not in self.incompatible_room_ids:
-                compatible_rooms.append(r)
+        feasibility = self.rooms[0].feasibility if len(self.rooms) > 0 else None
+        if feasibility is not None:
+            compatible_rooms = feasibility.compatible_rooms(self, self.admission_day)
+        else:
+            compatible_rooms = []
+            for r in self.rooms:
+                if r.isCompatible(self) == True and r.id not in self.incompatible_room_ids:
+                    compatible_rooms.append(r)
         if rooms_to_exclude == None:
             return compatible_rooms
         else:
-            return list(set(compatible_rooms)-set(rooms_to_exclude))
+            return [r for r in compatible_rooms if r not in rooms_to_exclude]
             
     def assign_room_to_patient(self, rooms_to_exclude):
         compatible_rooms = self.find_compatible_rooms(rooms_to_exclude)
@@ -58,7 +75,7 @@ class Patient:
         if ots_to_exclude == None:
             return compatible_ots
         else:
-            return list(set(compatible_ots)-set(ots_to_exclude))
+            return [ot for ot in compatible_ots if ot not in ots_to_exclude]
 
     def assign_ot_to_patient(self, ots_to_exclude):
         compatible_ots = self.find_compatible_ots(ots_to_exclude)
@@ -1,20 +1,43 @@
+from hospital.entity import Entity
 from hospital.occupant import Occupant
 
-class Room:
+class Room(Entity):
+    __slots__ = ("id", "capacity", "schedule_patients", "schedule_nurses", "D", "tracker", "feasibility", "hasher",
+                 "coverage")
+    STATIC = ("id", "capacity", "D")
+
     def __init__(self, data, D):
         self.id = data["id"]
         self.capacity = data["capacity"]
         self.schedule_patients = [[] for _ in range(D)] # it keeps track of patients assigned in this room, for each day
         self.schedule_nurses = ['' for _ in range(3*D)] # the same, but with nurses, for each shift
         self.D = D
+        self.tracker = None # DeltaCost of the chromosome owning the room, notified of every change
+        self.feasibility = None # FeasibilityIndex of the chromosome owning the room
+        self.hasher = None # ScheduleHash of the chromosome owning the room
+        self.coverage = None # CoverageIndex of the chromosome owning the room
     
     
         
     def assign_nurse(self, nurse, shift):
+        if self.hasher is not None:
+            if self.schedule_nurses[shift] != '':
+                self.hasher.remove_nurse(self, self.schedule_nurses[shift], shift)
+            self.hasher.assign_nurse(self, nurse.id, shift)
         self.schedule_nurses[shift] = nurse.id
+        if self.coverage is not None:
+            self.coverage.assign_nurse(self, shift)
+        if self.tracker is not None:
+            self.tracker.assign_nurse(self, nurse.id, shift)
     
     def remove_nurse(self, shift):
+        if self.hasher is not None and self.schedule_nurses[shift] != '':
+            self.hasher.remove_nurse(self, self.schedule_nurses[shift], shift)
         self.schedule_nurses[shift] = ''
+        if self.coverage is not None:
+            self.coverage.remove_nurse(self, shift)
+        if self.tracker is not None:
+            self.tracker.remove_nurse(self, shift)
     
     def add_patient(self, patient):
         if isinstance(patient, Occupant):
@@ -24,9 +47,21 @@ class Room:
         length_of_stay = patient.length_of_stay
         for i in range(admission_day, min(admission_day+length_of_stay, self.D)):
             self.schedule_patients[i].append(patient)
+        if self.feasibility is not None:
+            self.feasibility.add_patient(self, patient, admission_day)
+        if self.tracker is not None:
+            self.tracker.add_patient(self, patient)
+        if self.hasher is not None:
+            self.hasher.add_patient(self, patient)
 
 
     def remove_patient(self, patient):
+        if self.tracker is not None:
+            self.tracker.remove_patient(self, patient)
+        if self.feasibility is not None:
+            self.feasibility.remove_patient(self, patient, patient.admission_day)
+        if self.hasher is not None:
+            self.hasher.remove_patient(self, patient)
         admission_day = patient.admission_day
         length_of_stay = patient.length_of_stay
         for i in range(admission_day, min(admission_day+length_of_stay, self.D)):
@@ -1,7 +1,13 @@
-class Surgeon:
+from hospital.entity import Entity
+
+class Surgeon(Entity):
+    __slots__ = ("id", "max_surgery_time", "tracker")
+    STATIC = ("id",)
+
     def __init__(self, data, D):
         self.id = data["id"]
-        self.max_surgery_time = data["max_surgery_time"]
+        self.max_surgery_time = list(data["max_surgery_time"]) # minutes left on each day
+        self.tracker = None # DeltaCost of the chromosome owning the surgeon
 
     def check_schedule_surgery(self, day, surgery_time):
         if self.max_surgery_time[day] >= surgery_time:
@@ -11,6 +17,10 @@ class Surgeon:
 
     def schedule_surgery(self, day, surgery_time):
         self.max_surgery_time[day] -= surgery_time
+        if self.tracker is not None:
+            self.tracker.schedule_surgery(self, day, surgery_time)
 
     def unschedule_surgery(self, day, surgery_time):
-        self.max_surgery_time[day] += surgery_time
\ No newline at end of file
+        self.max_surgery_time[day] += surgery_time
+        if self.tracker is not None:
+            self.tracker.unschedule_surgery(self, day, surgery_time)
\ No newline at end of file
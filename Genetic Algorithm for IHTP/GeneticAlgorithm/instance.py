@@ -0,0 +1,82 @@
+import json
+from hospital.nurse import Nurse
+from hospital.occupant import Occupant
+from hospital.ot import OperatingTheater
+from hospital.patient import Patient
+from hospital.surgeon import Surgeon
+from hospital.room import Room
+
+
+class Instance:
+    # Read-only data of an instance, shared by all the chromosomes. Iterating over it gives the arguments of
+    # the Chromosome constructor, in order.
+    __slots__ = ("patients", "occupants", "rooms", "nurses", "surgeons", "ots", "room_ids", "ot_ids", "D", "shift_map",
+                 "age_group_map")
+
+    def __init__(self, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D, shift_map, age_group_map):
+        self.patients = patients
+        self.occupants = occupants
+        self.rooms = rooms
+        self.nurses = nurses
+        self.surgeons = surgeons
+        self.ots = ots
+        self.room_ids = room_ids
+        self.ot_ids = ot_ids
+        self.D = D
+        self.shift_map = shift_map
+        self.age_group_map = age_group_map
+
+    def __iter__(self):
+        return iter((self.patients, self.occupants, self.rooms, self.nurses, self.surgeons, self.ots, self.room_ids,
+                     self.ot_ids, self.D))
+
+
+def load_instance(instance_file):
+    # It reads the instance file and creates the objects related to the rooms, operating theaters,
+    # occupants, patients, nurses and surgeons. It returns the data of the file and the Instance.
+    with open(instance_file, "r") as f: 
+        data = json.load(f) # open the istance file in order to read data
+
+    D = data["days"] # get the number of days
+    shift_map = {name: i for i, name in enumerate(data["shift_types"])} 
+    age_group_map = {name: i for i, name in enumerate(data["age_groups"])}
+
+    # From now, all the objects related to the rooms, operating theaters, occupants, patients, nurses 
+    # and surgeons are created and stored in Python lists.
+    rooms = []
+    room_ids = []
+    for room in data["rooms"]:
+        rooms.append(Room(room, D))
+        room_ids.append(room["id"])
+
+    operating_theaters = []
+    ot_ids = []
+    for ot in data["operating_theaters"]:
+        operating_theaters.append(OperatingTheater(ot))
+        ot_ids.append(ot["id"])
+
+    occupants = []
+    for occ in data["occupants"]:
+        occupant = Occupant(occ, age_group_map, rooms, operating_theaters)
+        occupants.append(occupant)
+
+    patients = []
+    room_position = {room_id: i for i, room_id in enumerate(room_ids)}
+    for patient in data["patients"]:
+        p = Patient(patient, D, age_group_map, None, None)
+        # the incompatible rooms are stored as a bitmask over the rooms (bit i = rooms[i])
+        p.incompatible_mask = 0
+        for room_id in p.incompatible_room_ids:
+            p.incompatible_mask |= 1 << room_position[room_id]
+        patients.append(p)
+
+    nurses = []
+    for nurse in data["nurses"]:
+        nurses.append(Nurse(nurse, D, shift_map, None, None))
+
+    surgeons = []
+    for surgeon in data["surgeons"]:
+        surgeons.append(Surgeon(surgeon, D))
+
+    return data, Instance(patients, occupants, rooms, nurses, surgeons, operating_theaters, room_ids, ot_ids, D, shift_map,
+                          age_group_map)
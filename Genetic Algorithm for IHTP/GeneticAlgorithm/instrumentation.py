@@ -0,0 +1,115 @@
+import csv
+import json
+import statistics
+import time
+from chromosome import Chromosome
+
+# Phases of an era timed by the GeneticAlgorithm. The times are exclusive: the time of a phase started
+# inside another one (e.g. the deepcopy of the parents inside crossover) is not counted twice.
+PHASES = ("selection", "local_search", "injection", "crossover", "deepcopy", "mutation", "fix_uncovered_rooms",
+          "compute_cost", "repair", "offspring_pool", "report")
+# the infeasible offspring are either repaired (OffspringRepair) or rejected
+COUNTERS = ("offspring", "feasible", "infeasible", "repaired", "rejected", "admitted")
+
+
+class _Timer:
+    def __init__(self, instrumentation, phase):
+        self.instrumentation = instrumentation
+        self.phase = phase
+
+    def __enter__(self):
+        self.instrumentation._start(self.phase)
+
+    def __exit__(self, *exc):
+        self.instrumentation._stop()
+
+
+class _NullTimer:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation:
+    # Per-era timings and counters, written to path as JSON Lines (CSV if it ends with ".csv"); None = disabled.
+    # With append = True (resumed run) the records are added to the file, without a second CSV header.
+    def __init__(self, path=None, append=False):
+        self.path = path
+        self.append = append
+        self.enabled = path is not None
+        self.file = None
+        self.writer = None
+        self.stack = []
+        self.mark = None
+        self.start_era()
+
+    def start_era(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.era_start = time.perf_counter()
+        self.era_evaluations = Chromosome.evaluations
+
+    def timer(self, phase):
+        # context manager that adds the time spent in its block to the phase
+        return _Timer(self, phase) if self.enabled else _NULL_TIMER
+
+    def _start(self, phase):
+        now = time.perf_counter()
+        if len(self.stack) > 0:
+            self.phases[self.stack[-1]] += now - self.mark
+        self.stack.append(phase)
+        self.mark = now
+
+    def _stop(self):
+        now = time.perf_counter()
+        self.phases[self.stack.pop()] += now - self.mark
+        self.mark = now
+
+    def count(self, counter, n=1):
+        if self.enabled:
+            self.counters[counter] += n
+
+    def end_era(self, era, ga):
+        # It writes the record of the era and starts measuring the next one
+        if not self.enabled:
+            return
+        costs = [ch.total_cost[1] for ch in ga.current_population]
+        cache = Chromosome.fitness_cache
+        record = {
+            "era": era,
+            "era_time": time.perf_counter() - self.era_start,
+            "evaluations": Chromosome.evaluations - self.era_evaluations,
+            "cache_hits": cache.hits if cache is not None else 0,
+            "cache_misses": cache.misses if cache is not None else 0,
+            "best_cost": min(costs),
+            "median_cost": statistics.median(costs),
+            "num_times_best": ga.num_times_best
+        }
+        record.update(self.counters)
+        record.update({f"time_{phase}": t for phase, t in self.phases.items()})
+        self._write(record)
+        self.start_era()
+
+    def _write(self, record):
+        if self.file is None:
+            self.file = open(self.path, "a" if self.append else "w", newline="")
+            if self.path.endswith(".csv"):
+                self.writer = csv.DictWriter(self.file, fieldnames=list(record.keys()))
+                if self.file.tell() == 0:
+                    self.writer.writeheader()
+        if self.writer is not None:
+            self.writer.writerow(record)
+        else:
+            self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
@@ -0,0 +1,123 @@
+import multiprocessing
+import queue
+import random
+from chromosome import Chromosome, random_population
+from fitness_cache import FitnessCache
+from GA import GeneticAlgorithm
+from options import GAOptions
+
+
+def _run_island(index, instance, evaluator, population_size, eras, migration_interval, num_migrants, seed,
+                inbox, outbox, results, options, migration_timeout):
+    # Process of one island. On failure it sends None to the next island and the error to the parent.
+    try:
+        _evolve_island(index, instance, evaluator, population_size, eras, migration_interval, num_migrants, seed,
+                       inbox, outbox, results, options, migration_timeout)
+    except Exception as e:
+        outbox.put(None)
+        results.put((index, None, f"{type(e).__name__}: {e}"))
+
+
+def _evolve_island(index, instance, evaluator, population_size, eras, migration_interval, num_migrants, seed,
+                   inbox, outbox, results, options, migration_timeout):
+    Chromosome.evaluator = evaluator
+    Chromosome.fitness_cache = FitnessCache()
+    random.seed(seed)
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    initializer = options.initializer
+    population = initializer.population(population_size, *instance) if initializer is not None else []
+    if len(population) < population_size:
+        population += random_population(population_size-len(population), *instance)
+    ga = GeneticAlgorithm(population, eras, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                          injections=False, report=False, options=options)
+    ga.start_pool()
+    receiving = True # False once the previous island has failed or has not sent its migrants in time
+    try:
+        for era in range(eras):
+            ga.evolve_era(era)
+            if (era+1) % migration_interval == 0 and era+1 < eras:
+                outbox.put([ch.to_genome() for ch in ga.emigrants(num_migrants)])
+                if not receiving:
+                    continue
+                try:
+                    genomes = inbox.get(timeout=migration_timeout)
+                except queue.Empty:
+                    genomes = None
+                if genomes is None:
+                    receiving = False
+                    print(f"Island {index}: the previous island stopped sending migrants at era {era}")
+                    continue
+                migrants = [Chromosome.from_genome(genome, *instance) for genome in genomes]
+                for ch in migrants:
+                    ch.compute_cost()
+                ga.immigrate(migrants)
+                print(f"Island {index}: {len(migrants)} migrants received at era {era}")
+    finally:
+        ga.stop_pool()
+    best = ga.get_best()
+    results.put((index, best.to_genome(), best.total_cost))
+
+
+class IslandModel:
+    # num_islands populations evolve in separate processes; every migration_interval eras each island sends
+    # its num_migrants best feasible chromosomes, as Genome arrays, to the next island of a ring.
+    # The failed islands are reported as (None, None) in self.results.
+    def __init__(self, num_islands, population_size, eras, patients, nurses, rooms, occupants, surgeons, ots,
+                 room_ids, ot_ids, D, migration_interval=10, num_migrants=2, migration_timeout=600, options=None):
+        self.num_islands = num_islands
+        self.population_size = population_size
+        self.num_eras = eras
+        # same order of the Chromosome constructor
+        self.instance = (patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D)
+        self.migration_interval = migration_interval
+        self.num_migrants = num_migrants
+        self.migration_timeout = migration_timeout
+        self.options = options if options is not None else GAOptions()
+        self.results = None
+
+    def evolve(self):
+        # It returns the best chromosome found by the islands. self.results keeps the best
+        # (total violations, total cost) of each island.
+        if Chromosome.evaluator is None:
+            raise ValueError("The island model needs the in-process evaluator (Chromosome.evaluator)")
+        queues = [multiprocessing.Queue() for _ in range(self.num_islands)]
+        results = multiprocessing.Queue()
+        processes = []
+        for i in range(self.num_islands):
+            process = multiprocessing.Process(target=_run_island, args=(
+                i, self.instance, Chromosome.evaluator, self.population_size, self.num_eras,
+                self.migration_interval, self.num_migrants, random.getrandbits(32),
+                queues[i], queues[(i+1) % self.num_islands], results, self.options, self.migration_timeout))
+            process.start()
+            processes.append(process)
+        bests = self.collect(results, processes)
+        for process in processes:
+            # the migrants never received can keep an island alive after it has sent its result
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.results = [total_cost if genome is not None else (None, None) for genome, total_cost in bests]
+        completed = [(genome, total_cost) for genome, total_cost in bests if genome is not None]
+        if len(completed) == 0:
+            raise RuntimeError(f"All the islands failed: {[error for _, error in bests]}")
+        genome, _ = min(completed, key=lambda b: b[1][1])
+        best = Chromosome.from_genome(genome, *self.instance)
+        best.compute_cost()
+        return best
+
+    def collect(self, results, processes, poll_interval=1):
+        # (genome, total cost) of each island, (None, error) for the islands that failed. The results are
+        # polled, so that an island killed without sending its result does not block the parent process.
+        bests = [None]*self.num_islands
+        while any(best is None for best in bests):
+            try:
+                index, genome, total_cost = results.get(timeout=poll_interval)
+                bests[index] = (genome, total_cost)
+                if genome is None:
+                    print(f"Island {index} failed: {total_cost}")
+            except queue.Empty:
+                for i, process in enumerate(processes):
+                    if bests[i] is None and not process.is_alive():
+                        bests[i] = (None, f"process exited with code {process.exitcode}")
+                        print(f"Island {i} failed: {bests[i][1]}")
+        return bests
@@ -0,0 +1,226 @@
+import copy
+import math
+import random
+import time
+from chromosome import Chromosome
+
+
+class LargeNeighbourhoodSearch:
+    # Large Neighbourhood Search on one chromosome: a group of related patients is unscheduled and inserted
+    # again at its best positions (greedy or regret-2), accepted with simulated annealing.
+    def __init__(self, time_limit=60.0, min_destroy=3, max_destroy=12, max_unscheduled=2, max_candidates=40,
+                 insertion="greedy", start_temperature=None, nurse_assignment=None):
+        self.time_limit = time_limit
+        self.min_destroy = min_destroy
+        self.max_destroy = max_destroy
+        self.max_unscheduled = max_unscheduled
+        self.max_candidates = max_candidates
+        self.insertion = insertion
+        self.start_temperature = start_temperature
+        self.nurse_assignment = nurse_assignment
+        self.destroy_operators = [self.same_day, self.same_room, self.same_surgeon, self.same_ot]
+        self.iterations = 0
+        self.accepted = 0
+        self.improvements = 0
+        self.failures = 0
+        self.last_improvement = 0 # iteration of the last new best chromosome
+        self.history = [] # (seconds, total cost) of each new best chromosome
+
+    def report(self):
+        report = (f"LNS: {self.iterations} iterations, {self.accepted} accepted, {self.improvements} new best, "
+                  f"{self.failures} failed repairs")
+        self.iterations = 0
+        self.accepted = 0
+        self.improvements = 0
+        self.failures = 0
+        self.last_improvement = 0
+        return report
+
+    def solve(self, chromosome, termination=None):
+        # It returns the best chromosome found starting from chromosome (which is not changed) within
+        # time_limit seconds, or earlier if termination (a Termination) says to stop.
+        if chromosome.tracker is None:
+            raise ValueError("The LNS needs the in-process evaluator (Chromosome.evaluator)")
+        start = time.time()
+        if termination is not None:
+            termination.start()
+        current = copy.deepcopy(chromosome)
+        current.total_cost = current.tracker.total()
+        best = current
+        self.last_improvement = self.iterations
+        self.history = [(0.0, best.total_cost[1])]
+        t0 = self.start_temperature if self.start_temperature is not None else 0.005*max(1, current.total_cost[1])
+        while time.time()-start < self.time_limit:
+            if termination is not None and termination.stop_reason(self) is not None:
+                break
+            self.iterations += 1
+            Chromosome.evaluations += 1
+            temperature = t0*0.01**((time.time()-start)/self.time_limit)
+            candidate = copy.deepcopy(current)
+            if not self.destroy_and_repair(candidate):
+                self.failures += 1
+                continue
+            candidate.total_cost = candidate.tracker.total()
+            if self.accept(current.total_cost, candidate.total_cost, temperature):
+                current = candidate
+                self.accepted += 1
+                if current.total_cost < best.total_cost:
+                    best = current
+                    self.improvements += 1
+                    self.last_improvement = self.iterations
+                    self.history.append((time.time()-start, best.total_cost[1]))
+        best.cache_cost()
+        return best
+
+    @property
+    def num_times_best(self):
+        # iterations since the last new best chromosome, for the max_stagnation criterion of Termination
+        return self.iterations - self.last_improvement
+
+    def accept(self, current, cost, temperature):
+        # Hard violations are never increased
+        if cost[0] != current[0]:
+            return cost[0] < current[0]
+        delta = cost[1] - current[1]
+        return delta <= 0 or random.random() < math.exp(-delta/temperature)
+
+    def destroy_and_repair(self, ch):
+        scheduled = [p for p in ch.patients if p.admission_day is not None]
+        if len(scheduled) == 0:
+            return False
+        group = random.choice(self.destroy_operators)(ch, random.choice(scheduled), scheduled)
+        size = random.randint(self.min_destroy, self.max_destroy)
+        if len(group) > size:
+            group = random.sample(group, size)
+        elif len(group) < size:
+            others = [p for p in scheduled if p not in group]
+            group += random.sample(others, min(size-len(group), len(others)))
+        unscheduled = [p for p in ch.patients if p.admission_day is None]
+        removed = group + random.sample(unscheduled, min(self.max_unscheduled, len(unscheduled)))
+        days = set()
+        for patient in group:
+            days.update(range(patient.admission_day, min(patient.admission_day+patient.length_of_stay, ch.D)))
+            self.unschedule(patient)
+        inserted = self.repair(ch, removed)
+        if inserted is None:
+            return False
+        for patient in inserted:
+            days.update(range(patient.admission_day, min(patient.admission_day+patient.length_of_stay, ch.D)))
+        return self.cover_rooms(ch, days)
+
+    # Destroy operators: the patients related to the scheduled patient anchor ---------------------------
+
+    def same_day(self, ch, anchor, scheduled):
+        return [p for p in scheduled if p.admission_day == anchor.admission_day]
+
+    def same_room(self, ch, anchor, scheduled):
+        return [p for p in scheduled if p.room is anchor.room]
+
+    def same_surgeon(self, ch, anchor, scheduled):
+        # the week of the surgeon around the admission of the anchor
+        return [p for p in scheduled if p.surgeon is anchor.surgeon and abs(p.admission_day - anchor.admission_day) <= 3]
+
+    def same_ot(self, ch, anchor, scheduled):
+        return [p for p in scheduled if p.operating_theater is anchor.operating_theater
+                and abs(p.admission_day - anchor.admission_day) <= 1]
+
+    # Repair ----------------------------------------------------------------------------------------------
+
+    def schedule(self, patient, day, room, ot):
+        patient.admission_day = day
+        patient.surgeon.schedule_surgery(day, patient.surgery_duration)
+        patient.room = room
+        room.add_patient(patient)
+        patient.operating_theater = ot
+        ot.schedule_patient(patient)
+
+    def unschedule(self, patient):
+        patient.room.remove_patient(patient)
+        patient.operating_theater.unschedule_patient(patient)
+        patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+        patient.admission_day = None
+        patient.room = None
+        patient.operating_theater = None
+
+    def choose_ot(self, ch, patient, day):
+        ots = [ot for ot in ch.ots if ot.daily_availability[day] >= patient.surgery_duration]
+        if len(ots) == 0:
+            return None
+        same_surgeon = [ot for ot in ots if any(p.surgeon is patient.surgeon for p in self.surgeries.get((ot.id, day), ()))]
+        if len(same_surgeon) > 0:
+            return random.choice(same_surgeon)
+        already_open = [ot for ot in ots if len(self.surgeries.get((ot.id, day), ())) > 0]
+        return random.choice(already_open if len(already_open) > 0 else ots)
+
+    def candidates(self, ch, patient):
+        # up to max_candidates feasible (day, room, operating theater) for the patient
+        last_day = patient.surgery_due_day if patient.mandatory else ch.D-1
+        positions = []
+        for day in range(patient.surgery_release_day, last_day+1):
+            if not patient.surgeon.check_schedule_surgery(day, patient.surgery_duration):
+                continue
+            if all(ot.daily_availability[day] < patient.surgery_duration for ot in ch.ots):
+                continue
+            positions += [(day, room) for room in ch.feasibility.compatible_rooms(patient, day)]
+        if len(positions) > self.max_candidates:
+            positions = random.sample(positions, self.max_candidates)
+        return [(day, room, self.choose_ot(ch, patient, day)) for day, room in positions]
+
+    def cost(self, ch):
+        # (violations, cost) without the UncoveredRoom violations, since the rooms are covered after the repair
+        total = ch.tracker.total()
+        return (total[0] - ch.tracker.totals["UncoveredRoom"], total[1])
+
+    def insertion_costs(self, ch, patient):
+        # (cost, day, room, operating theater) of each candidate position, cheapest first; (cost, None, None,
+        # None) is the cost of leaving a non mandatory patient unscheduled
+        costs = []
+        if not patient.mandatory:
+            costs.append((self.cost(ch), None, None, None))
+        for day, room, ot in self.candidates(ch, patient):
+            self.schedule(patient, day, room, ot)
+            costs.append((self.cost(ch), day, room, ot))
+            self.unschedule(patient)
+        costs.sort(key=lambda c: c[0])
+        return costs
+
+    def repair(self, ch, removed):
+        # It inserts the removed patients again, returning the ones scheduled, or None if a mandatory patient
+        # cannot be scheduled
+        self.surgeries = {}
+        for p in ch.patients:
+            if p.admission_day is not None:
+                self.surgeries.setdefault((p.operating_theater.id, p.admission_day), []).append(p)
+        pending = sorted(removed, key=lambda p: (not p.mandatory, random.random()))
+        inserted = []
+        while len(pending) > 0:
+            if self.insertion == "regret":
+                options = {p: self.insertion_costs(ch, p) for p in pending}
+                if any(len(costs) == 0 for costs in options.values()):
+                    return None
+                def regret(p):
+                    costs = options[p]
+                    return (costs[1][0][1] - costs[0][0][1]) if len(costs) > 1 else math.inf
+                patient = max(pending, key=regret)
+                costs = options[patient]
+            else:
+                patient = pending[0]
+                costs = self.insertion_costs(ch, patient)
+                if len(costs) == 0:
+                    return None
+            pending.remove(patient)
+            _, day, room, ot = costs[0]
+            if day is not None:
+                self.schedule(patient, day, room, ot)
+                self.surgeries.setdefault((ot.id, day), []).append(patient)
+                inserted.append(patient)
+        return inserted
+
+    def cover_rooms(self, ch, days):
+        # It covers the occupied rooms left without a nurse in the days touched by the moves
+        if self.nurse_assignment is None:
+            return ch.fix_uncovered_rooms()
+        for s in range(3*min(days), 3*max(days)+3) if len(days) > 0 else ():
+            if ch.coverage.uncovered_mask(s) != 0 and not self.nurse_assignment.solve_shift(ch, s):
+                return False
+        return True
@@ -0,0 +1,180 @@
+import copy
+import math
+import random
+import time
+
+
+class LocalSearch:
+    # Local search on the best chromosomes of each era: each move is applied, scored by the DeltaCost and
+    # undone unless accepted (hill climbing, or simulated annealing with temperature > 0).
+    def __init__(self, time_budget=1.0, num_chromosomes=2, temperature=0, cooling=0.99):
+        self.time_budget = time_budget # seconds per era, shared by the num_chromosomes best chromosomes
+        self.num_chromosomes = num_chromosomes
+        self.temperature = temperature
+        self.cooling = cooling
+        self.neighbourhoods = [self.move_day, self.swap_rooms, self.move_ot, self.reassign_nurse, self.swap_nurses]
+        self.accepted = 0
+        self.rejected = 0
+
+    def report(self):
+        report = f"Local search: {self.accepted} accepted moves, {self.rejected} rejected moves"
+        self.accepted = 0
+        self.rejected = 0
+        return report
+
+    def improve_population(self, chromosomes):
+        # chromosomes is sorted by cost (as returned by GeneticAlgorithm.selection). Each of the first
+        # num_chromosomes is improved on a copy, which replaces it only if it is better.
+        num_chromosomes = min(self.num_chromosomes, len(chromosomes))
+        for i in range(num_chromosomes):
+            if chromosomes[i].tracker is None:
+                continue
+            candidate = copy.deepcopy(chromosomes[i])
+            self.improve(candidate, self.time_budget/num_chromosomes)
+            if candidate.total_cost < chromosomes[i].total_cost:
+                chromosomes[i] = candidate
+        return chromosomes
+
+    def improve(self, chromosome, time_limit):
+        end = time.time() + time_limit
+        self.scheduled = [p for p in chromosome.patients if p.admission_day is not None]
+        current = chromosome.tracker.total()
+        temperature = self.temperature
+        while time.time() < end:
+            undo = random.choice(self.neighbourhoods)(chromosome)
+            if undo is None: # the move cannot be applied
+                continue
+            cost = chromosome.tracker.total()
+            if self.accept(current, cost, temperature):
+                current = cost
+                temperature *= self.cooling
+                self.accepted += 1
+            else:
+                undo()
+                self.rejected += 1
+        chromosome.tracker.total()
+        chromosome.total_cost = current
+        chromosome.cache_cost()
+
+    def accept(self, current, cost, temperature):
+        # Hard violations are never increased
+        if cost[0] != current[0]:
+            return cost[0] < current[0]
+        delta = cost[1] - current[1]
+        if delta < 0:
+            return True
+        return temperature > 0 and delta > 0 and random.random() < math.exp(-delta/temperature)
+
+    # Patient moves -----------------------------------------------------------------------------------
+
+    def reschedule(self, patient, day, room, ot):
+        # It moves the patient to the given admission day, room and operating theater
+        patient.room.remove_patient(patient)
+        patient.operating_theater.unschedule_patient(patient)
+        patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+        patient.admission_day = day
+        patient.room = room
+        patient.operating_theater = ot
+        patient.surgeon.schedule_surgery(day, patient.surgery_duration)
+        room.add_patient(patient)
+        ot.schedule_patient(patient)
+
+    def fits(self, chromosome, *moves):
+        # moves = (patient, day, room): each room must be compatible with its patient (gender, capacity and
+        # incompatible rooms) once all the moved patients have left their current rooms
+        feasibility = chromosome.feasibility
+        position = chromosome.index_maps["room"]
+        for patient, _, _ in moves:
+            feasibility.remove_patient(patient.room, patient, patient.admission_day)
+        fits = all((feasibility.compatible_mask(patient, day) >> position[room.id]) & 1 for patient, day, room in moves)
+        for patient, _, _ in moves:
+            feasibility.add_patient(patient.room, patient, patient.admission_day)
+        return fits
+
+    def _undo_reschedule(self, *moves):
+        # moves = (patient, day, room, ot) with the old assignments, restored in reverse order
+        def undo():
+            for patient, day, room, ot in reversed(moves):
+                self.reschedule(patient, day, room, ot)
+        return undo
+
+    def move_day(self, chromosome):
+        if len(self.scheduled) == 0:
+            return None
+        patient = random.choice(self.scheduled)
+        last_day = patient.surgery_due_day if patient.mandatory else chromosome.D-1
+        day = random.randint(patient.surgery_release_day, last_day)
+        if day == patient.admission_day or not patient.surgeon.check_schedule_surgery(day, patient.surgery_duration) \
+                or patient.operating_theater.daily_availability[day] < patient.surgery_duration \
+                or not self.fits(chromosome, (patient, day, patient.room)):
+            return None
+        undo = self._undo_reschedule((patient, patient.admission_day, patient.room, patient.operating_theater))
+        self.reschedule(patient, day, patient.room, patient.operating_theater)
+        return undo
+
+    def swap_rooms(self, chromosome):
+        if len(self.scheduled) < 2:
+            return None
+        patient1, patient2 = random.sample(self.scheduled, 2)
+        if patient1.room is patient2.room or not self.fits(chromosome, (patient1, patient1.admission_day, patient2.room),
+                                                           (patient2, patient2.admission_day, patient1.room)):
+            return None
+        undo = self._undo_reschedule((patient1, patient1.admission_day, patient1.room, patient1.operating_theater),
+                                     (patient2, patient2.admission_day, patient2.room, patient2.operating_theater))
+        room1 = patient1.room
+        self.reschedule(patient1, patient1.admission_day, patient2.room, patient1.operating_theater)
+        self.reschedule(patient2, patient2.admission_day, room1, patient2.operating_theater)
+        return undo
+
+    def move_ot(self, chromosome):
+        if len(self.scheduled) == 0:
+            return None
+        patient = random.choice(self.scheduled)
+        ot = random.choice(chromosome.ots)
+        if ot is patient.operating_theater or ot.daily_availability[patient.admission_day] < patient.surgery_duration:
+            return None
+        undo = self._undo_reschedule((patient, patient.admission_day, patient.room, patient.operating_theater))
+        self.reschedule(patient, patient.admission_day, patient.room, ot)
+        return undo
+
+    # Nurse moves -------------------------------------------------------------------------------------
+
+    def set_nurse(self, chromosome, room, shift, nurse):
+        # It replaces the nurse covering the room in the shift
+        old_nurse = chromosome.nurses[chromosome.index_maps["nurse"][room.schedule_nurses[shift]]]
+        old_nurse.assigned_room[shift].remove(room)
+        room.assign_nurse(nurse, shift)
+        nurse.assigned_room[shift].append(room)
+        return old_nurse
+
+    def _covered_room_shift(self, chromosome):
+        room = random.choice(chromosome.rooms)
+        shift = random.randrange(len(room.schedule_nurses))
+        if room.schedule_nurses[shift] == '':
+            return None, None
+        return room, shift
+
+    def reassign_nurse(self, chromosome):
+        room, shift = self._covered_room_shift(chromosome)
+        if room is None:
+            return None
+        nurse = random.choice(chromosome.nurses)
+        if nurse.working_shifts[shift] <= 0 or nurse.id == room.schedule_nurses[shift]:
+            return None
+        old_nurse = self.set_nurse(chromosome, room, shift, nurse)
+        return lambda: self.set_nurse(chromosome, room, shift, old_nurse)
+
+    def swap_nurses(self, chromosome):
+        room1, shift = self._covered_room_shift(chromosome)
+        if room1 is None:
+            return None
+        room2 = random.choice(chromosome.rooms)
+        if room2.schedule_nurses[shift] in ('', room1.schedule_nurses[shift]):
+            return None
+        nurse2 = chromosome.nurses[chromosome.index_maps["nurse"][room2.schedule_nurses[shift]]]
+        nurse1 = self.set_nurse(chromosome, room1, shift, nurse2)
+        self.set_nurse(chromosome, room2, shift, nurse1)
+        def undo():
+            self.set_nurse(chromosome, room1, shift, nurse1)
+            self.set_nurse(chromosome, room2, shift, nurse2)
+        return undo
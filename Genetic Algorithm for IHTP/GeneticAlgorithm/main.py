@@ -1,90 +1,108 @@
-import json
+import os
+import random
 import time
-import subprocess
-from chromosome import Chromosome
-from hospital.nurse import Nurse
-from hospital.occupant import Occupant
-from hospital.ot import OperatingTheater
-from hospital.patient import Patient
-from hospital.surgeon import Surgeon
-from hospital.room import Room
+from chromosome import Chromosome, random_population
+from instance import load_instance
 from GA import GeneticAlgorithm
+from lns import LargeNeighbourhoodSearch
+from islands import IslandModel
+from options import GAOptions
+from warm_start import WarmStart
+from termination import Termination
+from instrumentation import Instrumentation
+from checkpoint import CheckpointWriter, load_checkpoint, population_from_checkpoint
+from evaluator import CostEvaluator
+from fitness_cache import FitnessCache
+from validator import run_validator
 from globals import input_file
 
-with open(input_file, "r") as f: 
-    data = json.load(f) # open the istance file in order to read data
-
-print(data.keys())
-
-D = data["days"] # get the number of days
-shift_map = {name: i for i, name in enumerate(data["shift_types"])} 
-age_group_map = {name: i for i, name in enumerate(data["age_groups"])}
-print(shift_map)
-print(age_group_map)
-
-weights = data["weights"]
-
-# From now, all the objects related to the rooms, operating theaters, occupants, patients, nurses 
-# and surgeons are created and stored in Python lists.
-rooms = []
-room_ids = []
-for room in data["rooms"]:
-    rooms.append(Room(room, D))
-    room_ids.append(room["id"])
-
-operating_theaters = []
-ot_ids = []
-for ot in data["operating_theaters"]:
-    operating_theaters.append(OperatingTheater(ot))
-    ot_ids.append(ot["id"])
-
-occupants = []
-for occ in data["occupants"]:
-    occupant = Occupant(occ, age_group_map, rooms, operating_theaters)
-    occupants.append(occupant)
-
-patients = []
-for patient in data["patients"]:
-    patients.append(Patient(patient, D, age_group_map, None, None))
-
-nurses = []
-for nurse in data["nurses"]:
-    nurses.append(Nurse(nurse, D, shift_map, None, None))
-
-surgeons = []
-for surgeon in data["surgeons"]:
-    surgeons.append(Surgeon(surgeon, D))
-
-N = 20 # dimension of the population
-
-population = []
-
-# The following while loop is used to generate the first generation of chromosomes.
-while len(population)!=N: 
-    ch = Chromosome(patients, occupants, rooms, nurses, surgeons, operating_theaters, room_ids, ot_ids, D)
-    valid = ch.random_initialize() 
-    if valid == False: # A first check after the function random_initialize() is executed
-        continue
-    ch.compute_cost()
-    # Then, for being sure, we double check whether the number of hard violations is 0. If it is, then
-    # add the chromosome to the population.
-    if ch.total_cost[0]==0:
-        population.append(ch)
-        
-
-
-ga = GeneticAlgorithm(population, 500, patients, nurses, rooms, occupants, surgeons, operating_theaters, room_ids, ot_ids, D)
-start = time.time()
-ga.evolve() # Here, the Genetic Algorithm starts.
-end = time.time()
-print(f"Time: {end-start}")
-solution = ga.get_best()
-sol_file = solution.save_solution()
-print(solution.total_cost)
-result = subprocess.run(
-            ["IHTP_Validator_2.exe", input_file, sol_file],
-            capture_output=True,  
-            text=True            
-        )
-print(result.stdout)
-
+def main():
+    data, instance = load_instance(input_file)
+    patients, occupants, rooms, nurses, surgeons, operating_theaters, room_ids, ot_ids, D = instance
+
+    # The costs of the chromosomes are computed in-process, using the weights of the instance.
+    Chromosome.evaluator = CostEvaluator(data)
+    # Schedules already evaluated (e.g. re-created by crossover or mutation) are not evaluated again
+    Chromosome.fitness_cache = FitnessCache(max_size=10000)
+
+    N = 20 # dimension of the population
+    num_islands = 1 # with more than 1 island, each one evolves a population of N chromosomes in its own process
+    migration_interval = 10 # eras between two migrations of the island model
+    time_limit = None # seconds after which the GA stops (None = no limit)
+    max_evaluations = None # number of cost evaluations after which the GA stops (None = no limit)
+    checkpoint_dir = None # the state of the GA and the best solution are saved here, e.g. "checkpoints" (None = no checkpoints)
+    resume = False # if True, the run continues from the last checkpoint in checkpoint_dir
+    stats_file = None # per-era timings and counters, e.g. "ga_stats.jsonl", as JSON Lines (or CSV if it ends with .csv); None = disabled
+    seed = None # if set, the run is reproducible
+    # if True, up to half of the first generation is made of the solutions archived in solutions/<instance>/
+    # and of perturbed variants of them
+    from_archive = False
+    warm_start = WarmStart(solutions_dir="solutions") if from_archive else None
+    # optional components of the GA, e.g. {"num_workers": 4, "optimize_nurses": True}: see DEFAULT_SETTINGS
+    # in options.py, shared with benchmark.py, whose defaults reproduce the original GA
+    settings = {}
+    options = GAOptions.from_settings(**settings)
+    # "ga", or "lns" for the Large Neighbourhood Search from the best chromosome of the first generation
+    # (for lns_time seconds, or until time_limit/max_evaluations)
+    solver = "ga"
+    lns_time = 60.0
+    if seed is not None:
+        random.seed(seed)
+
+    if num_islands>1:
+        model = IslandModel(num_islands, N, 500, patients, nurses, rooms, occupants, surgeons, operating_theaters, room_ids, ot_ids, D, migration_interval=migration_interval, options=options)
+        start = time.time()
+        solution = model.evolve()
+        end = time.time()
+        print(f"Time: {end-start}")
+        print(f"Best of each island: {model.results}")
+    else:
+        state = load_checkpoint(checkpoint_dir) if resume and checkpoint_dir is not None else None
+        if state is not None:
+            print(f"Resuming from the checkpoint of era {state['era']}")
+            population = population_from_checkpoint(state, patients, occupants, rooms, nurses, surgeons, operating_theaters, room_ids, ot_ids, D)
+        else:
+            # The first generation is made of N chromosomes without hard violations.
+            population = []
+            if warm_start is not None:
+                instance_name = os.path.splitext(os.path.basename(input_file))[0]
+                population = warm_start.population(N, instance_name, patients, occupants, rooms, nurses, surgeons, operating_theaters, room_ids, ot_ids, D)
+                print(warm_start.report())
+            if options.initializer is not None and len(population)<N:
+                population += options.initializer.population(N-len(population), patients, occupants, rooms, nurses, surgeons, operating_theaters, room_ids, ot_ids, D)
+                print(options.initializer.report())
+            if len(population)<N:
+                population += random_population(N-len(population), patients, occupants, rooms, nurses, surgeons, operating_theaters, room_ids, ot_ids, D)
+
+        termination = Termination(time_limit=time_limit, max_evaluations=max_evaluations)
+        if solver == "lns":
+            lns = LargeNeighbourhoodSearch(time_limit=lns_time, nurse_assignment=options.nurse_assignment)
+            start = time.time()
+            solution = lns.solve(min(population, key=lambda ch: ch.total_cost), termination=termination)
+            end = time.time()
+            print(f"Time: {end-start}")
+            print(lns.report())
+        else:
+            options.termination = termination
+            options.checkpoint = CheckpointWriter(checkpoint_dir) if checkpoint_dir is not None else None
+            options.instrumentation = Instrumentation(stats_file, append=state is not None)
+            ga = GeneticAlgorithm(population, 500, patients, nurses, rooms, occupants, surgeons, operating_theaters, room_ids, ot_ids, D, options=options)
+            if state is not None:
+                ga.restore(state)
+            start = time.time()
+            ga.evolve() # Here, the Genetic Algorithm starts.
+            end = time.time()
+            print(f"Time: {end-start}")
+            solution = ga.get_best()
+    sol_file = solution.save_solution()
+    print(solution.total_cost)
+    output = run_validator(sol_file)
+    print(output)
+
+
+
+
+# The main code is guarded because the worker processes of the GA pool (num_workers>1) import this
+# module when they are started with the "spawn" method (e.g. on Windows).
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import ctypes
+import json
+import os
+from evaluator import HARD_COMPONENTS, SOFT_COMPONENTS, format_report, totals
+
+# Shared library built from IHTP_Validator_2.cc (make library, see the Makefile). It is looked for in
+# IHTP_VALIDATOR_LIB, then next to this module.
+LIBRARY = os.environ.get("IHTP_VALIDATOR_LIB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "libihtp_validator.so"))
+
+_library = None
+
+
+def load_library(path=LIBRARY):
+    # The ctypes library with the argument types of the C API, or None if it has not been built
+    global _library
+    if _library is not None:
+        return _library
+    if not os.path.exists(path):
+        return None
+    lib = ctypes.CDLL(path)
+    lib.ihtp_load.argtypes = [ctypes.c_char_p]
+    lib.ihtp_load.restype = ctypes.c_void_p
+    lib.ihtp_free.argtypes = [ctypes.c_void_p]
+    lib.ihtp_free.restype = None
+    lib.ihtp_last_error.restype = ctypes.c_char_p
+    for name in ("ihtp_patients", "ihtp_rooms", "ihtp_nurses", "ihtp_shifts"):
+        getattr(lib, name).argtypes = [ctypes.c_void_p]
+    lib.ihtp_weight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    int_array = ctypes.POINTER(ctypes.c_int)
+    lib.ihtp_evaluate_json.argtypes = [ctypes.c_void_p, ctypes.c_char_p, int_array, int_array]
+    lib.ihtp_evaluate_arrays.argtypes = [ctypes.c_void_p, int_array, int_array, int_array, int_array, ctypes.c_int,
+                                         int_array, int_array]
+    if lib.ihtp_num_violations() != len(HARD_COMPONENTS) or lib.ihtp_num_costs() != len(SOFT_COMPONENTS):
+        raise RuntimeError(f"{path} does not match the components of evaluator.py")
+    _library = lib
+    return lib
+
+
+def available():
+    return load_library() is not None
+
+
+class NativeValidator:
+    # IHTP_Validator_2 loaded as a library: records with the keys of the validator batch mode. One thread at
+    # a time.
+    def __init__(self, instance_file, library=LIBRARY):
+        self.lib = load_library(library)
+        if self.lib is None:
+            raise FileNotFoundError(f"{library} not found, build it from IHTP_Validator_2.cc")
+        self.handle = self.lib.ihtp_load(instance_file.encode())
+        if not self.handle:
+            raise ValueError(self.lib.ihtp_last_error().decode())
+        self.instance_file = instance_file
+        self.weights = [self.lib.ihtp_weight(self.handle, i) for i in range(len(SOFT_COMPONENTS))]
+        self.P = self.lib.ihtp_patients(self.handle)
+        self.violations = (ctypes.c_int*len(HARD_COMPONENTS))()
+        self.costs = (ctypes.c_int*len(SOFT_COMPONENTS))()
+
+    def close(self):
+        if self.handle:
+            self.lib.ihtp_free(self.handle)
+            self.handle = None
+
+    def __del__(self):
+        if getattr(self, "handle", None):
+            self.close()
+
+    def __getstate__(self):
+        # the library handle is not sent to other processes: they load the instance again
+        return {"instance_file": self.instance_file}
+
+    def __setstate__(self, state):
+        self.__init__(state["instance_file"])
+
+    def record(self, status):
+        if status != 0:
+            return {"error": self.lib.ihtp_last_error().decode()}
+        violations = dict(zip(HARD_COMPONENTS, self.violations))
+        costs = dict(zip(SOFT_COMPONENTS, self.costs))
+        total_violations, total_cost = totals(violations, costs, self.weights)
+        return {
+            "violations": violations,
+            "costs": costs,
+            "weighted_costs": {c: costs[c]*w for c, w in zip(SOFT_COMPONENTS, self.weights)},
+            "total_violations": total_violations,
+            "total_cost": total_cost
+        }
+
+    def evaluate_solution(self, solution):
+        # solution: a solution as produced by Chromosome.to_json, or the text of a solution file
+        text = solution if isinstance(solution, (str, bytes)) else json.dumps(solution)
+        if isinstance(text, str):
+            text = text.encode()
+        return self.record(self.lib.ihtp_evaluate_json(self.handle, text, self.violations, self.costs))
+
+    def evaluate_file(self, solution_file):
+        with open(solution_file, "rb") as f:
+            return self.evaluate_solution(f.read())
+
+    def evaluate(self, chromosome):
+        # It scores a chromosome from its objects, through integer arrays (positions of the instance file,
+        # as in Chromosome.index_maps). The nurses are passed in the order of the solution files (by id).
+        index_maps = chromosome.index_maps
+        admission_day = (ctypes.c_int*self.P)(*([-1]*self.P))
+        room = (ctypes.c_int*self.P)()
+        operating_theater = (ctypes.c_int*self.P)()
+        for patient in chromosome.patients:
+            if patient.admission_day is not None:
+                p = index_maps["patient"][patient.id]
+                admission_day[p] = patient.admission_day
+                room[p] = index_maps["room"][patient.room.id]
+                operating_theater[p] = index_maps["ot"][patient.operating_theater.id]
+        nurse_rooms = []
+        for nurse in sorted(chromosome.nurses, key=lambda n: n.id):
+            n = index_maps["nurse"][nurse.id]
+            for s in sorted(nurse.assigned_room):
+                if nurse.working_shifts[s] > 0: # only the working shifts are written by Nurse.to_dict
+                    for r in sorted(index_maps["room"][r.id] for r in nurse.assigned_room[s]):
+                        nurse_rooms += (n, s, r)
+        status = self.lib.ihtp_evaluate_arrays(self.handle, admission_day, room, operating_theater,
+                                               (ctypes.c_int*len(nurse_rooms))(*nurse_rooms), len(nurse_rooms) // 3,
+                                               self.violations, self.costs)
+        return self.record(status)
+
+    def format_report(self, record):
+        # Text report with the same layout of the validator output
+        if "error" in record:
+            return record["error"]
+        return format_report(record["violations"], record["costs"], self.weights)
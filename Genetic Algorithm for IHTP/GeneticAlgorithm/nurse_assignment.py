@@ -0,0 +1,101 @@
+import random
+from evaluator import SOFT_COMPONENTS
+
+
+class NurseAssignment:
+    # Nurses of one shift assigned as a bin packing of the occupied rooms (by workload) into the nurses (by
+    # max_load), against the weighted RoomSkillLevel, ExcessiveNurseWorkload and ContinuityOfCare costs.
+    def __init__(self, improvement_passes=1):
+        self.improvement_passes = improvement_passes
+
+    def assign(self, ch):
+        # It solves every shift of the chromosome, returning False if an occupied room cannot be covered
+        for s in range(ch.coverage.shifts):
+            if not self.solve_shift(ch, s):
+                return False
+        return True
+
+    def mutate(self, ch, probability):
+        # It solves again each shift with occupied rooms with the given probability. It returns True if
+        # at least one shift has been solved.
+        occupied = ch.feasibility.occupied_mask
+        shifts = [s for s in range(ch.coverage.shifts) if occupied[s//3] != 0 and random.random() < probability]
+        for s in shifts:
+            self.solve_shift(ch, s)
+        return len(shifts) > 0
+
+    def weights(self, ch):
+        if ch.evaluator is None:
+            return 1, 1, 1
+        return tuple(ch.evaluator.weights[SOFT_COMPONENTS.index(c)]
+                     for c in ("RoomSkillLevel", "ExcessiveNurseWorkload", "ContinuityOfCare"))
+
+    def clear_shift(self, ch, s, nurses):
+        for nurse in nurses:
+            for room in nurse.assigned_room.pop(s, ()):
+                room.remove_nurse(s)
+        for room in ch.rooms:
+            if room.schedule_nurses[s] != '':
+                room.remove_nurse(s)
+
+    def solve_shift(self, ch, s):
+        # With the DeltaCost tracker, the previous assignment of the shift is kept if the new one costs more
+        coverage = ch.coverage
+        nurses = [ch.nurses[n] for n in coverage.working[s]]
+        tracker = ch.tracker
+        if tracker is not None:
+            previous = [(room, room.schedule_nurses[s]) for room in ch.rooms if room.schedule_nurses[s] != '']
+            previous_cost = tracker.total()
+        self.clear_shift(ch, s, nurses)
+        rooms = coverage.uncovered_rooms(s) # now all the occupied rooms
+        if len(rooms) == 0:
+            return True
+        if len(nurses) == 0:
+            return False
+        w_skill, w_workload, w_continuity = self.weights(ch)
+        demands = [coverage.room_demand(room, s) for room in rooms]
+        # people of each room and nurses caring for each of them in the other shifts
+        if tracker is not None and w_continuity > 0:
+            ev = tracker.evaluator
+            people = [tracker.room_day_list[ev.room_index[room.id]][s//3] for room in rooms]
+            nurse_index = [ev.nurse_index[nurse.id] for nurse in nurses]
+        else:
+            people = None
+
+        def cost(i, j, load):
+            workload, skills = demands[j]
+            max_load = nurses[i].working_shifts[s]
+            c = w_skill*sum(max(0, skill - nurses[i].skill_level) for skill in skills)
+            c += w_workload*(max(0, load + workload - max_load) - max(0, load - max_load))
+            if people is not None:
+                n = nurse_index[i]
+                c += w_continuity*sum(1 for p in people[j] if n not in tracker.person_nurses[p])
+            return c
+
+        def best_nurse(j, loads):
+            costs = [cost(i, j, load) for i, load in enumerate(loads)]
+            best_cost = min(costs)
+            return random.choice([i for i, c in enumerate(costs) if c == best_cost])
+
+        loads = [0]*len(nurses)
+        assignment = [None]*len(rooms)
+        order = sorted(range(len(rooms)), key=lambda j: (-demands[j][0], random.random()))
+        for j in order:
+            assignment[j] = best_nurse(j, loads)
+            loads[assignment[j]] += demands[j][0]
+        for _ in range(self.improvement_passes):
+            for j in order:
+                loads[assignment[j]] -= demands[j][0]
+                assignment[j] = best_nurse(j, loads)
+                loads[assignment[j]] += demands[j][0]
+        for j, room in enumerate(rooms):
+            nurse = nurses[assignment[j]]
+            room.assign_nurse(nurse, s)
+            nurse.assigned_room[s].append(room)
+        if tracker is not None and tracker.total() > previous_cost:
+            self.clear_shift(ch, s, nurses)
+            for room, nurse_id in previous:
+                nurse = ch.nurses[ch.index_maps["nurse"][nurse_id]]
+                room.assign_nurse(nurse, s)
+                nurse.assigned_room[s].append(room)
+        return True
@@ -0,0 +1,55 @@
+from constructive import ConstructiveInitializer
+from local_search import LocalSearch
+from nurse_assignment import NurseAssignment
+from ot_packing import OTPacking
+from repair import OffspringRepair
+from selection import TruncationSelection, TournamentSelection, SteadyStateReplacement
+
+SELECTION_STRATEGIES = {"truncation": TruncationSelection, "tournament": TournamentSelection, "steady-state": SteadyStateReplacement}
+
+# Settings shared by main.py and benchmark.py. The defaults reproduce the original GA.
+DEFAULT_SETTINGS = {
+    "num_workers": 1, # processes used to evaluate the offspring (1 = sequential evolution)
+    "local_search_time": 0, # seconds of local search per era (0 = no local search)
+    "optimize_nurses": False, # NurseAssignment instead of the random nurse assignment
+    "pack_ots": False, # OTPacking of the surgeries of each day
+    "constructive": False, # ConstructiveInitializer instead of random_initialize
+    "repair_offspring": False, # OffspringRepair of the children with hard violations instead of rejecting them
+    "selection": "truncation" # key of SELECTION_STRATEGIES
+}
+
+
+class GAOptions:
+    # Optional components of a GeneticAlgorithm (None = disabled)
+    def __init__(self, num_workers=1, local_search=None, termination=None, checkpoint=None, instrumentation=None,
+                 initializer=None, nurse_assignment=None, selection_strategy=None, repair=None, ot_packing=None):
+        self.num_workers = num_workers
+        self.local_search = local_search
+        self.termination = termination
+        self.checkpoint = checkpoint
+        self.instrumentation = instrumentation
+        self.initializer = initializer
+        self.nurse_assignment = nurse_assignment
+        self.selection_strategy = selection_strategy
+        self.repair = repair
+        self.ot_packing = ot_packing
+
+    @classmethod
+    def from_settings(cls, **settings):
+        # Components built from DEFAULT_SETTINGS, overridden by settings. The run-specific ones
+        # (termination, checkpoint, instrumentation) are set afterwards.
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if len(unknown) > 0:
+            raise ValueError(f"Unknown settings: {sorted(unknown)}")
+        s = dict(DEFAULT_SETTINGS, **settings)
+        nurse_assignment = NurseAssignment() if s["optimize_nurses"] else None
+        ot_packing = OTPacking() if s["pack_ots"] else None
+        return cls(
+            num_workers=s["num_workers"],
+            local_search=LocalSearch(time_budget=s["local_search_time"]) if s["local_search_time"] > 0 else None,
+            initializer=ConstructiveInitializer(nurse_assignment=nurse_assignment, ot_packing=ot_packing) if s["constructive"] else None,
+            nurse_assignment=nurse_assignment,
+            selection_strategy=SELECTION_STRATEGIES[s["selection"]](),
+            repair=OffspringRepair() if s["repair_offspring"] else None,
+            ot_packing=ot_packing
+        )
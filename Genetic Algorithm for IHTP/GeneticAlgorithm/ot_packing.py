@@ -0,0 +1,99 @@
+import random
+from evaluator import SOFT_COMPONENTS
+
+
+class OTPacking:
+    # Surgeries of one day packed by surgeon into the operating theaters, against OpenOperatingTheater and
+    # SurgeonTransfer. The new theaters are kept only if they do not cost more.
+    def weights(self, ch):
+        if ch.evaluator is None:
+            return 1, 1
+        return tuple(ch.evaluator.weights[SOFT_COMPONENTS.index(c)] for c in ("OpenOperatingTheater", "SurgeonTransfer"))
+
+    def surgeries(self, ch):
+        # scheduled patients of each day
+        days = [[] for _ in range(ch.D)]
+        for patient in ch.patients:
+            if patient.admission_day is not None:
+                days[patient.admission_day].append(patient)
+        return days
+
+    def pack(self, ch):
+        # It packs the surgeries of every day, returning the number of days changed
+        return sum(1 for day, patients in enumerate(self.surgeries(ch)) if self.solve_day(ch, day, patients))
+
+    def mutate(self, ch, probability):
+        # It packs again each day with surgeries with the given probability. It returns True if at least
+        # one day has changed.
+        changed = False
+        for day, patients in enumerate(self.surgeries(ch)):
+            if len(patients) > 0 and random.random() < probability:
+                changed = self.solve_day(ch, day, patients) or changed
+        return changed
+
+    def cost(self, ch, assignment):
+        # weighted OpenOperatingTheater and SurgeonTransfer costs of an assignment patient -> theater
+        w_open, w_transfer = self.weights(ch)
+        surgeon_ots = {}
+        for patient, ot in assignment.items():
+            surgeon_ots.setdefault(patient.surgeon, set()).add(ot)
+        transfers = sum(len(ots)-1 for ots in surgeon_ots.values())
+        return w_open*len(set(assignment.values())) + w_transfer*transfers
+
+    def solve_day(self, ch, day, patients):
+        # It returns True if the theaters of the day have changed
+        if len(patients) == 0:
+            return False
+        current = {p: p.operating_theater for p in patients}
+        assignment = self.packing(ch, day, patients)
+        if assignment is None or assignment == current or self.cost(ch, assignment) > self.cost(ch, current):
+            return False
+        for patient, ot in assignment.items():
+            if ot is not patient.operating_theater:
+                patient.operating_theater.unschedule_patient(patient)
+                patient.operating_theater = ot
+                ot.schedule_patient(patient)
+        return True
+
+    def packing(self, ch, day, patients):
+        # patient -> theater, or None if a surgery does not fit anywhere
+        left = {ot: ot.daily_availability[day] for ot in ch.ots}
+        for patient in patients:
+            left[patient.operating_theater] += patient.surgery_duration
+        groups = {}
+        for patient in patients:
+            groups.setdefault(patient.surgeon, []).append(patient)
+        order = sorted(groups.values(), key=lambda g: (-sum(p.surgery_duration for p in g), random.random()))
+        assignment = {}
+        opened = set()
+
+        def choose(candidates, duration):
+            fits = [ot for ot in candidates if left[ot] >= duration]
+            if len(fits) == 0:
+                return None
+            return min(fits, key=lambda ot: left[ot])
+
+        def schedule(patient, ot):
+            assignment[patient] = ot
+            left[ot] -= patient.surgery_duration
+            opened.add(ot)
+
+        for group in order:
+            duration = sum(p.surgery_duration for p in group)
+            ot = choose(opened, duration)
+            if ot is None:
+                ot = max((ot for ot in ch.ots if ot not in opened and left[ot] >= duration), key=lambda ot: left[ot], default=None)
+            if ot is not None:
+                for patient in group:
+                    schedule(patient, ot)
+                continue
+            used = set()
+            for patient in sorted(group, key=lambda p: -p.surgery_duration):
+                ot = choose(used, patient.surgery_duration) or choose(opened, patient.surgery_duration)
+                if ot is None:
+                    ot = max((ot for ot in ch.ots if left[ot] >= patient.surgery_duration), key=lambda ot: left[ot], default=None)
+                if ot is None:
+                    return None
+                schedule(patient, ot)
+                used.add(ot)
+        return assignment
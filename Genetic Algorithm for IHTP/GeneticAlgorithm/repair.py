@@ -0,0 +1,160 @@
+import random
+from collections import Counter
+from evaluator import HARD_COMPONENTS
+from hospital.occupant import Occupant
+
+ROOM_COMPONENTS = ("RoomCapacity", "RoomGenderMix", "PatientRoomCompatibility")
+
+
+class OffspringRepair:
+    # Repair of a child with hard violations: only the patients causing the violated constraints are moved.
+    # A child needing more than max_moves moves, or with a mandatory patient left out, is rejected.
+    def __init__(self, max_moves=20):
+        self.max_moves = max_moves
+        self.repaired = 0
+        self.rejected = 0
+
+    def report(self):
+        report = f"Repair: {self.repaired} repaired, {self.rejected} rejected"
+        self.repaired = 0
+        self.rejected = 0
+        return report
+
+    def count(self, repaired):
+        # The outcome of each repair is counted by the GA, since the repairs may run in the worker processes
+        if repaired:
+            self.repaired += 1
+        else:
+            self.rejected += 1
+
+    def violations(self, ch):
+        # hard constraints violated by the child, as scored by its last compute_cost
+        if ch.tracker is None:
+            return set(HARD_COMPONENTS)
+        return {c for c, v in ch.tracker.components()[0].items() if v > 0}
+
+    def repair(self, ch):
+        # It returns False if the child cannot be repaired; otherwise the child must be scored again
+        violations = self.violations(ch)
+        self.moves = 0
+        if "MandatoryUnscheduledPatients" in violations or "AdmissionDay" in violations:
+            for patient in ch.patients:
+                if patient.admission_day is None and patient.mandatory:
+                    if not self.place(patient):
+                        return False
+                elif patient.admission_day is not None and not self.in_window(patient):
+                    if not self.move_to_other_day(patient):
+                        return False
+        if "SurgeonOvertime" in violations:
+            if not self.repair_surgeons(ch):
+                return False
+        if "OperatingTheaterOvertime" in violations:
+            if not self.repair_ots(ch):
+                return False
+        if any(c in violations for c in ROOM_COMPONENTS):
+            if not self.repair_rooms(ch):
+                return False
+        return ch.fix_uncovered_rooms() != False
+
+    def in_window(self, patient):
+        last_day = patient.surgery_due_day if patient.mandatory else patient.D-1
+        return patient.surgery_release_day <= patient.admission_day <= last_day
+
+    # Moves -----------------------------------------------------------------------------------------------
+
+    def place(self, patient):
+        # It schedules an unscheduled patient on a random feasible day, returning False if a mandatory
+        # patient cannot be placed or if the child needs too many moves
+        self.moves += 1
+        if self.moves > self.max_moves:
+            return False
+        return patient.initialize_patient(assign_prob=1.0) or not patient.mandatory
+
+    def move_to_other_day(self, patient):
+        patient.room.remove_patient(patient)
+        patient.operating_theater.unschedule_patient(patient)
+        patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+        patient.admission_day = None
+        patient.room = None
+        patient.operating_theater = None
+        return self.place(patient)
+
+    def move_to_other_room(self, patient):
+        # another compatible room on the same day, otherwise another day
+        patient.room.remove_patient(patient)
+        if len(patient.find_compatible_rooms(None)) > 0:
+            self.moves += 1
+            patient.assign_room_to_patient(None)
+            return self.moves <= self.max_moves
+        patient.room = None
+        patient.operating_theater.unschedule_patient(patient)
+        patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+        patient.admission_day = None
+        patient.operating_theater = None
+        return self.place(patient)
+
+    def move_to_other_ot(self, patient):
+        # another operating theater with enough time on the same day, otherwise another day
+        patient.operating_theater.unschedule_patient(patient)
+        if len(patient.find_compatible_ots(None)) > 0:
+            self.moves += 1
+            patient.assign_ot_to_patient(None)
+            return self.moves <= self.max_moves
+        patient.operating_theater = None
+        patient.room.remove_patient(patient)
+        patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+        patient.admission_day = None
+        patient.room = None
+        return self.place(patient)
+
+    # Constraints -----------------------------------------------------------------------------------------
+
+    def move_order(self, patients):
+        # the non mandatory patients first, in random order
+        return sorted(patients, key=lambda p: (p.mandatory, random.random()))
+
+    def repair_surgeons(self, ch):
+        for patient in self.move_order(ch.patients):
+            day = patient.admission_day
+            if day is not None and patient.surgeon.max_surgery_time[day] < 0:
+                if not self.move_to_other_day(patient):
+                    return False
+        return True
+
+    def repair_ots(self, ch):
+        for patient in self.move_order(ch.patients):
+            day = patient.admission_day
+            if day is not None and patient.operating_theater.daily_availability[day] < 0:
+                if not self.move_to_other_ot(patient):
+                    return False
+        return True
+
+    def repair_rooms(self, ch):
+        for room in ch.rooms:
+            for day in range(ch.D):
+                for patient in self.room_day_excess(room, day):
+                    if not self.move_to_other_room(patient):
+                        return False
+        return True
+
+    def room_day_excess(self, room, day):
+        # patients to move out of the room on the day so that it is compatible with all of them, has
+        # a single gender and is not over capacity
+        people = room.schedule_patients[day]
+        movable = [p for p in people if not isinstance(p, Occupant)]
+        if len(movable) == 0:
+            return []
+        excess = [p for p in movable if room.id in p.incompatible_room_ids]
+        genders = Counter(p.gender for p in people if p not in excess)
+        if len(genders) > 1:
+            occupant_genders = [p.gender for p in people if isinstance(p, Occupant)]
+            if len(occupant_genders) > 0:
+                gender = occupant_genders[0]
+            else:
+                gender = max(genders, key=lambda g: (genders[g], random.random()))
+            excess += [p for p in movable if p.gender != gender and p not in excess]
+        staying = self.move_order([p for p in movable if p not in excess])
+        over_capacity = len(people) - len(excess) - room.capacity
+        if over_capacity > 0:
+            excess += staying[:over_capacity]
+        return excess
@@ -0,0 +1,92 @@
+import heapq
+import random
+
+
+def cost(ch):
+    return ch.total_cost[1]
+
+
+class TruncationSelection:
+    # The best fraction of the population breeds and survives (the original selection of the GA).
+    steady_state = False
+
+    def __init__(self, fraction=0.4):
+        self.fraction = fraction
+
+    def num_parents(self, population_size):
+        return max(2, int(self.fraction*population_size))
+
+    def parents(self, population):
+        # parents sorted by cost, as expected by LocalSearch.improve_population
+        return sorted(population, key=cost)[:self.num_parents(len(population))]
+
+
+class TournamentSelection(TruncationSelection):
+    # The best num_elites chromosomes and the winners of tournaments among tournament_size chromosomes breed.
+    def __init__(self, fraction=0.4, tournament_size=3, num_elites=1):
+        super().__init__(fraction)
+        self.tournament_size = tournament_size
+        self.num_elites = num_elites
+
+    def parents(self, population):
+        num_parents = self.num_parents(len(population))
+        elites = heapq.nsmallest(min(self.num_elites, num_parents), population, key=cost)
+        chosen = set(id(ch) for ch in elites)
+        candidates = [ch for ch in population if id(ch) not in chosen]
+        winners = []
+        while len(elites)+len(winners) < num_parents and len(candidates) > 0:
+            winner = min((random.randrange(len(candidates)) for _ in range(self.tournament_size)),
+                         key=lambda i: cost(candidates[i]))
+            winners.append(candidates[winner])
+            # the winner is removed in O(1), moving the last candidate in its place
+            candidates[winner] = candidates[-1]
+            candidates.pop()
+        # only the parents are sorted (the elites already are), as expected by LocalSearch.improve_population
+        winners.sort(key=cost)
+        return elites + winners
+
+
+class SteadyStateReplacement(TruncationSelection):
+    # No generations: each feasible child replaces the worst chromosome of the sorted population if it is
+    # better and new. The parents are chosen by tournament.
+    steady_state = True
+
+    def __init__(self, fraction=0.4, tournament_size=2):
+        super().__init__(fraction)
+        self.tournament_size = tournament_size
+
+    def parents(self, population):
+        # All the chromosomes can breed; the population is sorted in place. After the first era the list
+        # is already sorted (or nearly, after local search and injections) and the sort is linear.
+        population.sort(key=cost)
+        return population
+
+    def num_children(self, population_size):
+        return population_size - self.num_parents(population_size)
+
+    def tournament(self, population, excluded=None):
+        # best of tournament_size random chromosomes other than excluded (the population has at least 2)
+        while True:
+            contestants = [ch for ch in random.sample(population, min(self.tournament_size, len(population))) if ch is not excluded]
+            if len(contestants) > 0:
+                return min(contestants, key=cost)
+
+    def replace_worst(self, population, present, child):
+        # It inserts the child in the sorted population in place of the worst chromosome. present is the
+        # set of the schedule hashes of the population, kept up to date. It returns True if the child
+        # has been inserted.
+        if cost(child) >= cost(population[-1]) or child.hasher.value in present:
+            return False
+        present.discard(population.pop().hasher.value)
+        # binary search of the position after the chromosomes with the same cost (bisect.insort accepts a
+        # key only from Python 3.10)
+        low, high = 0, len(population)
+        while low < high:
+            middle = (low+high)//2
+            if cost(child) < cost(population[middle]):
+                high = middle
+            else:
+                low = middle+1
+        population.insert(low, child)
+        present.add(child.hasher.value)
+        return True
@@ -0,0 +1,33 @@
+import time
+from chromosome import Chromosome
+
+
+class Termination:
+    # Stopping criteria checked after every era (None = disabled); a resumed run counts the time and the
+    # evaluations of the previous one. max_stagnation: eras with the same best chromosome
+    def __init__(self, time_limit=None, max_evaluations=None, max_stagnation=None):
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.max_stagnation = max_stagnation
+        self.start_time = None
+        self.start_evaluations = 0
+
+    def start(self, elapsed=0, evaluations=0):
+        self.start_time = time.time() - elapsed
+        self.start_evaluations = Chromosome.evaluations - evaluations
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def evaluations(self):
+        return Chromosome.evaluations - self.start_evaluations
+
+    def stop_reason(self, ga):
+        # It returns the reason to stop the GA, or None if it can continue
+        if self.time_limit is not None and self.elapsed() >= self.time_limit:
+            return f"time limit of {self.time_limit} s reached"
+        if self.max_evaluations is not None and self.evaluations() >= self.max_evaluations:
+            return f"budget of {self.max_evaluations} evaluations reached"
+        if self.max_stagnation is not None and ga.num_times_best >= self.max_stagnation:
+            return f"best chromosome unchanged for {ga.num_times_best} eras"
+        return None
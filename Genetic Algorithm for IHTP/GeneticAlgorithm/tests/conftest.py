@@ -0,0 +1,112 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import pytest
+
+GA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GA_DIR)
+
+from chromosome import Chromosome
+from constructive import ConstructiveInitializer
+from evaluator import CostEvaluator
+from instance import load_instance
+from nurse_assignment import NurseAssignment
+
+
+def make_instance(seed, days=14, num_rooms=6, num_ots=2, num_surgeons=3, num_patients=30, num_occupants=4, num_nurses=10):
+    # Small random instance in the format of the competition, with every hard constraint reachable
+    rnd = random.Random(seed)
+    shift_types = ["early", "late", "night"]
+    age_groups = ["infant", "adult", "elderly"]
+    rooms = [{"id": f"r{i}", "capacity": rnd.choice([2, 3])} for i in range(num_rooms)]
+    ots = [{"id": f"t{i}", "availability": [rnd.choice([0, 480, 600]) for _ in range(days)]} for i in range(num_ots)]
+    surgeons = [{"id": f"s{i}", "max_surgery_time": [rnd.choice([0, 360, 480]) for _ in range(days)]}
+                for i in range(num_surgeons)]
+
+    def person(los):
+        return {"gender": rnd.choice("AB"), "age_group": rnd.choice(age_groups), "length_of_stay": los,
+                "workload_produced": [rnd.randint(1, 3) for _ in range(3*los)],
+                "skill_level_required": [rnd.randint(0, 2) for _ in range(3*los)]}
+
+    occupants = []
+    for i in range(num_occupants):
+        occupant = {"id": f"a{i}", "room_id": f"r{i % num_rooms}"}
+        occupant.update(person(rnd.randint(1, 4)))
+        occupants.append(occupant)
+    patients = []
+    for i in range(num_patients):
+        release_day = rnd.randint(0, days-4)
+        mandatory = rnd.random() < 0.5
+        patient = {"id": f"p{i:02d}", "mandatory": mandatory, "surgery_release_day": release_day,
+                   "surgery_duration": rnd.choice([60, 120, 180]), "surgeon_id": f"s{rnd.randrange(num_surgeons)}",
+                   "incompatible_room_ids": rnd.sample([r["id"] for r in rooms], rnd.randint(0, 2))}
+        patient.update(person(rnd.randint(1, 6)))
+        if mandatory:
+            patient["surgery_due_day"] = min(days-1, release_day+rnd.randint(2, 6))
+        patients.append(patient)
+    nurses = []
+    for i in range(num_nurses):
+        working_shifts = [{"day": d, "shift": s, "max_load": rnd.randint(5, 15)}
+                          for d in range(days) for s in shift_types if rnd.random() < 0.5]
+        nurses.append({"id": f"n{i:02d}", "skill_level": rnd.randint(0, 2), "working_shifts": working_shifts})
+    return {"days": days, "skill_levels": 3, "shift_types": shift_types, "age_groups": age_groups,
+            "weights": {"room_mixed_age": 5, "room_nurse_skill": 1, "continuity_of_care": 1,
+                        "nurse_eccessive_workload": 1, "open_operating_theater": 20, "surgeon_transfer": 5,
+                        "patient_delay": 5, "unscheduled_optional": 10},
+            "occupants": occupants, "patients": patients, "surgeons": surgeons, "operating_theaters": ots,
+            "rooms": rooms, "nurses": nurses}
+
+
+@pytest.fixture
+def instance_file(tmp_path):
+    path = tmp_path / "t01.json"
+    with open(path, "w") as f:
+        json.dump(make_instance(1), f)
+    return str(path)
+
+
+@pytest.fixture
+def instance(instance_file):
+    # The Instance of instance_file, with the in-process evaluator and without fitness cache. The class
+    # attributes of Chromosome are restored afterwards.
+    data, instance = load_instance(instance_file)
+    saved = (Chromosome.evaluator, Chromosome.fitness_cache, Chromosome.evaluations)
+    Chromosome.evaluator = CostEvaluator(data)
+    Chromosome.fitness_cache = None
+    random.seed(1)
+    yield instance
+    Chromosome.evaluator, Chromosome.fitness_cache, Chromosome.evaluations = saved
+
+
+@pytest.fixture
+def population(instance):
+    # chromosomes without hard violations
+    population = ConstructiveInitializer(nurse_assignment=NurseAssignment()).population(6, *instance)
+    assert len(population) == 6
+    return population
+
+
+def build(target, name, tmp_path_factory):
+    # make target of the Makefile, built for this machine in a temporary directory; the tests that need it
+    # are skipped without make or a C++ compiler
+    if shutil.which("make") is None or shutil.which("g++") is None:
+        pytest.skip("make or g++ not available, the validator cannot be built")
+    out = tmp_path_factory.mktemp(target)
+    result = subprocess.run(["make", target, f"OUT={out}"], cwd=GA_DIR, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+    if result.returncode != 0:
+        pytest.skip(f"the validator cannot be built: {result.stdout[-500:]}")
+    return str(out / name)
+
+
+@pytest.fixture(scope="session")
+def validator_binary(tmp_path_factory):
+    return build("validator", "IHTP_Validator_2", tmp_path_factory)
+
+
+@pytest.fixture(scope="session")
+def validator_library(tmp_path_factory):
+    return build("library", "libihtp_validator.so", tmp_path_factory)
@@ -0,0 +1,60 @@
+import csv
+import json
+import random
+import pytest
+from checkpoint import CheckpointWriter, load_checkpoint, population_from_checkpoint
+from chromosome import Chromosome
+from GA import GeneticAlgorithm
+from instrumentation import Instrumentation
+from options import GAOptions
+
+
+def make_ga(population, eras, instance, **options):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    return GeneticAlgorithm(population, eras, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                            report=False, options=GAOptions(**options))
+
+
+def test_checkpoint_round_trip(population, instance, tmp_path):
+    ga = make_ga(population, 3, instance, checkpoint=CheckpointWriter(str(tmp_path), interval=2))
+    ga.evolve() # the last checkpoint is the one saved at the end of the run
+    state = load_checkpoint(str(tmp_path))
+    assert state["era"] == 3
+    with open(tmp_path / "best_solution.json") as f:
+        assert json.load(f) == ga.get_best().to_json()
+
+    restored = population_from_checkpoint(state, *instance)
+    assert [ch.to_json() for ch in restored] == [ch.to_json() for ch in ga.current_population]
+    assert [ch.total_cost for ch in restored] == [ch.total_cost for ch in ga.current_population]
+    for ch in restored:
+        assert Chromosome.evaluator.evaluate(ch) == ch.total_cost
+
+    resumed = make_ga(restored, 5, instance)
+    resumed.restore(state)
+    assert resumed.start_era == 3
+    assert resumed.num_times_best == ga.num_times_best
+    assert (resumed.crossover_probability, resumed.mutation_probability) == (ga.crossover_probability, ga.mutation_probability)
+    assert resumed.best.to_json() == ga.best.to_json()
+    assert random.getstate() == state["random_state"]
+    resumed.evolve()
+    assert resumed.get_best().total_cost <= state["total_costs"][state["best"]]
+
+
+def test_checkpoint_needs_the_evaluator(population, instance, tmp_path):
+    Chromosome.evaluator = None # restored by the instance fixture
+    with pytest.raises(ValueError):
+        make_ga(population, 3, instance, checkpoint=CheckpointWriter(str(tmp_path)))
+
+
+def test_load_checkpoint_without_checkpoint(tmp_path):
+    assert load_checkpoint(str(tmp_path)) is None
+
+
+def test_resumed_statistics_are_appended(population, instance, tmp_path):
+    path = str(tmp_path / "stats.csv")
+    make_ga(population, 2, instance, instrumentation=Instrumentation(path)).evolve()
+    make_ga(population, 2, instance, instrumentation=Instrumentation(path, append=True)).evolve()
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][0] == "era"
+    assert [row[0] for row in rows[1:]] == ["0", "1", "0", "1"]
@@ -0,0 +1,48 @@
+import json
+import random
+from chromosome import Chromosome
+from conftest import make_instance
+from constructive import ConstructiveInitializer
+from evaluator import CostEvaluator
+from instance import load_instance
+from nurse_assignment import NurseAssignment
+
+
+def feasible_chromosomes(instance, initialize, attempts):
+    # chromosomes built by initialize(ch) without hard violations
+    count = 0
+    for _ in range(attempts):
+        ch = Chromosome(*instance)
+        if initialize(ch) is False:
+            continue
+        ch.compute_cost()
+        count += ch.total_cost[0] == 0
+    return count
+
+
+def test_constructive_chromosomes_have_no_hard_violations(instance):
+    for initializer in (ConstructiveInitializer(), ConstructiveInitializer(nurse_assignment=NurseAssignment())):
+        for _ in range(10):
+            ch = Chromosome(*instance)
+            assert initializer.initialize(ch)
+            ch.compute_cost()
+            assert ch.total_cost[0] == 0
+            assert ch.total_cost == Chromosome.evaluator.evaluate(ch)
+        population = initializer.population(6, *instance)
+        assert len(population) == 6
+        assert initializer.failures == 0
+
+
+def test_constructive_beats_random_on_a_tight_instance(tmp_path, monkeypatch):
+    # 45 patients in 4 rooms: the random initialization rarely finds a schedule without hard violations
+    path = tmp_path / "tight.json"
+    with open(path, "w") as f:
+        json.dump(make_instance(3, num_rooms=4, num_patients=45), f)
+    data, instance = load_instance(str(path))
+    monkeypatch.setattr(Chromosome, "evaluator", CostEvaluator(data))
+    monkeypatch.setattr(Chromosome, "fitness_cache", None)
+    monkeypatch.setattr(Chromosome, "evaluations", Chromosome.evaluations)
+    random.seed(1)
+    constructive = feasible_chromosomes(instance, ConstructiveInitializer().initialize, 20)
+    random_initialization = feasible_chromosomes(instance, Chromosome.random_initialize, 20)
+    assert constructive > random_initialization
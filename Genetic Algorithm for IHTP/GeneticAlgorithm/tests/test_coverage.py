@@ -0,0 +1,26 @@
+import random
+from chromosome import random_population
+from GA import GeneticAlgorithm
+
+
+def uncovered_rooms(ch, s):
+    # occupied rooms without a nurse in shift s, computed from the room schedules
+    return [r for r in ch.rooms if len(r.schedule_patients[s//3]) > 0 and r.schedule_nurses[s] == '']
+
+
+def test_index_follows_the_nurse_assignments(instance):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    population = random_population(4, *instance)
+    ga = GeneticAlgorithm(population, 1, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                          mutation_probability=0.3, report=False)
+    for _ in range(10):
+        for child in ga.crossover(*random.sample(population, 2)):
+            ga.mutation(child) # random nurse mutation: rooms are added to and removed from the nurses
+            for s in range(child.coverage.shifts):
+                assert child.coverage.uncovered_rooms(s) == uncovered_rooms(child, s)
+            if child.fix_uncovered_rooms():
+                for s in range(child.coverage.shifts):
+                    assert uncovered_rooms(child, s) == []
+                    assert child.coverage.uncovered_mask(s) == 0
+                child.tracker.total()
+                assert child.tracker.components()[0]["UncoveredRoom"] == 0
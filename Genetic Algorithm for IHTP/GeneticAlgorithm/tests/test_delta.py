@@ -0,0 +1,43 @@
+import copy
+import random
+from chromosome import Chromosome, random_population
+from GA import GeneticAlgorithm
+
+
+def make_ga(population, instance):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    return GeneticAlgorithm(population, 1, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                            mutation_probability=0.3, report=False)
+
+
+def assert_tracker_matches(ch):
+    # the incremental totals and components are the ones of a full evaluation
+    violations, costs = Chromosome.evaluator.evaluate_components(ch)
+    assert ch.tracker.total() == Chromosome.evaluator.totals(violations, costs)
+    assert ch.tracker.components() == (violations, costs)
+
+
+def test_tracker_follows_crossover_and_mutation(instance):
+    population = random_population(6, *instance)
+    ga = make_ga(population, instance)
+    for _ in range(30):
+        child1, child2 = ga.crossover(*random.sample(population, 2))
+        for child in (child1, child2):
+            assert_tracker_matches(child)
+            ga.mutation(child)
+            assert_tracker_matches(child)
+            child.fix_uncovered_rooms()
+            assert_tracker_matches(child)
+        population = population[2:] + [child1, child2]
+
+
+def test_tracker_of_copies_is_independent(instance):
+    ch = random_population(1, *instance)[0]
+    before = ch.tracker.total()
+    ga = make_ga([ch], instance)
+    copied = copy.deepcopy(ch)
+    for _ in range(5):
+        ga.mutation(copied)
+    assert_tracker_matches(copied)
+    assert ch.tracker.total() == before
+    assert_tracker_matches(ch)
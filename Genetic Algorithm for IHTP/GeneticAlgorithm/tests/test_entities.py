@@ -0,0 +1,58 @@
+import copy
+from chromosome import random_population
+
+
+def entity_lists(ch):
+    return [ch.patients, ch.nurses, ch.rooms, ch.surgeons, ch.ots]
+
+
+def assert_static_shared(copied, original):
+    # the instance data are the same objects, the schedule state is copied
+    for entity_copy, entity in zip(copied, original):
+        assert entity_copy is not entity
+        for name in entity.__slots__:
+            if name in entity.STATIC:
+                assert getattr(entity_copy, name) is getattr(entity, name)
+
+
+def test_chromosomes_share_the_instance_data(instance):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    ch1, ch2 = random_population(2, *instance)
+    for ch in (ch1, ch2):
+        for copied, original in zip(entity_lists(ch), [patients, nurses, rooms, surgeons, ots]):
+            assert_static_shared(copied, original)
+        assert ch.occupants is occupants
+    for room1, room2 in zip(ch1.rooms, ch2.rooms):
+        assert room1.schedule_patients is not room2.schedule_patients
+        assert room1.schedule_nurses is not room2.schedule_nurses
+    for surgeon1, surgeon2 in zip(ch1.surgeons, ch2.surgeons):
+        assert surgeon1.max_surgery_time is not surgeon2.max_surgery_time
+
+
+def test_deepcopy_is_independent(instance):
+    ch = random_population(1, *instance)[0]
+    before = ch.to_json()
+    copied = copy.deepcopy(ch)
+    for entities_copy, entities in zip(entity_lists(copied), entity_lists(ch)):
+        assert_static_shared(entities_copy, entities)
+    # the references between the entities point to the copies
+    for patient in copied.patients:
+        if patient.admission_day is not None:
+            assert any(patient.room is room for room in copied.rooms)
+            assert any(patient.surgeon is surgeon for surgeon in copied.surgeons)
+    assert copied.to_json() == before
+
+    for patient in copied.patients:
+        if patient.admission_day is not None:
+            patient.room.remove_patient(patient)
+            patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+            patient.operating_theater.unschedule_patient(patient)
+            patient.admission_day = None
+    for nurse in copied.nurses:
+        for shift, rooms in list(nurse.assigned_room.items()):
+            for room in rooms:
+                room.remove_nurse(shift)
+            nurse.assigned_room[shift] = []
+    assert ch.to_json() == before
+    assert copied.tracker.total() == copied.evaluator.evaluate(copied)
+    assert ch.tracker.total() == ch.evaluator.evaluate(ch)
@@ -0,0 +1,96 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+from chromosome import Chromosome, random_population
+from evaluator import CostEvaluator, check_solutions
+from validator import parse_totals
+
+
+def random_solution(data, rnd):
+    # Solution with arbitrary admissions, so that the hard constraints are violated. The occupied rooms are
+    # covered by a random working nurse in every shift (with an uncovered room the validator reads the
+    # skill level of an undefined nurse), and the other rooms at random.
+    D = data["days"]
+    occupied = [set() for _ in range(D)]
+    for o in data["occupants"]:
+        for d in range(min(o["length_of_stay"], D)):
+            occupied[d].add(o["room_id"])
+    patients = []
+    for p in data["patients"]:
+        if rnd.random() < 0.2:
+            patients.append({"id": p["id"], "admission_day": "none"})
+            continue
+        day, room = rnd.randrange(D), rnd.choice(data["rooms"])["id"]
+        patients.append({"id": p["id"], "admission_day": day, "room": room,
+                         "operating_theater": rnd.choice(data["operating_theaters"])["id"]})
+        for d in range(day, min(day+p["length_of_stay"], D)):
+            occupied[d].add(room)
+    assignments = {n["id"]: {} for n in data["nurses"]}
+    for d in range(D):
+        for shift in data["shift_types"]:
+            working = [n["id"] for n in data["nurses"] if any(s["day"] == d and s["shift"] == shift for s in n["working_shifts"])]
+            for room in data["rooms"]:
+                if len(working) > 0 and (room["id"] in occupied[d] or rnd.random() < 0.2):
+                    assignments[rnd.choice(working)].setdefault((d, shift), []).append(room["id"])
+    nurses = [{"id": n, "assignments": [{"day": d, "shift": shift, "rooms": rooms} for (d, shift), rooms in a.items()]}
+              for n, a in assignments.items()]
+    return {"patients": patients, "nurses": nurses}
+
+
+def run_validator(binary, instance_file, solution, tmp_path):
+    solution_file = tmp_path / "solution.json"
+    with open(solution_file, "w") as f:
+        json.dump(solution, f)
+    output = subprocess.run([binary, instance_file, str(solution_file)], stdout=subprocess.PIPE, text=True).stdout
+    return parse_totals(output)
+
+
+def test_random_solutions_match_the_validator(instance_file, validator_binary, tmp_path):
+    evaluator = CostEvaluator.from_file(instance_file)
+    with open(instance_file) as f:
+        data = json.load(f)
+    rnd = random.Random(2)
+    for _ in range(20):
+        solution = random_solution(data, rnd)
+        expected = run_validator(validator_binary, instance_file, solution, tmp_path)
+        assert evaluator.totals(*evaluator.evaluate_solution(solution)) == expected
+
+
+def test_chromosomes_match_the_validator(instance, instance_file, validator_binary, tmp_path):
+    for ch in random_population(5, *instance):
+        expected = run_validator(validator_binary, instance_file, ch.to_json(), tmp_path)
+        assert ch.total_cost == expected
+        assert Chromosome.evaluator.evaluate(ch) == expected
+
+
+def write_archive(solutions_dir, instance_name, solutions):
+    # the solutions are saved as ch_<violations>_<cost>.json, as in solutions/
+    os.makedirs(solutions_dir / instance_name)
+    for solution, (violations, cost) in solutions:
+        with open(solutions_dir / instance_name / f"ch_{violations}_{cost}.json", "w") as f:
+            json.dump(solution, f)
+
+
+def test_check_solutions(instance, instance_file, validator_binary, tmp_path):
+    instances_dir = tmp_path / "instances"
+    os.makedirs(instances_dir)
+    shutil.copy(instance_file, instances_dir / "i01.json")
+    solutions = []
+    for ch in random_population(3, *instance):
+        solutions.append((ch.to_json(), run_validator(validator_binary, instance_file, ch.to_json(), tmp_path)))
+    write_archive(tmp_path / "solutions", "i01", solutions)
+    assert check_solutions(str(tmp_path / "solutions"), str(instances_dir))
+
+    # a solution saved with the wrong cost is a mismatch
+    solution, (violations, cost) = solutions[0]
+    write_archive(tmp_path / "wrong", "i01", [(solution, (violations, cost+1))])
+    assert not check_solutions(str(tmp_path / "wrong"), str(instances_dir))
+
+
+def test_check_solutions_fails_without_instances(tmp_path):
+    os.makedirs(tmp_path / "solutions" / "i99")
+    with open(tmp_path / "solutions" / "i99" / "ch_0_100.json", "w") as f:
+        json.dump({"patients": [], "nurses": []}, f)
+    assert not check_solutions(str(tmp_path / "solutions"), str(tmp_path))
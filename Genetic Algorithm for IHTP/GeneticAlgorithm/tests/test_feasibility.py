@@ -0,0 +1,39 @@
+import random
+from chromosome import random_population
+from GA import GeneticAlgorithm
+
+
+def compatible_rooms(ch, patient, day):
+    # rooms that can host the patient from day, computed from the room schedules
+    rooms = []
+    for room in ch.rooms:
+        if room.id in patient.incompatible_room_ids:
+            continue
+        stay = range(day, min(day+patient.length_of_stay, ch.D))
+        if all(len(room.schedule_patients[d]) < room.capacity and
+               all(p.gender == patient.gender for p in room.schedule_patients[d]) for d in stay):
+            rooms.append(room)
+    return rooms
+
+
+def assert_index_matches(ch):
+    for d in range(ch.D):
+        occupied = [r for r in ch.rooms if len(r.schedule_patients[d]) > 0]
+        assert [r for r in ch.rooms if ch.feasibility.occupied_mask[d] >> ch.index_maps["room"][r.id] & 1] == occupied
+    for patient in ch.patients:
+        if patient.admission_day is None:
+            for day in range(ch.D):
+                assert ch.feasibility.compatible_rooms(patient, day) == compatible_rooms(ch, patient, day)
+
+
+def test_index_follows_the_room_schedules(instance):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    population = random_population(4, *instance)
+    ga = GeneticAlgorithm(population, 1, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                          mutation_probability=0.3, report=False)
+    for ch in population:
+        assert_index_matches(ch)
+    for _ in range(10):
+        for child in ga.crossover(*random.sample(population, 2)):
+            ga.mutation(child)
+            assert_index_matches(child)
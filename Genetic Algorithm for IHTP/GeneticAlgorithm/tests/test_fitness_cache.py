@@ -0,0 +1,72 @@
+import copy
+import random
+from chromosome import Chromosome, random_population
+from fitness_cache import FitnessCache, ScheduleHash
+from GA import GeneticAlgorithm
+from options import GAOptions
+from repair import OffspringRepair
+
+
+def fresh_hash(ch):
+    # hash recomputed from scratch, on a copy so that the rooms of ch keep their own hasher
+    return ScheduleHash(ch.index_maps, copy.deepcopy(ch)).value
+
+
+def test_hash_follows_crossover_mutation_and_repair(instance):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    population = random_population(4, *instance)
+    ga = GeneticAlgorithm(population, 1, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                          mutation_probability=0.5, report=False, options=GAOptions(repair=OffspringRepair()))
+    for ch in population:
+        assert ch.hasher.value == fresh_hash(ch)
+    for _ in range(20):
+        for child in ga.crossover(*random.sample(population, 2)):
+            assert child.hasher.value == fresh_hash(child)
+            ga.mutation(child)
+            child.fix_uncovered_rooms()
+            assert child.hasher.value == fresh_hash(child)
+            child.compute_cost()
+            ga.repair_child(child)
+            assert child.hasher.value == fresh_hash(child)
+
+
+def test_same_schedule_same_hash(instance):
+    ch = random_population(1, *instance)[0]
+    rebuilt = Chromosome.from_json(ch.to_json(), *instance)
+    assert rebuilt.to_json() == ch.to_json()
+    assert rebuilt.hasher.value == ch.hasher.value
+
+
+def test_cache_hits_and_misses():
+    cache = FitnessCache(max_size=10)
+    assert cache.get(1) is None
+    cache.put(1, (0, 100))
+    assert cache.get(1) == (0, 100)
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.reset_counters()
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_cache_evicts_the_least_recently_used():
+    cache = FitnessCache(max_size=3)
+    for key in (1, 2, 3):
+        cache.put(key, (0, key))
+    cache.get(1) # 2 is now the least recently used
+    cache.put(4, (0, 4))
+    assert list(cache.entries) == [3, 1, 4]
+    assert cache.get(2) is None
+    cache.put(3, (0, 30)) # an update refreshes the entry
+    cache.put(5, (0, 5))
+    assert list(cache.entries) == [4, 3, 5]
+
+
+def test_compute_cost_uses_the_cache(instance):
+    Chromosome.fitness_cache = FitnessCache() # restored by the instance fixture
+    ch = random_population(1, *instance)[0]
+    Chromosome.fitness_cache.reset_counters()
+    copied = copy.deepcopy(ch)
+    evaluations = Chromosome.evaluations
+    copied.compute_cost()
+    assert Chromosome.fitness_cache.hits == 1
+    assert Chromosome.evaluations == evaluations
+    assert copied.total_cost == Chromosome.evaluator.evaluate(copied)
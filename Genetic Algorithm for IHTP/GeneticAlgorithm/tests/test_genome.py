@@ -0,0 +1,54 @@
+import pickle
+import pytest
+from chromosome import Chromosome, random_population
+from genome import Genome
+
+
+def assert_occupancy_matches(genome, ch):
+    ev = genome.evaluator
+    for room in ch.rooms:
+        r = ev.room_index[room.id]
+        assert [genome.room_day_occupancy[r*ev.D+d] for d in range(ev.D)] == [len(ps) for ps in room.schedule_patients]
+
+
+def test_genome_of_a_chromosome(instance):
+    for ch in random_population(4, *instance):
+        genome = Genome.from_chromosome(Chromosome.evaluator, ch)
+        assert genome.to_json() == ch.to_json()
+        assert genome.evaluate() == ch.total_cost
+        assert_occupancy_matches(genome, ch)
+
+
+def test_chromosome_from_genome_round_trip(instance):
+    for ch in random_population(4, *instance):
+        genome = ch.to_genome()
+        # as sent to another process: the evaluator is relinked by from_genome
+        received = pickle.loads(pickle.dumps(genome))
+        assert received.evaluator is None
+        rebuilt = Chromosome.from_genome(received, *instance)
+        rebuilt.compute_cost()
+        assert rebuilt.to_json() == ch.to_json()
+        assert rebuilt.total_cost == ch.total_cost
+        again = rebuilt.to_genome()
+        for key in ("room_day_occupancy", "ot_day_load", "surgeon_day_load", "room_shift_nurse"):
+            assert getattr(again, key) == getattr(genome, key)
+        assert_occupancy_matches(again, rebuilt)
+
+
+def test_copy_is_independent(instance):
+    ch = random_population(1, *instance)[0]
+    genome = ch.to_genome()
+    copied = genome.copy()
+    p = next(p for p in range(genome.evaluator.P) if genome.admission_day[p] != -1)
+    copied.unassign_patient(p)
+    assert copied.admission_day[p] == -1
+    assert genome.to_json() == ch.to_json()
+
+
+def test_genome_needs_the_evaluator(instance):
+    with pytest.raises(ValueError):
+        Genome(None)
+    genome = pickle.loads(pickle.dumps(random_population(1, *instance)[0].to_genome()))
+    Chromosome.evaluator = None # restored by the instance fixture
+    with pytest.raises(ValueError):
+        Chromosome.from_genome(genome, *instance)
@@ -0,0 +1,73 @@
+import pickle
+import pytest
+from chromosome import Chromosome, random_population
+from GA import GeneticAlgorithm
+from islands import IslandModel
+
+
+def make_ga(population, instance):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    return GeneticAlgorithm(population, 1, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                            injections=False, report=False)
+
+
+def migrate(source, destination, num_migrants, instance):
+    # the path of the migrants between two islands: Genome arrays through a multiprocessing queue
+    genomes = pickle.loads(pickle.dumps([ch.to_genome() for ch in source.emigrants(num_migrants)]))
+    migrants = [Chromosome.from_genome(genome, *instance) for genome in genomes]
+    for ch in migrants:
+        ch.compute_cost()
+    destination.immigrate(migrants)
+    return migrants
+
+
+def entities(ch):
+    return {id(e) for group in (ch.patients, ch.nurses, ch.rooms, ch.surgeons, ch.ots) for e in group}
+
+
+def test_migrants_are_copies(instance):
+    source = make_ga(random_population(6, *instance), instance)
+    destination = make_ga(random_population(6, *instance), instance)
+    emigrants = source.emigrants(2)
+    feasible = [ch.total_cost[1] for ch in source.current_population if ch.total_cost[0] == 0]
+    assert [ch.total_cost[1] for ch in emigrants] == sorted(feasible)[:2]
+    worst_before = max(ch.total_cost[1] for ch in destination.current_population)
+    migrants = migrate(source, destination, 2, instance)
+    assert len(destination.current_population) == 6
+    assert len(source.current_population) == 6
+    for migrant, original in zip(migrants, emigrants):
+        assert migrant.to_json() == original.to_json()
+        assert migrant.total_cost == original.total_cost
+        assert entities(migrant).isdisjoint(entities(original))
+    source_entities = set().union(*(entities(ch) for ch in source.current_population))
+    for ch in destination.current_population:
+        assert ch not in source.current_population
+        assert entities(ch).isdisjoint(source_entities)
+    if any(m.total_cost[1] < worst_before for m in migrants):
+        assert max(ch.total_cost[1] for ch in destination.current_population) <= worst_before
+
+
+def test_immigrate_discards_known_schedules(instance):
+    ga = make_ga(random_population(6, *instance), instance)
+    before = [ch.to_json() for ch in ga.current_population]
+    migrate(ga, ga, 3, instance) # the migrants are already in the population
+    assert [ch.to_json() for ch in ga.current_population] == before
+
+
+def test_island_model(instance):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    model = IslandModel(3, 6, 4, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                        migration_interval=2)
+    best = model.evolve()
+    assert len(model.results) == 3
+    assert all(total_cost[0] == 0 for total_cost in model.results)
+    assert best.total_cost == min(model.results, key=lambda c: c[1])
+    assert best.total_cost == Chromosome.evaluator.evaluate(best)
+
+
+def test_island_model_needs_the_evaluator(instance):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    Chromosome.evaluator = None # restored by the instance fixture
+    model = IslandModel(2, 6, 4, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D)
+    with pytest.raises(ValueError):
+        model.evolve()
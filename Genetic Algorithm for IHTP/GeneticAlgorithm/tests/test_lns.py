@@ -0,0 +1,28 @@
+from chromosome import Chromosome
+from lns import LargeNeighbourhoodSearch
+from termination import Termination
+
+
+def test_solve_returns_a_better_copy(population):
+    start = min(population, key=lambda ch: ch.total_cost)
+    before = (start.to_json(), start.total_cost)
+    for insertion in ("greedy", "regret"):
+        lns = LargeNeighbourhoodSearch(time_limit=1.0, insertion=insertion)
+        best = lns.solve(start)
+        assert lns.iterations > 0
+        assert best.total_cost == Chromosome.evaluator.evaluate(best)
+        assert best.total_cost <= start.total_cost
+        assert (start.to_json(), start.total_cost) == before
+        assert [c for _, c in lns.history] == sorted((c for _, c in lns.history), reverse=True)
+
+
+def test_stagnation_counts_the_iterations_since_the_last_improvement(population):
+    lns = LargeNeighbourhoodSearch(time_limit=600.0)
+    lns.solve(population[0], termination=Termination(max_stagnation=5))
+    assert lns.num_times_best == 5
+    assert lns.iterations == lns.last_improvement + 5
+    # a second run on the same object starts counting again
+    lns.solve(population[1], termination=Termination(max_stagnation=3))
+    assert lns.num_times_best == 3
+    lns.report()
+    assert lns.num_times_best == 0
@@ -0,0 +1,65 @@
+import copy
+import random
+from chromosome import Chromosome
+from local_search import LocalSearch
+
+
+def room_violations(ch):
+    ch.tracker.total() # the totals are brought up to date by total()
+    totals = ch.tracker.totals
+    return (totals["RoomGenderMix"], totals["RoomCapacity"], totals["PatientRoomCompatibility"])
+
+
+def test_accepted_moves_never_raise_the_cost(population):
+    ls = LocalSearch()
+    for start in population[:3]:
+        ch = copy.deepcopy(start)
+        ls.scheduled = [p for p in ch.patients if p.admission_day is not None]
+        current = ch.tracker.total()
+        for _ in range(500):
+            undo = random.choice(ls.neighbourhoods)(ch)
+            if undo is None:
+                continue
+            cost = ch.tracker.total()
+            if ls.accept(current, cost, 0):
+                assert cost <= current
+                current = cost
+            else:
+                undo()
+        assert current <= start.total_cost
+        assert current == Chromosome.evaluator.evaluate(ch)
+
+
+def test_rejected_moves_are_undone_exactly(population):
+    ls = LocalSearch()
+    ch = copy.deepcopy(population[0])
+    ls.scheduled = [p for p in ch.patients if p.admission_day is not None]
+    for _ in range(300):
+        before = (ch.to_json(), ch.hasher.value, ch.tracker.total())
+        undo = random.choice(ls.neighbourhoods)(ch)
+        if undo is None:
+            assert (ch.to_json(), ch.hasher.value, ch.tracker.total()) == before
+            continue
+        undo()
+        assert (ch.to_json(), ch.hasher.value, ch.tracker.total()) == before
+    assert ch.tracker.total() == Chromosome.evaluator.evaluate(ch)
+
+
+def test_patient_moves_respect_the_rooms(population):
+    ls = LocalSearch()
+    for start in population[:3]:
+        ch = copy.deepcopy(start)
+        ls.scheduled = [p for p in ch.patients if p.admission_day is not None]
+        assert room_violations(ch) == (0, 0, 0)
+        for _ in range(300):
+            undo = random.choice((ls.move_day, ls.swap_rooms))(ch)
+            if undo is not None:
+                assert room_violations(ch) == (0, 0, 0)
+
+
+def test_improve_keeps_the_cost_consistent(population):
+    ls = LocalSearch(time_budget=0.3)
+    improved = ls.improve_population(sorted(population, key=lambda ch: ch.total_cost))
+    for ch in improved:
+        assert ch.total_cost == Chromosome.evaluator.evaluate(ch)
+    assert ls.accepted + ls.rejected > 0
@@ -0,0 +1,43 @@
+import json
+import random
+import pytest
+import native_validator
+from chromosome import Chromosome, random_population
+from evaluator import CostEvaluator, record_totals
+from test_evaluator import random_solution
+
+
+@pytest.fixture
+def native(instance_file, validator_library, monkeypatch):
+    # NativeValidator of the library built by the Makefile; the library loaded by native_validator is
+    # forgotten afterwards, so that the other tests keep using the validator executable
+    monkeypatch.setattr(native_validator, "_library", None)
+    validator = native_validator.NativeValidator(instance_file, library=validator_library)
+    yield validator
+    validator.close()
+
+
+def test_chromosomes_match_the_evaluator(instance, population, native):
+    for ch in random_population(4, *instance) + population:
+        violations, costs = Chromosome.evaluator.evaluate_components(ch)
+        record = native.evaluate(ch)
+        assert record["violations"] == violations
+        assert record["costs"] == costs
+        assert record_totals(record) == Chromosome.evaluator.evaluate(ch) == ch.total_cost
+        assert record_totals(native.evaluate_solution(ch.to_json())) == ch.total_cost
+
+
+def test_infeasible_solutions_match_the_evaluator(instance_file, native):
+    evaluator = CostEvaluator.from_file(instance_file)
+    with open(instance_file) as f:
+        data = json.load(f)
+    rnd = random.Random(2)
+    for _ in range(20):
+        solution = random_solution(data, rnd)
+        assert record_totals(native.evaluate_solution(solution)) == evaluator.totals(*evaluator.evaluate_solution(solution))
+
+
+def test_missing_library(instance_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(native_validator, "_library", None)
+    with pytest.raises(FileNotFoundError):
+        native_validator.NativeValidator(instance_file, library=str(tmp_path / "libihtp_validator.so"))
@@ -0,0 +1,52 @@
+import copy
+from chromosome import Chromosome, random_population
+from evaluator import SOFT_COMPONENTS
+from nurse_assignment import NurseAssignment
+
+
+def nurse_cost(ch):
+    # weighted RoomSkillLevel, ExcessiveNurseWorkload and ContinuityOfCare costs
+    ch.tracker.total() # the totals are brought up to date by total()
+    weights = Chromosome.evaluator.weights
+    return sum(weights[SOFT_COMPONENTS.index(c)]*ch.tracker.totals[c]
+               for c in ("RoomSkillLevel", "ExcessiveNurseWorkload", "ContinuityOfCare"))
+
+
+def assert_covered(ch):
+    for room in ch.rooms:
+        for s in range(len(room.schedule_nurses)):
+            if len(room.schedule_patients[s//3]) == 0:
+                continue
+            nurse = ch.nurses[ch.index_maps["nurse"][room.schedule_nurses[s]]]
+            assert nurse.working_shifts[s] > 0
+            assert room in nurse.assigned_room[s]
+
+
+def test_assignment_never_raises_the_nurse_costs(instance):
+    nurse_assignment = NurseAssignment()
+    for ch in random_population(5, *instance):
+        assigned = copy.deepcopy(ch)
+        assert nurse_assignment.assign(assigned)
+        assert nurse_cost(assigned) <= nurse_cost(ch)
+        for s in range(ch.coverage.shifts):
+            before = nurse_cost(ch)
+            nurse_assignment.solve_shift(ch, s)
+            assert nurse_cost(ch) <= before
+
+
+def test_occupied_room_shifts_are_covered(instance):
+    nurse_assignment = NurseAssignment()
+    for ch in random_population(5, *instance):
+        assert nurse_assignment.assign(ch)
+        assert_covered(ch)
+        nurse_assignment.mutate(ch, 0.5)
+        assert_covered(ch)
+        assert ch.tracker.total() == Chromosome.evaluator.evaluate(ch)
+        assert ch.tracker.total()[0] == 0
+
+
+def test_empty_shifts_are_assigned(population):
+    # the constructive initializer starts from rooms without nurses
+    for ch in population:
+        assert_covered(ch)
+        assert ch.total_cost[0] == 0
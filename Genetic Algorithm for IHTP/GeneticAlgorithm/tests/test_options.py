@@ -0,0 +1,34 @@
+import pytest
+from benchmark import parse_arguments, settings
+from options import DEFAULT_SETTINGS, GAOptions
+from selection import SteadyStateReplacement, TruncationSelection
+
+
+def test_default_settings_disable_every_component():
+    options = GAOptions.from_settings()
+    assert options.num_workers == 1
+    assert isinstance(options.selection_strategy, TruncationSelection)
+    for name in ("local_search", "termination", "checkpoint", "instrumentation", "initializer", "nurse_assignment",
+                 "repair", "ot_packing"):
+        assert getattr(options, name) is None
+
+
+def test_settings_enable_the_components():
+    options = GAOptions.from_settings(local_search_time=0.5, optimize_nurses=True, pack_ots=True, constructive=True,
+                                      repair_offspring=True, selection="steady-state")
+    assert options.local_search.time_budget == 0.5
+    assert options.initializer.nurse_assignment is options.nurse_assignment
+    assert options.initializer.ot_packing is options.ot_packing
+    assert options.repair is not None
+    assert isinstance(options.selection_strategy, SteadyStateReplacement)
+
+
+def test_unknown_setting():
+    with pytest.raises(ValueError):
+        GAOptions.from_settings(optimise_nurses=True)
+
+
+def test_benchmark_defaults_are_the_default_settings():
+    assert settings(parse_arguments([])) == DEFAULT_SETTINGS
+    assert settings(parse_arguments(["--nurses", "optimized", "--infeasible", "repair"])) \
+        == dict(DEFAULT_SETTINGS, optimize_nurses=True, repair_offspring=True)
@@ -0,0 +1,45 @@
+from chromosome import Chromosome, random_population
+from evaluator import SOFT_COMPONENTS
+from ot_packing import OTPacking
+
+
+def ot_cost(ch):
+    # weighted OpenOperatingTheater and SurgeonTransfer costs, from a full evaluation
+    _, costs = Chromosome.evaluator.evaluate_components(ch)
+    weights = Chromosome.evaluator.weights
+    return sum(weights[SOFT_COMPONENTS.index(c)]*costs[c] for c in ("OpenOperatingTheater", "SurgeonTransfer"))
+
+
+def admissions(ch):
+    return [(p.id, p.admission_day, p.room.id if p.room is not None else None) for p in ch.patients]
+
+
+def assert_packing_is_safe(ch, pack):
+    before = (admissions(ch), ot_cost(ch), ch.total_cost[0])
+    changed = pack(ch)
+    assert admissions(ch) == before[0]
+    assert ot_cost(ch) <= before[1]
+    total = Chromosome.evaluator.evaluate(ch)
+    assert ch.tracker.total() == total
+    assert total[0] == before[2] == 0
+    return changed
+
+
+def test_pack_does_not_increase_the_cost(instance):
+    packing = OTPacking()
+    changed = [assert_packing_is_safe(ch, packing.pack) for ch in random_population(6, *instance)]
+    assert sum(changed) > 0
+    # a packed chromosome is not changed again
+    ch = random_population(1, *instance)[0]
+    packing.pack(ch)
+    before = ot_cost(ch)
+    packing.pack(ch)
+    assert ot_cost(ch) == before
+
+
+def test_mutate_does_not_increase_the_cost(instance):
+    packing = OTPacking()
+    changed = [assert_packing_is_safe(ch, lambda ch: packing.mutate(ch, 1.0)) for ch in random_population(6, *instance)]
+    assert any(changed)
+    for ch in random_population(3, *instance):
+        assert not packing.mutate(ch, 0.0)
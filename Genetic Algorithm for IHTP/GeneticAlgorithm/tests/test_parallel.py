@@ -0,0 +1,33 @@
+import random
+from chromosome import Chromosome, random_population
+from GA import GeneticAlgorithm
+from options import GAOptions
+
+
+def run(instance, num_workers, seed, eras=3):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    random.seed(seed)
+    population = random_population(6, *instance)
+    ga = GeneticAlgorithm(population, eras, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                          report=False, options=GAOptions(num_workers=num_workers))
+    ga.evolve()
+    return ga.current_population
+
+
+def assert_valid(population):
+    assert len(population) == 6
+    for ch in population:
+        assert ch.total_cost[0] == 0
+        assert ch.total_cost == Chromosome.evaluator.evaluate(ch)
+
+
+def test_seeded_parallel_run_is_reproducible(instance):
+    first = run(instance, 3, seed=7)
+    second = run(instance, 3, seed=7)
+    assert [ch.to_json() for ch in first] == [ch.to_json() for ch in second]
+    assert [ch.total_cost for ch in first] == [ch.total_cost for ch in second]
+
+
+def test_sequential_and_parallel_populations_are_valid(instance):
+    assert_valid(run(instance, 1, seed=7))
+    assert_valid(run(instance, 3, seed=7))
@@ -0,0 +1,71 @@
+import copy
+import random
+from chromosome import Chromosome
+from GA import GeneticAlgorithm
+from options import GAOptions
+from repair import OffspringRepair
+
+
+def make_ga(population, instance, repair):
+    patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D = instance
+    return GeneticAlgorithm(population, 1, patients, nurses, rooms, occupants, surgeons, ots, room_ids, ot_ids, D,
+                            mutation_probability=0.5, report=False, options=GAOptions(repair=repair))
+
+
+def unschedule(patient):
+    patient.room.remove_patient(patient)
+    patient.operating_theater.unschedule_patient(patient)
+    patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+    patient.admission_day = None
+    patient.room = None
+    patient.operating_theater = None
+
+
+def test_unscheduled_mandatory_patients_are_placed_again(population):
+    ch = copy.deepcopy(population[0])
+    mandatory = [p for p in ch.patients if p.mandatory and p.admission_day is not None][:2]
+    for patient in mandatory:
+        unschedule(patient)
+    ch.compute_cost()
+    assert ch.total_cost[0] > 0
+    assert OffspringRepair().repair(ch)
+    ch.compute_cost()
+    assert ch.total_cost == (0, ch.total_cost[1])
+    assert all(p.admission_day is not None for p in mandatory)
+    assert ch.tracker.total() == Chromosome.evaluator.evaluate(ch)
+
+
+def test_children_with_hard_violations_are_repaired(population, instance):
+    repair = OffspringRepair()
+    ga = make_ga(population, instance, repair)
+    outcomes = []
+    for _ in range(40):
+        for child in ga.crossover(*random.sample(population, 2)):
+            # the steps of _breed_child
+            child = ga.mutation(child)
+            child.fix_uncovered_rooms()
+            child.compute_cost()
+            repaired = ga.repair_child(child)
+            if repaired is not None: # as in GeneticAlgorithm.count_child
+                repair.count(repaired)
+            outcomes.append(repaired)
+            # the tracker follows the moves of the repair, also when the child is rejected halfway
+            assert child.tracker.total() == Chromosome.evaluator.evaluate(child)
+            if repaired is False:
+                assert child.total_cost[0] > 0 # not admitted
+            else:
+                assert child.total_cost == Chromosome.evaluator.evaluate(child)
+            if repaired:
+                assert child.total_cost[0] == 0
+    assert True in outcomes
+    assert repair.report() == f"Repair: {outcomes.count(True)} repaired, {outcomes.count(False)} rejected"
+
+
+def test_children_are_rejected_without_repair(population, instance):
+    ga = make_ga(population, instance, None)
+    for _ in range(20):
+        for child in ga.crossover(*random.sample(population, 2)):
+            child = ga.mutation(child)
+            child.fix_uncovered_rooms()
+            child.compute_cost()
+            assert ga.repair_child(child) == (None if child.total_cost[0] == 0 else False)
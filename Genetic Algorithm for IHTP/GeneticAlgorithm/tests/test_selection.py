@@ -0,0 +1,33 @@
+import random
+from types import SimpleNamespace
+from selection import SteadyStateReplacement, cost
+
+
+def chromosome(total_cost, value):
+    return SimpleNamespace(total_cost=(0, total_cost), hasher=SimpleNamespace(value=value))
+
+
+def test_replace_worst_keeps_the_population_sorted():
+    rnd = random.Random(3)
+    population = sorted((chromosome(rnd.randint(0, 50), i) for i in range(10)), key=cost)
+    present = {ch.hasher.value for ch in population}
+    strategy = SteadyStateReplacement()
+    for i in range(10, 200):
+        child = chromosome(rnd.randint(0, 60), i)
+        worst = population[-1]
+        inserted = strategy.replace_worst(population, present, child)
+        assert inserted == (cost(child) < cost(worst))
+        assert len(population) == 10
+        assert [cost(ch) for ch in population] == sorted(cost(ch) for ch in population)
+        assert present == {ch.hasher.value for ch in population}
+        if inserted:
+            # after the chromosomes with the same cost, as bisect.insort
+            position = population.index(child)
+            assert position == len(population)-1 or cost(population[position+1]) > cost(child)
+
+
+def test_duplicate_schedule_is_not_inserted():
+    population = [chromosome(1, 0), chromosome(5, 1)]
+    present = {0, 1}
+    assert not SteadyStateReplacement().replace_worst(population, present, chromosome(2, 0))
+    assert [ch.hasher.value for ch in population] == [0, 1]
@@ -0,0 +1,78 @@
+import copy
+import json
+from chromosome import Chromosome, random_population
+from warm_start import WarmStart
+
+
+def assert_valid(ch):
+    assert all(p.admission_day is not None for p in ch.patients if p.mandatory)
+    ch.compute_cost()
+    assert ch.total_cost[0] == 0
+    assert ch.total_cost == Chromosome.evaluator.evaluate(ch)
+
+
+def test_from_json_round_trip(instance, population):
+    for ch in random_population(3, *instance) + population:
+        rebuilt = Chromosome.from_json(ch.to_json(), *instance)
+        assert rebuilt.to_json() == ch.to_json()
+        rebuilt.compute_cost()
+        assert rebuilt.total_cost == ch.total_cost
+
+
+def test_from_json_of_a_partial_solution(instance, population):
+    ch = population[0]
+    solution = copy.deepcopy(ch.to_json())
+    scheduled = [p for p in solution["patients"] if p["admission_day"] != "none"]
+    dropped, unknown_room, unknown_ot = scheduled[0], scheduled[1], scheduled[2]
+    solution["patients"].remove(dropped)
+    unknown_room["room"] = "no_room"
+    unknown_ot["operating_theater"] = "no_ot"
+    solution["patients"].append({"id": "no_patient", "admission_day": 0, "room": "r0", "operating_theater": "t0"})
+    solution["nurses"][0]["assignments"].append({"day": 0, "shift": "no_shift", "rooms": ["r0"]})
+    solution["nurses"][1]["assignments"].append({"day": 0, "shift": "early", "rooms": ["no_room"]})
+    solution["nurses"].append({"id": "no_nurse", "assignments": [{"day": 0, "shift": "early", "rooms": ["r0"]}]})
+
+    rebuilt = Chromosome.from_json(solution, *instance)
+    assert rebuilt is not None
+    assert_valid(rebuilt)
+    # the known patients keep their position of the solution
+    kept = {p["id"]: p for p in solution["patients"]}
+    for p in rebuilt.to_json()["patients"]:
+        if p["id"] not in (dropped["id"], unknown_room["id"], unknown_ot["id"]):
+            assert p == kept[p["id"]]
+
+
+def test_from_json_of_an_infeasible_solution(instance, population):
+    # every patient in the same room and operating theater on its release day: what does not fit is dropped
+    solution = copy.deepcopy(population[0].to_json())
+    patients = {p.id: p for p in population[0].patients}
+    for p in solution["patients"]:
+        p.update(admission_day=patients[p["id"]].surgery_release_day, room="r0", operating_theater="t0")
+    rebuilt = Chromosome.from_json(solution, *instance)
+    assert rebuilt is not None
+    assert_valid(rebuilt)
+
+
+def write_archive(solutions_dir, instance_name, chromosomes):
+    (solutions_dir / instance_name).mkdir(parents=True)
+    for ch in chromosomes:
+        with open(solutions_dir / instance_name / f"ch_{ch.total_cost[0]}_{ch.total_cost[1]}.json", "w") as f:
+            json.dump(ch.to_json(), f)
+
+
+def test_warm_start_population(instance, population, tmp_path):
+    archived = sorted(population[:2], key=lambda ch: ch.total_cost)
+    write_archive(tmp_path, "t01", archived)
+    warm_start = WarmStart(solutions_dir=str(tmp_path))
+    seeded = warm_start.population(8, "t01", *instance)
+    assert warm_start.loaded == 2
+    assert len(seeded) == 4
+    assert [ch.to_json() for ch in seeded[:2]] == [ch.to_json() for ch in archived]
+    assert len(set(ch.hasher.value for ch in seeded)) == 4
+    for ch in seeded:
+        assert ch.total_cost[0] == 0
+        assert ch.total_cost == Chromosome.evaluator.evaluate(ch)
+
+
+def test_warm_start_without_archive(instance, tmp_path):
+    assert WarmStart(solutions_dir=str(tmp_path)).population(8, "t01", *instance) == []
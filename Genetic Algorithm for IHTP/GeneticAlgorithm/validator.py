@@ -0,0 +1,173 @@
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import native_validator
+from evaluator import record_totals
+from globals import input_file
+
+# Validator executable: the path in IHTP_VALIDATOR, otherwise the one built by the Makefile next to this module,
+# otherwise IHTP_Validator_2.exe
+_built_validator = os.path.join(os.path.dirname(os.path.abspath(__file__)), "IHTP_Validator_2")
+VALIDATOR = os.environ.get("IHTP_VALIDATOR", _built_validator if os.path.exists(_built_validator) else "IHTP_Validator_2.exe")
+
+_scratch_dir = None
+# Whether the validator binary has the --batch mode (None until the first batch is tried)
+_batch_supported = None
+# NativeValidator of each instance file, when the shared library libihtp_validator.so has been built. With the
+# library, the functions of this module do not write files or start processes.
+_native_validators = {}
+
+
+def native(instance_file=input_file):
+    # The NativeValidator of the instance, or None if the shared library is not available
+    if not native_validator.available():
+        return None
+    if instance_file not in _native_validators:
+        _native_validators[instance_file] = native_validator.NativeValidator(instance_file)
+    return _native_validators[instance_file]
+
+
+def scratch_dir():
+    # Private directory for the temporary solution files. It is created in memory (/dev/shm) when
+    # available and it is removed at exit, so several GA runs can share the same working directory.
+    global _scratch_dir
+    if _scratch_dir is None or not os.path.isdir(_scratch_dir):
+        base = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+        _scratch_dir = tempfile.mkdtemp(prefix="ihtp_", dir=base)
+        atexit.register(shutil.rmtree, _scratch_dir, True)
+    return _scratch_dir
+
+
+def write_solution(solution):
+    # It writes the solution (in the format of Chromosome.to_json) to a new file with a unique name
+    fd, name_file = tempfile.mkstemp(prefix="ch_", suffix=".json", dir=scratch_dir())
+    with os.fdopen(fd, "w") as f:
+        json.dump(solution, f)
+    return name_file
+
+
+def parse_totals(output):
+    # (total violations, total cost) from the text printed by the validator
+    hard_violations = None
+    cost = None
+    for line in output.splitlines():
+        if "Total violations" in line:
+            hard_violations = int(line.strip().split('=')[1])
+        if "Total cost" in line:
+            cost = int(line.strip().split('=')[1])
+    return (hard_violations, cost)
+
+
+def run_validator(solution_file, instance_file=input_file):
+    # It returns the output of the validator, read directly from its stdout (or formatted in the same way
+    # from the record of the shared library)
+    validator = native(instance_file)
+    if validator is not None:
+        return validator.format_report(validator.evaluate_file(solution_file))
+    result = subprocess.run([VALIDATOR, instance_file, solution_file], stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+    return result.stdout
+
+
+def validate(solution, instance_file=input_file):
+    validator = native(instance_file)
+    if validator is not None:
+        return record_totals(validator.evaluate_solution(solution))
+    name_file = write_solution(solution)
+    try:
+        return parse_totals(run_validator(name_file, instance_file))
+    finally:
+        os.remove(name_file)
+
+
+def run_batch(args, stdin_text=None):
+    # It runs the validator in batch mode and returns the records printed on stdout, one per solution.
+    # It returns None when the validator does not support the batch mode (binary built before it).
+    global _batch_supported
+    if _batch_supported == False:
+        return None
+    result = subprocess.run([VALIDATOR] + args, input=stdin_text, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        if _batch_supported is None:
+            _batch_supported = False
+            return None
+        raise RuntimeError(f"{VALIDATOR} failed: {result.stderr.strip()}")
+    _batch_supported = True
+    return [json.loads(line) for line in result.stdout.splitlines() if line.strip() != ""]
+
+
+def validate_chromosomes(chromosomes, instance_file=input_file):
+    # (total violations, total cost) of each chromosome, scored from its objects by the shared library when
+    # it is available, otherwise from its solution file
+    validator = native(instance_file)
+    if validator is not None:
+        return [record_totals(validator.evaluate(ch)) for ch in chromosomes]
+    if len(chromosomes) == 1:
+        return [validate(chromosomes[0].to_json(), instance_file)]
+    return validate_many([ch.to_json() for ch in chromosomes], instance_file)
+
+
+def validate_batch(solutions, instance_file=input_file):
+    # It evaluates all the solutions with a single launch of the validator, that reads the instance only once.
+    # It returns one record per solution with all the violations and costs (see IHTP_Validator_2.cc),
+    # or None when the validator does not support the batch mode.
+    validator = native(instance_file)
+    if validator is not None:
+        records = [validator.evaluate_solution(solution) for solution in solutions]
+        for index, record in enumerate(records):
+            record["index"] = index
+        return records
+    stdin_text = "".join(json.dumps(solution) + "\n" for solution in solutions)
+    return run_batch([instance_file, "--batch"], stdin_text)
+
+
+def validate_directory(solutions_dir, instance_file=input_file):
+    # Records of all the .json solutions of a directory, sorted by file name. The file is in record["file"].
+    validator = native(instance_file)
+    if validator is not None:
+        records = []
+        for name in sorted(f for f in os.listdir(solutions_dir) if f.endswith(".json")):
+            record = validator.evaluate_file(os.path.join(solutions_dir, name))
+            record["file"] = os.path.join(solutions_dir, name)
+            records.append(record)
+        return records
+    return run_batch([instance_file, "--batch", solutions_dir])
+
+
+def validate_many(solutions, instance_file=input_file, max_processes=None):
+    # It evaluates a batch of solutions, with a single validator process when the batch mode is available,
+    # otherwise running up to max_processes validators at the same time.
+    # The results are returned in the same order of the solutions.
+    records = validate_batch(solutions, instance_file) if len(solutions) > 1 else None
+    if records is not None:
+        return [record_totals(record) for record in records]
+    if max_processes is None:
+        max_processes = os.cpu_count() or 1
+    name_files = [write_solution(solution) for solution in solutions]
+    results = []
+    try:
+        for i in range(0, len(name_files), max_processes):
+            processes = [subprocess.Popen([VALIDATOR, instance_file, name_file], stdout=subprocess.PIPE,
+                                          stderr=subprocess.STDOUT, text=True)
+                         for name_file in name_files[i:i+max_processes]]
+            for process in processes:
+                results.append(parse_totals(process.communicate()[0]))
+    finally:
+        for name_file in name_files:
+            os.remove(name_file)
+    return results
+
+
+if __name__ == "__main__":
+    # Usage: python validator.py <instance_file> <solutions_dir>
+    # Re-scoring of an archive of solutions, reading the instance only once
+    records = validate_directory(sys.argv[2], sys.argv[1])
+    if records is None:
+        sys.exit(f"{VALIDATOR} does not support the batch mode and {native_validator.LIBRARY} is missing, rebuild them from IHTP_Validator_2.cc")
+    for record in records:
+        print(os.path.basename(record["file"]), record.get("error", record_totals(record)))
@@ -0,0 +1,90 @@
+import copy
+import glob
+import json
+import os
+import random
+from chromosome import Chromosome
+
+
+class WarmStart:
+    # First population seeded with the best max_solutions archived solutions of the instance and perturbed
+    # variants of them, up to a fraction of the population.
+    def __init__(self, solutions_dir="solutions", max_solutions=5, fraction=0.5, perturbation=0.1,
+                 admission_probability=0.5, attempts_per_chromosome=5):
+        self.solutions_dir = solutions_dir
+        self.max_solutions = max_solutions
+        self.fraction = fraction
+        self.perturbation = perturbation
+        self.admission_probability = admission_probability
+        self.attempts_per_chromosome = attempts_per_chromosome
+        self.loaded = 0
+        self.variants = 0
+        self.failures = 0
+
+    def report(self):
+        report = f"Warm start: {self.loaded} archived solutions, {self.variants} variants, {self.failures} failures"
+        self.loaded = 0
+        self.variants = 0
+        self.failures = 0
+        return report
+
+    def solution_files(self, instance_name):
+        # archived solutions of the instance, best first
+        files = glob.glob(os.path.join(self.solutions_dir, instance_name, "ch_*_*.json"))
+        costs = {f: tuple(int(x) for x in os.path.basename(f)[3:-5].split("_")) for f in files}
+        return sorted(files, key=lambda f: costs[f])[:self.max_solutions]
+
+    def load(self, instance_name, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D):
+        # chromosomes without hard violations rebuilt from the archived solutions
+        seeds = []
+        for solution_file in self.solution_files(instance_name):
+            with open(solution_file, "r") as f:
+                ch = Chromosome.from_json(json.load(f), patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D)
+            if ch is not None:
+                ch.compute_cost()
+            if ch is None or ch.total_cost[0] != 0:
+                self.failures += 1
+                continue
+            seeds.append(ch)
+        self.loaded += len(seeds)
+        return seeds
+
+    def population(self, size, instance_name, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D):
+        # It returns up to fraction*size chromosomes: the archived solutions and variants of them, all
+        # different and without hard violations (none if the instance has no archived solutions)
+        size = int(self.fraction*size)
+        seeds = self.load(instance_name, patients, occupants, rooms, nurses, surgeons, ots, room_ids, ot_ids, D)[:size]
+        population = list(seeds)
+        present = set(ch.hasher.value for ch in population)
+        for _ in range((size-len(population))*self.attempts_per_chromosome):
+            if len(population) == size or len(seeds) == 0:
+                break
+            ch = self.perturb(random.choice(seeds))
+            if ch is not None:
+                ch.compute_cost()
+            if ch is None or ch.total_cost[0] != 0 or ch.hasher.value in present:
+                self.failures += 1
+                continue
+            present.add(ch.hasher.value)
+            population.append(ch)
+            self.variants += 1
+        return population
+
+    def perturb(self, seed):
+        # variant of seed, or None if a mandatory patient cannot be scheduled again
+        ch = copy.deepcopy(seed)
+        scheduled = [p for p in ch.patients if p.admission_day is not None]
+        moved = random.sample(scheduled, max(1, int(self.perturbation*len(scheduled)))) if len(scheduled) > 0 else []
+        for patient in moved:
+            patient.room.remove_patient(patient)
+            patient.operating_theater.unschedule_patient(patient)
+            patient.surgeon.unschedule_surgery(patient.admission_day, patient.surgery_duration)
+            patient.admission_day = None
+            patient.room = None
+            patient.operating_theater = None
+        for patient in moved:
+            if patient.initialize_patient(self.admission_probability) == False and patient.mandatory:
+                return None
+        if ch.fix_uncovered_rooms() == False:
+            return None
+        return ch